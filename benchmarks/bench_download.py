@@ -0,0 +1,113 @@
+"""
+Benchmark: download throughput against a local HTTP server.
+
+Compares the original loop (iter_content(8192) + f.write of a new bytes
+object per chunk) with KodiDownloader's adaptive, buffer-reusing write path,
+single stream and segmented.
+
+    python benchmarks/bench_download.py [size_mb]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.downloader import KodiDownloader
+from kodimanager.core.http_client import HttpClient
+
+
+class _Handler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def send_head(self):
+        # Byte range support on top of the stdlib file handler
+        path = self.translate_path(self.path)
+        rng = self.headers.get('Range')
+        self._remaining = None
+        if not rng or not os.path.isfile(path):
+            return super().send_head()
+        size = os.path.getsize(path)
+        start, end = rng.split('=')[1].split('-')
+        start, end = int(start), int(end) if end else size - 1
+        f = open(path, 'rb')
+        f.seek(start)
+        self.send_response(206)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        self._remaining = end - start + 1
+        return f
+
+    def end_headers(self):
+        self.send_header('Accept-Ranges', 'bytes')
+        super().end_headers()
+
+    def copyfile(self, source, outputfile):
+        remaining = self._remaining
+        if remaining is None:
+            return super().copyfile(source, outputfile)
+        while remaining:
+            chunk = source.read(min(remaining, 1024 * 1024))
+            outputfile.write(chunk)
+            remaining -= len(chunk)
+
+
+def legacy_download(url, dest):
+    with requests.get(url, stream=True, timeout=30) as r:
+        r.raise_for_status()
+        with open(dest, 'wb') as f:
+            for chunk in r.iter_content(chunk_size=8192):
+                if chunk:
+                    f.write(chunk)
+
+
+def timed(label, func, size, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28}{best:>8.2f}s{size / best / 1e6:>10.0f} MB/s")
+    return best
+
+
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    size = size_mb * 1024 * 1024
+    root = tempfile.mkdtemp(prefix='kodimanager-bench-')
+    try:
+        src = os.path.join(root, 'srv', 'kodi.exe')
+        os.makedirs(os.path.dirname(src))
+        with open(src, 'wb') as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        handler = lambda *a, **kw: _Handler(*a, directory=os.path.join(root, 'srv'), **kw)
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{server.server_address[1]}/kodi.exe"
+        dest = os.path.join(root, 'out.exe')
+        dl = KodiDownloader(config_dir=root, http=HttpClient())
+
+        print(f"File: {size_mb} MB")
+        legacy = timed("legacy iter_content(8192)", lambda: legacy_download(url, dest), size)
+        single = timed("adaptive, single stream", lambda: dl.download_file(url, dest, segments=1), size)
+        timed("adaptive, segmented", lambda: dl.download_file(url, dest), size)
+        print(f"single-stream gain over legacy: {legacy / single:.2f}x")
+        server.shutdown()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: release listing parse, BeautifulSoup full tree vs streaming scanner.
+
+Builds a synthetic nginx-style directory index with tens of thousands of
+entries and parses it both ways, fed in 64 KB chunks for the streaming side.
+
+    python benchmarks/bench_listing_parser.py [entries]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.listing_parser import RELEASE_PATTERN, iter_releases
+
+BASE = "https://mirrors.kodi.tv/releases/windows/win64/"
+CHUNK = 65536
+
+
+def build_listing(entries: int) -> str:
+    lines = ['<html><head><title>Index of /releases/windows/win64/</title></head><body><pre>',
+             '<a href="../">../</a>']
+    for i in range(entries):
+        major, minor = 17 + i % 6, i % 10
+        name = (f"kodi-{major}.{minor}.{i}-Omega-x64.exe" if i % 3
+                else f"kodi-{major}.{minor}-{i}-Beta{i % 4}-Nexus-x64.exe.sha256")
+        lines.append(f'<a href="{name}">{name[:50]}</a>{" " * 8}01-Jan-2024 00:00{" " * 6}{i * 7919 % 99999999}')
+    lines.append('</pre><hr></body></html>')
+    return '\n'.join(lines)
+
+
+def parse_bs4(text: str):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(text, 'html.parser')
+    out = []
+    for link in soup.find_all('a'):
+        href = link.get('href')
+        if href and RELEASE_PATTERN.fullmatch(href):
+            out.append(href)
+    return out
+
+
+def parse_streaming(text: str):
+    chunks = (text[i:i + CHUNK] for i in range(0, len(text), CHUNK))
+    return [r['filename'] for r in iter_releases(chunks, BASE)]
+
+
+def measure(func, text, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    func(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    text = build_listing(entries)
+    print(f"Listing: {entries} entries, {len(text) / 1e6:.1f} MB")
+
+    start = time.perf_counter()
+    import bs4  # noqa: F401
+    print(f"bs4 import: {(time.perf_counter() - start) * 1000:.1f} ms (now lazy)")
+
+    stream_t, stream_mem, stream_res = measure(parse_streaming, text)
+    soup_t, soup_mem, soup_res = measure(parse_bs4, text)
+    assert stream_res == soup_res, "parsers disagree"
+
+    print(f"{'parser':<12}{'time':>10}{'peak mem':>12}")
+    print(f"{'bs4':<12}{soup_t * 1000:>8.1f}ms{soup_mem / 1e6:>10.1f}MB")
+    print(f"{'streaming':<12}{stream_t * 1000:>8.1f}ms{stream_mem / 1e6:>10.1f}MB")
+    print(f"speedup: {soup_t / stream_t:.1f}x, {len(stream_res)} releases")
+
+
+if __name__ == '__main__':
+    main()
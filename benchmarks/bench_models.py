@@ -0,0 +1,98 @@
+"""
+Benchmark: KodiInstance footprint and InstanceManager load time.
+
+Compares the previous plain dataclass (asdict serialisation) with the
+slotted model, then times opening a manager over a registry of N records
+and listing them, as the main window does at startup.
+
+    python benchmarks/bench_models.py [instances]
+"""
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.manager import InstanceManager
+from kodimanager.core.models import KodiInstance
+from kodimanager.core.registry import open_registry
+
+
+@dataclass
+class LegacyInstance:
+    id: str
+    name: str
+    path: str
+    version: str
+    created_at: float
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def records(n):
+    return [{'id': str(uuid.uuid4()), 'name': f"Kodi {i}", 'path': f"D:\\Kodi\\Instances\\Kodi {i}",
+             'version': "21.1", 'created_at': time.time()} for i in range(n)]
+
+
+def measure(fn):
+    """Returns (result, seconds, bytes still allocated by the result)."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def bench_models(data):
+    print(f"{'model':<10}{'build':>10}{'memory':>12}{'to_dict':>12}")
+    for label, cls in (('dataclass', LegacyInstance), ('slotted', KodiInstance)):
+        # Field values are shared with `data`, so only the objects are counted
+        objs, build, size = measure(lambda: [cls(d['id'], d['name'], d['path'], d['version'], d['created_at'])
+                                             for d in data])
+        start = time.perf_counter()
+        for obj in objs:
+            obj.to_dict()
+        serialise = time.perf_counter() - start
+        print(f"{label:<10}{build * 1000:>8.1f}ms{size / len(data):>10.0f}B {serialise * 1000:>9.1f}ms")
+
+
+def bench_manager(data):
+    root = tempfile.mkdtemp(prefix='kodimanager-bench-')
+    try:
+        registry = open_registry(root, 'json')
+        registry.commit([], [], lambda: data)
+        registry.close()
+
+        def open_and_list():
+            manager = InstanceManager(config_dir=root)
+            manager.get_all()
+            return manager
+
+        print(f"{'manager':<10}{'open':>10}{'memory':>12}")
+        _, elapsed, size = measure(open_and_list)
+        print(f"{'open+list':<10}{elapsed * 1000:>8.1f}ms{size / 2 ** 20:>10.1f}MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    data = records(n)
+    print(f"{n} instances")
+    bench_models(data)
+    print()
+    bench_manager(data)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: instance registry backends, JSON vs SQLite.
+
+Measures load time and the cost of one mutation (register, version update,
+remove) with a fleet of N instances already stored.
+
+    python benchmarks/bench_registry.py [instances]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.models import KodiInstance
+from kodimanager.core.registry import open_registry
+
+MUTATIONS = 50
+
+
+def make_fleet(n):
+    return [KodiInstance(str(uuid.uuid4()), f"Kodi {i}", f"D:\\Kodi\\Instances\\Kodi {i}", "21.1", time.time())
+            for i in range(n)]
+
+
+def bench(backend, fleet):
+    root = tempfile.mkdtemp(prefix='kodimanager-bench-')
+    try:
+        registry = open_registry(root, backend)
+        instances = {i.id: i for i in fleet}
+        registry.commit(fleet, [], lambda: list(instances.values()))
+        registry.close()
+
+        start = time.perf_counter()
+        registry = open_registry(root, backend)
+        loaded = [KodiInstance.from_dict(d) for d in registry.load()]
+        load_time = time.perf_counter() - start
+        assert len(loaded) == len(fleet)
+
+        snapshot = lambda: list(instances.values())
+        timings = {}
+
+        start = time.perf_counter()
+        for inst in make_fleet(MUTATIONS):
+            instances[inst.id] = inst
+            registry.commit([inst], [], snapshot)
+        timings['register'] = (time.perf_counter() - start) / MUTATIONS
+
+        start = time.perf_counter()
+        for inst in fleet[:MUTATIONS]:
+            inst.version = "21.2"
+            registry.commit([inst], [], snapshot)
+        timings['update'] = (time.perf_counter() - start) / MUTATIONS
+
+        start = time.perf_counter()
+        for inst in fleet[:MUTATIONS]:
+            del instances[inst.id]
+            registry.commit([], [inst.id], snapshot)
+        timings['remove'] = (time.perf_counter() - start) / MUTATIONS
+
+        registry.close()
+        return load_time, timings
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    fleet = make_fleet(n)
+    print(f"Fleet: {n} instances, per-mutation cost averaged over {MUTATIONS} ops")
+    print(f"{'backend':<10}{'load':>10}{'register':>12}{'update':>12}{'remove':>12}")
+    for backend in ('json', 'sqlite'):
+        load_time, t = bench(backend, [KodiInstance(**i.to_dict()) for i in fleet])
+        print(f"{backend:<10}{load_time * 1000:>8.1f}ms"
+              f"{t['register'] * 1000:>10.2f}ms{t['update'] * 1000:>10.2f}ms{t['remove'] * 1000:>10.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
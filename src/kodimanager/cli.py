@@ -0,0 +1,80 @@
+import argparse
+import json
+import sys
+from typing import List, Optional
+
+from .core.manager import InstanceManager
+from .core.progress import format_size
+from .core.usage import CATEGORY_ORDER
+
+# Column titles for the disk usage breakdown
+CATEGORY_LABELS = {
+    'program': "Programa",
+    'addons': "Addons",
+    'packages': "Paquetes",
+    'thumbnails': "Miniaturas",
+    'database': "Bases de datos",
+    'temp': "Temporales",
+    'other': "Otros",
+}
+
+
+def cmd_usage(manager: InstanceManager, args) -> int:
+    instances = manager.get_all()
+    usage = manager.get_all_disk_usage()
+    if args.json:
+        json.dump({i.id: dict(usage[i.id].to_dict(), name=i.name) for i in instances if i.id in usage},
+                  sys.stdout, indent=4)
+        print()
+        return 0
+
+    headers = ["Instancia", "Total"] + [CATEGORY_LABELS[c] for c in CATEGORY_ORDER]
+    rows = []
+    for inst in sorted(instances, key=lambda i: usage[i.id].total if i.id in usage else -1, reverse=True):
+        u = usage.get(inst.id)
+        if u is None:
+            rows.append([inst.name, "no encontrada"] + [""] * len(CATEGORY_ORDER))
+        else:
+            rows.append([inst.name, format_size(u.total)] + [format_size(u.breakdown[c]) for c in CATEGORY_ORDER])
+    widths = [max(len(r[n]) for r in [headers] + rows) for n in range(len(headers))]
+    for row in [headers] + rows:
+        print("  ".join(cell.ljust(w) if n == 0 else cell.rjust(w) for n, (cell, w) in enumerate(zip(row, widths))))
+    return 0
+
+
+def cmd_dedup(manager: InstanceManager, args) -> int:
+    report = manager.plan_dedup()
+    print(f"Archivos de programa analizados: {report.scanned_files} ({format_size(report.scanned_bytes)})")
+    print(f"Duplicados: {report.duplicate_files} en {len(report.groups)} grupos, "
+          f"{format_size(report.reclaimable_bytes)} recuperables")
+    if not args.apply:
+        if report.duplicate_files:
+            print("Ejecuta con --apply para reemplazarlos por enlaces duros.")
+        return 0
+    linked, failed = manager.apply_dedup(report)
+    print(f"Enlazados: {linked}")
+    for path in failed:
+        print(f"No se pudo enlazar: {path}")
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="kodimanager", description="Kodi Manager desde la consola")
+    parser.add_argument('--config-dir', help="Carpeta de configuración (por defecto %%APPDATA%%\\KodiManager)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    usage = commands.add_parser('usage', help="Espacio en disco por instancia")
+    usage.add_argument('--json', action='store_true', help="Salida en JSON")
+    usage.set_defaults(func=cmd_usage)
+
+    dedup = commands.add_parser('dedup', help="Comparte los archivos de programa idénticos entre instancias")
+    dedup.add_argument('--apply', action='store_true', help="Crear los enlaces (por defecto solo informa)")
+    dedup.set_defaults(func=cmd_dedup)
+
+    args = parser.parse_args(argv)
+    manager = InstanceManager(config_dir=args.config_dir)
+    return args.func(manager, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
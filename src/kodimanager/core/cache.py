@@ -0,0 +1,162 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from .listing_parser import make_release
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path: str) -> str:
+    """
+    SHA-256 of a file through a read-only memory map, fed to the hasher in
+    HASH_CHUNK_SIZE slices so large installers are never loaded into RAM.
+    """
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return h.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for offset in range(0, size, HASH_CHUNK_SIZE):
+                    h.update(view[offset:offset + HASH_CHUNK_SIZE])
+            finally:
+                view.release()
+    return h.hexdigest()
+
+
+class InstallerCache:
+    """
+    Content-addressed store for Kodi installers.
+
+    Installers live under `objects/<sha256>.exe` and are described by
+    `index.json` (version, codename, filename, size, hash, last use).
+    Entries are re-hashed on lookup and least-recently-used versions are
+    evicted once the cache grows beyond `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(root, 'objects')
+        self.index_file = os.path.join(root, 'index.json')
+        self._lock = threading.Lock()
+
+        if not os.path.exists(self.objects_dir):
+            os.makedirs(self.objects_dir)
+        self.entries: Dict[str, Dict] = self._load_index()
+        self._adopt_legacy()
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.index_file):
+            return {}
+        try:
+            with open(self.index_file, 'r') as f:
+                return {e['sha256']: e for e in json.load(f)}
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            return {}
+
+    def _adopt_legacy(self):
+        """
+        Moves installers downloaded before the cache existed (plain
+        `<root>/<filename>.exe`) into objects/, so they are found by lookup
+        and count towards the byte budget. Only names make_release
+        recognises are taken; any other executable is left alone, since
+        cached files can be evicted.
+        """
+        try:
+            legacy = [(e, make_release(e.name, '')) for e in os.scandir(self.root) if e.is_file()]
+        except OSError:
+            return
+        legacy = [(e, version_data) for e, version_data in legacy if version_data]
+        # Oldest first, so the budget keeps the most recent downloads
+        legacy.sort(key=lambda item: item[0].stat().st_mtime)
+        for entry, version_data in legacy:
+            try:
+                self.add(entry.path, version_data)
+            except OSError as e:
+                print(f"Could not adopt {entry.path} into the installer cache: {e}")
+
+    def _save_index(self):
+        tmp_path = self.index_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(list(self.entries.values()), f, indent=4)
+        os.replace(tmp_path, self.index_file)
+
+    def object_path(self, sha256: str) -> str:
+        return os.path.join(self.objects_dir, f"{sha256}.exe")
+
+    def total_size(self) -> int:
+        return sum(e['size'] for e in self.entries.values())
+
+    def lookup(self, filename: str) -> Optional[str]:
+        """
+        Returns the path of a verified installer for `filename`, or None.
+        Entries whose file is missing or whose hash no longer matches are dropped.
+        """
+        with self._lock:
+            candidates = [e for e in self.entries.values() if e['filename'] == filename]
+            candidates.sort(key=lambda e: e['last_used'], reverse=True)
+
+            for entry in candidates:
+                path = self.object_path(entry['sha256'])
+                if self._verify(entry, path):
+                    entry['last_used'] = time.time()
+                    self._save_index()
+                    return path
+                self._drop(entry)
+                self._save_index()
+            return None
+
+    def _verify(self, entry: Dict, path: str) -> bool:
+        try:
+            if os.path.getsize(path) != entry['size']:
+                return False
+            return sha256_file(path) == entry['sha256']
+        except OSError:
+            return False
+
+    def add(self, src_path: str, version_data: Dict[str, str], sha256: Optional[str] = None) -> str:
+        """
+        Moves a downloaded installer into the cache and returns its new path.
+        Evicts old versions if the cache is over budget.
+        """
+        sha256 = sha256 or sha256_file(src_path)
+        dest = self.object_path(sha256)
+
+        with self._lock:
+            os.replace(src_path, dest)
+            self.entries[sha256] = {
+                'sha256': sha256,
+                'filename': version_data['filename'],
+                'version': version_data.get('version', ''),
+                'codename': version_data.get('codename', ''),
+                'size': os.path.getsize(dest),
+                'last_used': time.time(),
+            }
+            self._evict(keep=sha256)
+            self._save_index()
+        return dest
+
+    def _evict(self, keep: str):
+        total = self.total_size()
+        for entry in sorted(self.entries.values(), key=lambda e: e['last_used']):
+            if total <= self.max_bytes:
+                break
+            if entry['sha256'] == keep:
+                continue
+            total -= entry['size']
+            self._drop(entry)
+
+    def _drop(self, entry: Dict):
+        self.entries.pop(entry['sha256'], None)
+        try:
+            os.remove(self.object_path(entry['sha256']))
+        except OSError:
+            pass
@@ -0,0 +1,214 @@
+import os
+import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .cache import sha256_file
+from .progress import as_reporter
+from .reclaimer import TOMBSTONE_MARKER
+from ..utils.walk import is_junction
+
+# Linking tiny files saves next to nothing and costs a directory entry each
+MIN_DEDUP_SIZE = 4096
+HASH_WORKERS = 4
+# Per-instance data: never shared between instances nor part of a template
+EXCLUDED_TOP_LEVEL = {'portable_data'}
+LINK_SUFFIX = '.kmlink'
+
+
+@dataclass
+class ProgramFile:
+    path: str
+    size: int
+    dev: int
+    ino: int
+    nlink: int
+    mtime_ns: int
+
+
+@dataclass
+class DedupGroup:
+    """Files with identical content on one volume; `duplicates` get linked to `canonical`."""
+    size: int
+    digest: str
+    canonical: ProgramFile
+    duplicates: List[ProgramFile] = field(default_factory=list)
+
+
+@dataclass
+class DedupReport:
+    groups: List[DedupGroup] = field(default_factory=list)
+    scanned_files: int = 0
+    scanned_bytes: int = 0
+    # Freed once every duplicate is a hardlink to its canonical copy
+    reclaimable_bytes: int = 0
+
+    @property
+    def duplicate_files(self) -> int:
+        return sum(len(g.duplicates) for g in self.groups)
+
+
+def is_program_folder(entry: os.DirEntry, top: bool) -> bool:
+    """Whether a subfolder (of the instance root when `top`) holds program files."""
+    if entry.name.startswith(TOMBSTONE_MARKER) or is_junction(entry):
+        return False
+    return not (top and entry.name.lower() in EXCLUDED_TOP_LEVEL)
+
+
+def iter_program_files(root: str) -> Iterator[ProgramFile]:
+    """Regular files of an instance outside portable_data (symlinks and tombstones skipped)."""
+    stack = [(root, True)]
+    while stack:
+        folder, top = stack.pop()
+        try:
+            with os.scandir(folder) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if is_program_folder(entry, top):
+                        stack.append((entry.path, False))
+                elif entry.is_file(follow_symlinks=False):
+                    # os.stat, not entry.stat(): on Windows only the former fills st_ino/st_nlink
+                    st = os.stat(entry.path, follow_symlinks=False)
+                    yield ProgramFile(entry.path, st.st_size, st.st_dev, st.st_ino, st.st_nlink, st.st_mtime_ns)
+            except OSError:
+                continue
+
+
+def plan_dedup(roots: Iterable[str], on_progress=None, workers: int = HASH_WORKERS) -> DedupReport:
+    """
+    Dry run: finds program files with identical content across `roots`.
+    Files are grouped by volume and size first, so only possible
+    duplicates are hashed (in parallel, one hash per inode).
+    """
+    report = DedupReport()
+    by_size: Dict[Tuple[int, int], Dict[int, List[ProgramFile]]] = {}
+    for root in roots:
+        for f in iter_program_files(root):
+            report.scanned_files += 1
+            report.scanned_bytes += f.size
+            if f.size >= MIN_DEDUP_SIZE:
+                by_size.setdefault((f.dev, f.size), {}).setdefault(f.ino, []).append(f)
+
+    # Only sizes shared by two or more distinct inodes can hold duplicates
+    candidates = [inodes for inodes in by_size.values() if len(inodes) > 1]
+    to_hash = [files[0] for inodes in candidates for files in inodes.values()]
+    reporter = as_reporter(on_progress)
+    total = sum(f.size for f in to_hash)
+    hashed = [0]
+    lock = threading.Lock()
+
+    def digest(f: ProgramFile) -> Optional[str]:
+        try:
+            value = sha256_file(f.path)
+        except OSError:
+            value = None
+        with lock:
+            hashed[0] += f.size
+            done = hashed[0]
+        if reporter:
+            reporter(done, total)
+        return value
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dedup') as pool:
+        digests = dict(zip(((f.dev, f.ino) for f in to_hash), pool.map(digest, to_hash)))
+
+    for inodes in candidates:
+        by_digest: Dict[str, List[List[ProgramFile]]] = {}
+        for ino, files in inodes.items():
+            value = digests.get((files[0].dev, ino))
+            if value:
+                by_digest.setdefault(value, []).append(files)
+        for value, same in by_digest.items():
+            if len(same) < 2:
+                continue
+            # Keep the copy that is already the most shared
+            same.sort(key=lambda files: (-files[0].nlink, files[0].path))
+            group = DedupGroup(same[0][0].size, value, same[0][0])
+            for files in same[1:]:
+                group.duplicates.extend(files)
+                # Space only comes back if no link outside the scanned instances keeps the inode alive
+                if files[0].nlink <= len(files):
+                    report.reclaimable_bytes += group.size
+            report.groups.append(group)
+    return report
+
+
+def _unchanged(f: ProgramFile) -> bool:
+    try:
+        st = os.stat(f.path, follow_symlinks=False)
+    except OSError:
+        return False
+    return (st.st_ino, st.st_size, st.st_mtime_ns) == (f.ino, f.size, f.mtime_ns)
+
+
+def _replace_with(path: str, make_new) -> None:
+    """Builds the replacement next to `path`, then swaps it in atomically."""
+    tmp = path + LINK_SUFFIX
+    try:
+        os.unlink(tmp)
+    except FileNotFoundError:
+        pass
+    make_new(tmp)
+    replaced = False
+    try:
+        try:
+            os.replace(tmp, path)
+        except PermissionError:
+            # Read-only target (Windows)
+            os.chmod(path, stat.S_IWRITE)
+            os.replace(tmp, path)
+        replaced = True
+    finally:
+        if not replaced:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+
+def apply_dedup(report: DedupReport) -> Tuple[int, List[str]]:
+    """
+    Replaces every duplicate with a hardlink to its group's canonical file.
+    Files that changed since the report are skipped. Returns (files linked,
+    paths that could not be linked).
+    """
+    linked = 0
+    failed = []
+    for group in report.groups:
+        canonical = group.canonical
+        if not _unchanged(canonical):
+            failed.extend(f.path for f in group.duplicates)
+            continue
+        for dup in group.duplicates:
+            if not _unchanged(dup):
+                failed.append(dup.path)
+                continue
+            try:
+                _replace_with(dup.path, lambda tmp: os.link(canonical.path, tmp))
+                linked += 1
+            except OSError:
+                # e.g. NTFS' 1023 links per file: carry on from this copy
+                failed.append(dup.path)
+                canonical = dup
+    return linked, failed
+
+
+def unshare_tree(root: str) -> int:
+    """
+    Gives an instance private copies of its hardlinked program files, so
+    an upgrade writing into them cannot change other instances. Returns
+    the number of files copied.
+    """
+    copied = 0
+    for f in iter_program_files(root):
+        if f.nlink > 1:
+            _replace_with(f.path, lambda tmp: shutil.copy2(f.path, tmp))
+            copied += 1
+    return copied
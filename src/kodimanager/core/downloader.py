@@ -1,23 +1,67 @@
-import requests
-from bs4 import BeautifulSoup
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, TYPE_CHECKING
 import os
+import codecs
+import json
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .http_client import HttpClient, shared_client
+from .listing_cache import ReleaseListingCache
+from .listing_parser import ReleaseListingParser
+from .mirrors import MirrorPool
+from .progress import as_reporter
+from .settings import Settings
+
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup
 
 RELEASE_URL = "https://mirrors.kodi.tv/releases/windows/win64/"
 
+# Parallel range download settings
+SEGMENT_COUNT = 4
+MIN_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# Resumable download files: <dest>.part holds the data, <dest>.part.json the plan
+PART_SUFFIX = ".part"
+META_SUFFIX = ".json"
+META_FLUSH_BYTES = 1024 * 1024
+HASH_READ_SIZE = 1024 * 1024
+
+# Adaptive read size: grows while reads fill the buffer faster than FAST_READ seconds
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+FAST_READ = 0.05
+SLOW_READ = 0.5
+
+# Installers are already compressed; an encoded body would also make
+# Content-Length and byte ranges refer to the encoded bytes
+IDENTITY_ENCODING = {'Accept-Encoding': 'identity'}
+
 class KodiDownloader:
-    def __init__(self):
+    def __init__(self, config_dir: Optional[str] = None, http: Optional[HttpClient] = None,
+                 mirror_pool: Optional[MirrorPool] = None):
         self.base_url = RELEASE_URL
+        # Pooled keep-alive session shared by listing, checksum and range requests
+        self.http = http or shared_client()
+        settings = Settings(config_dir)
+        self.mirror_urls = list(settings.get('mirror_urls'))
+        # Mirror stats are only persisted for an explicit config dir, so
+        # throwaway downloaders never rewrite the user's mirrors.json
+        self.mirror_pool = mirror_pool or MirrorPool(config_dir)
+        self.listing_cache = ReleaseListingCache(settings.config_dir, settings.get('release_listing_ttl'))
 
-    def get_available_versions(self) -> List[Dict[str, str]]:
+    def get_available_versions(self, force_refresh: bool = False) -> List[Dict[str, str]]:
         """
         Returns ONLY the latest Stable version.
+        force_refresh skips the cached release listing and its TTL.
         """
         try:
             # 1. Fetch Releases (Stable)
             # We try the specific win64 path on the mirror(s)
-            releases = self._fetch_releases()
+            releases = self._fetch_releases(force_refresh)
             
             # Sort releases by version desc to find latest stable
             def parse_ver(v_str):
@@ -42,89 +86,492 @@ class KodiDownloader:
             print(f"Error fetching versions: {e}")
             return []
 
-    def _fetch_releases(self) -> List[Dict[str, str]]:
-        # User requested redundant mirror check. 
-        # Though the domain is the same, we implement the list iteration logic.
-        urls = [
-            "https://mirrors.kodi.tv/releases/windows/win64/",
-            "https://mirrors.kodi.tv/releases/windows/win64/" # Implicitly what the user asked for as fallback
-        ]
-        
-        # Pattern: kodi-21.0-Omega-x64.exe
-        pattern = re.compile(r'kodi-([0-9]+\.[0-9]+(?:\.[0-9]+)?)(-([A-Za-z0-9]+))?-([A-Za-z0-9]+)-x64\.exe')
-        
-        # Re-implementing correctly with base_url awareness
-        for url in urls:
-            try:
-                response = requests.get(url, timeout=10)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    base_url = url
-                    
-                    # Parse this attempt
-                    local_versions = []
-                    for link in soup.find_all('a'):
-                        href = link.get('href')
-                        if not href: continue
-                        
-                        match = pattern.match(href)
-                        if match:
-                            version_num = match.group(1)
-                            tag = match.group(3) or ""
-                            codename = match.group(4)
-                            
-                            local_versions.append({
-                                'version': version_num,
-                                'tag': tag,
-                                'codename': codename,
-                                'filename': href,
-                                'url': base_url + href,
-                                'is_stable': not bool(tag)
-                            })
-                    if local_versions:
-                        return local_versions # Return success from first working mirror
-            except Exception:
-                continue
+    def _fetch_releases(self, force_refresh: bool = False) -> List[Dict[str, str]]:
+        cached = self.listing_cache.load()
+        if cached and not force_refresh and self.listing_cache.is_fresh(cached):
+            return cached['releases']
+        # A forced refresh downloads the full listing, no conditional GET
+        revalidate = None if force_refresh else cached
+
+        def fetch(url, cancelled):
+            headers = self.listing_cache.conditional_headers(revalidate, url)
+            with self.http.get(url, headers=headers, timeout=10, stream=True) as response:
+                if response.status_code == 304 and revalidate:
+                    # Listing unchanged since last time
+                    return NOT_MODIFIED
+                response.raise_for_status()
+
+                # Parse while the listing streams in, no full document in memory
+                parser = ReleaseListingParser(url)
+                decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+                local_versions = []
+                for chunk in response.iter_content(chunk_size=65536):
+                    if cancelled.is_set():
+                        return None # Another mirror already answered
+                    local_versions.extend(parser.feed(decoder.decode(chunk)))
+                local_versions.extend(parser.feed(decoder.decode(b'', final=True)))
+                if not local_versions:
+                    raise IOError(f"No releases found at {url}")
+                return local_versions, response.headers.get('etag'), response.headers.get('last-modified')
+
+        # Query the fastest mirrors concurrently and keep the first valid listing
+        winner = self.mirror_pool.race(self.mirror_urls, fetch)
+        if winner:
+            url, result = winner
+            if result is NOT_MODIFIED:
+                self.listing_cache.touch(revalidate)
+                return revalidate['releases']
+            local_versions, etag, last_modified = result
+            self.listing_cache.store(url, local_versions, etag, last_modified)
+            return local_versions
+
+        # Every mirror failed: a stale listing is better than nothing
+        if cached:
+            return cached['releases']
         return []
 
-    def _fetch_from_urls(self, urls: List[str]) -> Optional[BeautifulSoup]:
+    def _fetch_from_urls(self, urls: List[str]) -> Optional["BeautifulSoup"]:
         """Helper to try multiple URLs."""
+        # Imported on demand, the release listing does not need it
+        from bs4 import BeautifulSoup
+
         for url in urls:
             try:
-                response = requests.get(url, timeout=10)
+                response = self.http.get(url, timeout=10)
                 response.raise_for_status()
                 return BeautifulSoup(response.text, 'html.parser')
             except Exception:
                 pass
         return None
 
-    def download_file(self, url: str, dest_path: str, progress_callback=None):
+    def download_file(self, url: str, dest_path: str, progress_callback=None, segments: int = SEGMENT_COUNT):
         """
         Downloads the file to dest_path.
-        progress_callback(current, total)
+        progress_callback(current, total), coalesced to a few calls per second.
+        Pass a ProgressReporter instead to receive Progress objects.
+
+        Data is written to `dest_path + '.part'` next to a small metadata
+        record, and only renamed to dest_path once complete. An interrupted
+        download is resumed with Range + If-Range on the next call.
+
+        When the server advertises byte ranges and the file is big enough, the
+        download is split into `segments` ranges fetched concurrently. Otherwise
+        it falls back to a single streamed request.
+        """
+        path, _ = self._download(url, dest_path, as_reporter(progress_callback), segments, ())
+        return path
+
+    def download_with_digest(self, url: str, dest_path: str, progress_callback=None,
+                             algorithms: Tuple[str, ...] = ('sha256',),
+                             expected: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, str]]:
+        """
+        Like download_file, but hashes the data while it is being written and
+        returns (path, {algorithm: hexdigest}). If `expected` digests are given
+        and do not match, the file is removed and IOError is raised.
+        """
+        path, digests = self._download(url, dest_path, as_reporter(progress_callback), SEGMENT_COUNT, algorithms)
+
+        for algorithm, value in (expected or {}).items():
+            if value and digests.get(algorithm) != value.lower():
+                os.remove(path)
+                raise IOError(f"Checksum mismatch ({algorithm}) for {os.path.basename(path)}")
+        return path, digests
+
+    def download_release(self, version_data: Dict[str, str], dest_path: str, progress_callback=None,
+                         expected: Optional[Dict[str, str]] = None) -> Tuple[str, Dict[str, str]]:
         """
+        Downloads a release from the fastest healthy mirror, falling back to
+        the next ones (and finally to the URL from the listing) on failure.
+        Returns (path, digests) like download_with_digest.
+        """
+        candidates = [(mirror, mirror + version_data['filename'])
+                      for mirror in self.mirror_pool.ranked(self.mirror_urls)]
+        if version_data['url'] not in [url for _, url in candidates]:
+            candidates.append((None, version_data['url']))
+        # A .part only resumes from the URL it was started from (validators
+        # are per mirror), so that one goes first whatever the ranking
+        partial = self._partial_url(dest_path)
+        candidates.sort(key=lambda candidate: candidate[1] != partial)
+
+        last_error = None
+        retried = set()
         try:
-            with requests.get(url, stream=True, timeout=30) as r:
-                r.raise_for_status()
-                total_length = r.headers.get('content-length')
-                
-                if dest_path.endswith(os.sep):
-                     # if directory provided, preserve filename
-                     filename = url.split('/')[-1]
-                     dest_path = os.path.join(dest_path, filename)
-
-                with open(dest_path, 'wb') as f:
-                    dl = 0
-                    total_length = int(total_length) if total_length else None
-                    
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            dl += len(chunk)
-                            f.write(chunk)
-                            if progress_callback and total_length:
-                                progress_callback(dl, total_length)
-            return dest_path
+            while candidates:
+                mirror, url = candidates.pop(0)
+                try:
+                    result = self.download_with_digest(url, dest_path, progress_callback, expected=expected)
+                except Exception as e:
+                    last_error = e
+                    if mirror:
+                        self.mirror_pool.record_failure(mirror)
+                    if url not in retried and self._partial_url(dest_path) == url:
+                        # What it got so far was kept: one more try resumes from there
+                        retried.add(url)
+                        candidates.insert(0, (mirror, url))
+                    continue
+                if mirror:
+                    self.mirror_pool.record_success(mirror)
+                return result
+        finally:
+            self.mirror_pool.save()
+        raise last_error
+
+    def fetch_published_checksum(self, url: str, algorithm: str = 'sha256') -> Optional[str]:
+        """
+        Returns the checksum the mirror publishes for `url`, or None.
+        mirrors.kodi.tv (mirrorbits) answers `<file>?sha256`; plain mirrors
+        may carry a `<file>.sha256` sidecar instead.
+        """
+        digest_len = hashlib.new(algorithm).digest_size * 2
+        pattern = re.compile(r'\b([0-9a-fA-F]{%d})\b' % digest_len)
+
+        for checksum_url in (f"{url}?{algorithm}", f"{url}.{algorithm}"):
+            try:
+                # Stream it: a server ignoring the query string would send the whole installer
+                with self.http.get(checksum_url, stream=True, timeout=10) as response:
+                    if response.status_code != 200:
+                        continue
+                    head = next(response.iter_content(chunk_size=4096), b'')
+                match = pattern.search(head.decode('ascii', errors='ignore'))
+                if match:
+                    return match.group(1).lower()
+            except Exception:
+                continue
+        return None
+
+    def _download(self, url: str, dest_path: str, progress_callback, segments: int,
+                  algorithms: Tuple[str, ...]) -> Tuple[str, Dict[str, str]]:
+        try:
+            if dest_path.endswith(os.sep):
+                 # if directory provided, preserve filename
+                 filename = url.split('/')[-1]
+                 dest_path = os.path.join(dest_path, filename)
+
+            part_path = dest_path + PART_SUFFIX
+
+            for attempt in range(2):
+                plan = self._resume_plan(url, part_path) if attempt == 0 else None
+                if plan is None:
+                    self._discard_part(part_path)
+                    plan = self._new_plan(url, part_path, segments)
+
+                hasher = _OrderedHasher(algorithms, part_path)
+                try:
+                    if plan:
+                        self._download_ranges(plan, part_path, progress_callback, hasher)
+                    else:
+                        self._download_single(url, part_path, progress_callback, hasher)
+                    break
+                except _ResourceChanged:
+                    # File changed on the server since the .part was started
+                    if attempt:
+                        raise IOError("Remote file keeps changing, download aborted")
+
+            os.replace(part_path, dest_path)
+            self._discard_part(part_path, keep_data=True)
+            return dest_path, hasher.hexdigests()
         except Exception as e:
             print(f"Download error: {e}")
             raise e
 
+    def _probe(self, url: str) -> Optional[Dict]:
+        """
+        HEAD request returning length, resolved url and validators when the
+        server supports byte ranges, None otherwise. The resolved URL is used
+        for every range so all of them hit the same mirror after redirects.
+        """
+        try:
+            r = self.http.head(url, headers=IDENTITY_ENCODING, allow_redirects=True, timeout=10)
+            r.raise_for_status()
+        except Exception:
+            return None
+
+        if r.headers.get('accept-ranges', '').lower() != 'bytes':
+            return None
+        try:
+            length = int(r.headers.get('content-length'))
+        except (TypeError, ValueError):
+            return None
+
+        etag = r.headers.get('etag')
+        return {
+            'total': length,
+            'final_url': r.url,
+            # Weak ETags are not allowed in If-Range
+            'etag': etag if etag and not etag.startswith('W/') else None,
+            'last_modified': r.headers.get('last-modified'),
+        }
+
+    def _new_plan(self, url: str, part_path: str, segments: int) -> Optional[Dict]:
+        probe = self._probe(url)
+        if not probe:
+            return None
+
+        total_length = probe['total']
+        # Never make segments smaller than MIN_SEGMENT_SIZE
+        segments = max(1, min(segments, total_length // MIN_SEGMENT_SIZE))
+        seg_size = max(1, -(-total_length // segments))
+
+        plan = dict(probe, url=url)
+        plan['segments'] = [[start, min(start + seg_size, total_length) - 1, 0]
+                            for start in range(0, total_length, seg_size)]
+
+        # Preallocate so every worker can write at its own offset
+        with open(part_path, 'wb') as f:
+            f.truncate(total_length)
+        self._save_part_meta(part_path, plan)
+        return plan
+
+    @staticmethod
+    def _partial_url(dest_path: str) -> Optional[str]:
+        """URL an interrupted download to dest_path was started from, if its .part is still there."""
+        try:
+            with open(dest_path + PART_SUFFIX + META_SUFFIX, 'r') as f:
+                url = json.load(f).get('url')
+            return url if os.path.exists(dest_path + PART_SUFFIX) else None
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _resume_plan(self, url: str, part_path: str) -> Optional[Dict]:
+        """Returns the saved plan of an interrupted download if still valid."""
+        meta_path = part_path + META_SUFFIX
+        try:
+            with open(meta_path, 'r') as f:
+                plan = json.load(f)
+            if plan.get('url') != url or os.path.getsize(part_path) != plan['total']:
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # Ask the same mirror again; ETags are not shared between mirrors
+        probe = self._probe(plan['final_url'])
+        if not probe or probe['total'] != plan['total']:
+            return None
+        if plan['etag'] and probe['etag'] != plan['etag']:
+            return None
+        if not plan['etag'] and (not plan['last_modified'] or probe['last_modified'] != plan['last_modified']):
+            return None
+        return plan
+
+    def _save_part_meta(self, part_path: str, plan: Dict):
+        tmp_path = part_path + META_SUFFIX + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(plan, f)
+        os.replace(tmp_path, part_path + META_SUFFIX)
+
+    def _discard_part(self, part_path: str, keep_data: bool = False):
+        paths = [part_path + META_SUFFIX] if keep_data else [part_path, part_path + META_SUFFIX]
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _download_single(self, url: str, dest_path: str, progress_callback, hasher: "_OrderedHasher"):
+        with self.http.get(url, headers=IDENTITY_ENCODING, stream=True, timeout=30) as r:
+            r.raise_for_status()
+            total_length = r.headers.get('content-length')
+            if r.headers.get('content-encoding', 'identity') != 'identity':
+                # Sent encoded anyway: Content-Length counts the encoded bytes
+                total_length = None
+
+            with open(dest_path, 'wb') as f:
+                total_length = int(total_length) if total_length else None
+                if total_length:
+                    # Preallocate, the filesystem can lay the file out in one go
+                    f.truncate(total_length)
+                state = {'dl': 0}
+
+                def on_block(block):
+                    hasher.update(state['dl'], block)
+                    state['dl'] += len(block)
+                    if progress_callback and total_length:
+                        progress_callback(state['dl'], total_length)
+
+                self._stream_body(r, f, on_block)
+
+            if total_length and state['dl'] != total_length:
+                raise IOError(f"Incomplete download: {state['dl']} of {total_length} bytes")
+
+    def _stream_body(self, r, f, on_block, stop: Optional[threading.Event] = None) -> bool:
+        """
+        Copies a streamed response body into f through one reusable buffer.
+
+        The read size starts at MIN_CHUNK_SIZE and doubles while reads keep
+        filling the buffer quickly (up to MAX_CHUNK_SIZE), shrinking again on
+        slow reads. on_block(view) sees each block before the buffer is
+        reused and must not keep it. Returns False if `stop` was set.
+        """
+        if r.headers.get('content-encoding', 'identity') != 'identity' or not hasattr(r.raw, 'readinto'):
+            # Compressed body: let requests decode it chunk by chunk
+            for chunk in r.iter_content(chunk_size=MIN_CHUNK_SIZE):
+                if stop is not None and stop.is_set():
+                    return False
+                if chunk:
+                    f.write(chunk)
+                    on_block(chunk)
+            return True
+
+        size = MIN_CHUNK_SIZE
+        buf = memoryview(bytearray(size))
+        while True:
+            if stop is not None and stop.is_set():
+                return False
+            start = time.monotonic()
+            n = r.raw.readinto(buf[:size])
+            if not n:
+                break
+            elapsed = time.monotonic() - start
+
+            block = buf[:n]
+            written = 0
+            while written < n:
+                written += f.write(block[written:])
+            on_block(block)
+
+            if n == size and elapsed < FAST_READ and size < MAX_CHUNK_SIZE:
+                size *= 2
+                if size > len(buf):
+                    buf = memoryview(bytearray(size))
+            elif elapsed > SLOW_READ and size > MIN_CHUNK_SIZE:
+                size //= 2
+
+        # Hand the keep-alive connection back to the pool right away
+        r.raw.release_conn()
+        return True
+
+    def _download_ranges(self, plan: Dict, part_path: str, progress_callback, hasher: "_OrderedHasher"):
+        total_length = plan['total']
+        validator = plan['etag'] or plan['last_modified']
+
+        lock = threading.Lock()
+        failed = threading.Event()
+        state = {
+            'dl': sum(seg[2] for seg in plan['segments']),
+            'unsaved': 0,
+        }
+
+        def fetch(seg):
+            start, end, done = seg
+            headers = dict(IDENTITY_ENCODING, Range=f'bytes={start + done}-{end}')
+            if validator:
+                headers['If-Range'] = validator
+
+            with self.http.get(plan['final_url'], headers=headers, stream=True, timeout=30) as r:
+                r.raise_for_status()
+                if r.status_code != 206:
+                    if validator:
+                        raise _ResourceChanged()
+                    raise IOError(f"Server ignored range request ({r.status_code})")
+
+                def on_block(block):
+                    with lock:
+                        hasher.update(start + seg[2], block)
+                        seg[2] += len(block)
+                        state['dl'] += len(block)
+                        state['unsaved'] += len(block)
+                        if state['unsaved'] >= META_FLUSH_BYTES:
+                            self._save_part_meta(part_path, plan)
+                            state['unsaved'] = 0
+                        if progress_callback:
+                            progress_callback(state['dl'], total_length)
+
+                # Unbuffered, so the hasher can read back what was written
+                with open(part_path, 'r+b', buffering=0) as f:
+                    f.seek(start + done)
+                    self._stream_body(r, f, on_block, stop=failed)
+
+        def catch_up_hash():
+            # Hash data that arrived ahead of the hash position (later ranges,
+            # or the prefix of a resumed download) once the gap before it closes
+            with lock:
+                limit = hasher.contiguous_limit(plan['segments'])
+            hasher.catch_up(limit)
+
+        catch_up_hash()
+        pending = [seg for seg in plan['segments'] if seg[0] + seg[2] <= seg[1]]
+        if pending:
+            try:
+                with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                    futures = [pool.submit(fetch, seg) for seg in pending]
+                    try:
+                        for fut in as_completed(futures):
+                            fut.result()
+                            catch_up_hash()
+                    except Exception:
+                        failed.set()
+                        raise
+            finally:
+                with lock:
+                    self._save_part_meta(part_path, plan)
+
+        if state['dl'] != total_length:
+            raise IOError(f"Incomplete download: {state['dl']} of {total_length} bytes")
+        catch_up_hash()
+
+
+class _OrderedHasher:
+    """
+    Hashes a file in offset order while its ranges are being downloaded.
+
+    Chunks written exactly at the hash position are hashed as they arrive.
+    Chunks that arrive ahead of it (other ranges) are read back with
+    `catch_up` once everything before them is on disk; they were just
+    written, so those reads are served from the OS page cache.
+    """
+
+    def __init__(self, algorithms: Tuple[str, ...], path: str):
+        self.path = path
+        self.offset = 0
+        self._hashes = {a: hashlib.new(a) for a in algorithms}
+        self._lock = threading.Lock()
+
+    def update(self, offset: int, data: bytes):
+        if not self._hashes:
+            return
+        with self._lock:
+            if offset != self.offset:
+                return
+            for h in self._hashes.values():
+                h.update(data)
+            self.offset += len(data)
+
+    def contiguous_limit(self, segments: List[List[int]]) -> int:
+        """End offset of the data on disk that is contiguous with the hash position."""
+        limit = self.offset
+        for start, end, done in sorted(segments):
+            if start > limit:
+                break
+            limit = max(limit, start + done)
+            if start + done <= end:
+                break
+        return limit
+
+    def catch_up(self, limit: int):
+        if not self._hashes:
+            return
+        with self._lock:
+            if self.offset >= limit:
+                return
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                remaining = limit - self.offset
+                while remaining:
+                    chunk = f.read(min(remaining, HASH_READ_SIZE))
+                    if not chunk:
+                        raise IOError("Partial file is shorter than its download plan")
+                    for h in self._hashes.values():
+                        h.update(chunk)
+                    remaining -= len(chunk)
+            self.offset = limit
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {a: h.hexdigest() for a, h in self._hashes.items()}
+
+
+# Marker returned by a mirror that answered 304 to the listing revalidation
+NOT_MODIFIED = object()
+
+
+class _ResourceChanged(Exception):
+    """Raised when If-Range did not match and the server sent the full file."""
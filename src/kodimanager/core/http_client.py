@@ -0,0 +1,163 @@
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Enough connections for the segmented download plus a mirror race
+POOL_SIZE = 10
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+# Consecutive failures that open a host's circuit, and how long it stays open
+BREAKER_THRESHOLD = 5
+BREAKER_RESET = 30.0
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while a host's circuit is open."""
+
+
+class _JitterRetry(Retry):
+    """urllib3 Retry with full jitter on the exponential backoff."""
+
+    def get_backoff_time(self) -> float:
+        return random.uniform(0, super().get_backoff_time())
+
+
+class _CircuitBreaker:
+    def __init__(self, threshold: int, reset_after: float):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow(self, now: float) -> bool:
+        # After reset_after, let requests through again (half-open); one more
+        # failure re-opens the circuit immediately
+        return self.failures < self.threshold or now - self.opened_at >= self.reset_after
+
+    def success(self):
+        self.failures = 0
+
+    def failure(self, now: float):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = now
+
+
+class HttpClient:
+    """
+    Shared HTTP session for the listing, checksum and download requests.
+
+    One requests.Session with a sized keep-alive connection pool, retries with
+    jittered exponential backoff for idempotent requests, and a circuit
+    breaker per host so a dead mirror fails fast instead of timing out again.
+    """
+
+    def __init__(self, pool_size: int = POOL_SIZE, retries: int = RETRIES,
+                 backoff_factor: float = BACKOFF_FACTOR,
+                 breaker_threshold: int = BREAKER_THRESHOLD, breaker_reset: float = BREAKER_RESET):
+        retry = _JitterRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._breakers: Dict[str, _CircuitBreaker] = {}
+        self._requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        return f"{parts.scheme}://{parts.hostname}:{port}"
+
+    def _breaker(self, host: str) -> _CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = _CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+        return breaker
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = self._host(url)
+        with self._lock:
+            if not self._breaker(host).allow(time.monotonic()):
+                raise CircuitOpenError(f"Circuit open for {host}")
+            self._requests[host] = self._requests.get(host, 0) + 1
+
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            with self._lock:
+                self._breaker(host).failure(time.monotonic())
+            raise
+
+        with self._lock:
+            if response.status_code >= 500:
+                self._breaker(host).failure(time.monotonic())
+            else:
+                self._breaker(host).success()
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request('HEAD', url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Per-host request and connection counts. `reused` is the number of
+        requests served over an already open keep-alive connection.
+        """
+        connections: Dict[str, int] = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            connections[host] = connections.get(host, 0) + pool.num_connections
+
+        with self._lock:
+            result = {}
+            for host, count in self._requests.items():
+                opened = connections.get(host, 0)
+                result[host] = {
+                    'requests': count,
+                    'connections': opened,
+                    'reused': max(0, count - opened),
+                    'circuit_open': not self._breaker(host).allow(time.monotonic()),
+                }
+            return result
+
+    def close(self):
+        self.session.close()
+
+
+_shared_client: Optional[HttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def shared_client() -> HttpClient:
+    """Process-wide client, so every KodiDownloader reuses the same connections."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
@@ -3,6 +3,8 @@ import subprocess
 import shutil
 from typing import Optional
 
+from .dedup import unshare_tree
+
 class KodiInstaller:
     @staticmethod
     def install(installer_path: str, target_dir: str) -> tuple[bool, str]:
@@ -14,6 +16,14 @@ class KodiInstaller:
             return False, f"Installer not found: {installer_path}"
         
         target_dir = os.path.abspath(target_dir)
+
+        if os.path.isdir(target_dir):
+            # Upgrading in place: files hardlinked to other instances by the
+            # dedup would otherwise be overwritten for all of them
+            try:
+                unshare_tree(target_dir)
+            except OSError as e:
+                return False, f"No se pudieron separar los archivos compartidos: {e}"
         
         # NSIS Silent install command
         cmd = f'"{installer_path}" /S /D={target_dir}'
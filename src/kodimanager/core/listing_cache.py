@@ -0,0 +1,69 @@
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+
+class ReleaseListingCache:
+    """
+    On-disk copy of the parsed mirror release listing.
+
+    Stores the release records together with the ETag / Last-Modified of the
+    response they came from, so the listing can be served straight from disk
+    within `ttl` seconds and revalidated with a conditional GET afterwards.
+    """
+
+    def __init__(self, config_dir: str, ttl: float):
+        self.cache_file = os.path.join(config_dir, 'releases_cache.json')
+        self.ttl = ttl
+
+    def load(self) -> Optional[Dict]:
+        if not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'r') as f:
+                entry = json.load(f)
+            if not isinstance(entry.get('releases'), list):
+                return None
+            return entry
+        except (OSError, json.JSONDecodeError, AttributeError):
+            return None
+
+    def is_fresh(self, entry: Dict) -> bool:
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def conditional_headers(self, entry: Optional[Dict], url: str) -> Dict[str, str]:
+        """Validators for `url`, only if the cached listing came from it."""
+        headers = {}
+        if entry and entry.get('url') == url:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, releases: List[Dict], etag: Optional[str], last_modified: Optional[str]) -> Dict:
+        entry = {
+            'url': url,
+            'fetched_at': time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'releases': releases,
+        }
+        self._write(entry)
+        return entry
+
+    def touch(self, entry: Dict):
+        """Marks a revalidated (304) listing as fresh again."""
+        entry['fetched_at'] = time.time()
+        self._write(entry)
+
+    def _write(self, entry: Dict):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_path = self.cache_file + '.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"Could not write release cache: {e}")
@@ -0,0 +1,60 @@
+import re
+from typing import Dict, Iterable, Iterator, List
+
+# Pattern: kodi-21.0-Omega-x64.exe
+RELEASE_PATTERN = re.compile(r'kodi-([0-9]+\.[0-9]+(?:\.[0-9]+)?)(-([A-Za-z0-9]+))?-([A-Za-z0-9]+)-x64\.exe')
+
+HREF_PATTERN = re.compile(r'''<a\s[^>]*?href\s*=\s*["']([^"'<>]*)["']''', re.IGNORECASE)
+
+# Unmatched input kept between chunks; far longer than any <a href="..."> tag
+MAX_CARRY = 4096
+
+
+def make_release(href: str, base_url: str):
+    # fullmatch: sidecars such as kodi-21.0-Omega-x64.exe.sha256 are not releases
+    match = RELEASE_PATTERN.fullmatch(href)
+    if not match:
+        return None
+    tag = match.group(3) or ""
+    return {
+        'version': match.group(1),
+        'tag': tag,
+        'codename': match.group(4),
+        'filename': href,
+        'url': base_url + href,
+        'is_stable': not bool(tag),
+    }
+
+
+class ReleaseListingParser:
+    """
+    Incremental scanner for the mirror's directory index.
+
+    Text is fed chunk by chunk as it arrives; every call returns the release
+    records completed so far. Only link hrefs are looked at, no DOM is built.
+    """
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[Dict[str, str]]:
+        buffer = self._buffer + text
+        releases = []
+        consumed = 0
+        for match in HREF_PATTERN.finditer(buffer):
+            consumed = match.end()
+            release = make_release(match.group(1), self.base_url)
+            if release:
+                releases.append(release)
+
+        # Keep the tail, it may hold the start of a tag cut by the chunk boundary
+        self._buffer = buffer[max(consumed, len(buffer) - MAX_CARRY):]
+        return releases
+
+
+def iter_releases(chunks: Iterable[str], base_url: str) -> Iterator[Dict[str, str]]:
+    """Yields release records from decoded listing chunks as they arrive."""
+    parser = ReleaseListingParser(base_url)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
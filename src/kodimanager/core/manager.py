@@ -1,51 +1,198 @@
-import json
 import os
-import shutil
+import threading
 import uuid
 import time
-from typing import List, Optional
-from .models import KodiInstance
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .dedup import DedupReport, apply_dedup, plan_dedup
+from .models import KodiInstance, MUTABLE_FIELDS, RECORD_FIELDS
+from .reclaimer import TombstoneJournal, shared_reclaimer, tombstone_path
+from .registry import open_registry
+from .scanner import InstallScanner, ScanCache, default_scan_roots
+from .settings import Settings, default_config_dir
+from .usage import DiskUsage, DiskUsageService
+from ..utils.pe_version import kodi_version
 from ..utils.shortcuts import ShortcutManager
 
 class InstanceManager:
-    def __init__(self, config_dir: Optional[str] = None):
-        if config_dir:
-            self.config_dir = config_dir
-        else:
-            # Default to APPDATA
-            appdata = os.environ.get('APPDATA', os.path.expanduser('~'))
-            self.config_dir = os.path.join(appdata, 'KodiManager')
+    def __init__(self, config_dir: Optional[str] = None, backend: Optional[str] = None):
+        # Default to APPDATA
+        self.config_dir = config_dir or default_config_dir()
         
         self.instances_file = os.path.join(self.config_dir, 'instances.json')
         self._ensure_config_dir()
-        self.instances: List[KodiInstance] = self._load_instances()
+        self.settings = Settings(self.config_dir)
+        # 'json' (instances.json) or 'sqlite' (instances.db, one row per instance)
+        self.backend = backend or self.settings.get('registry_backend')
+        self.registry = open_registry(self.config_dir, self.backend)
+
+        # Guards the indexes below and the pending batch state; GUI workers
+        # read and mutate them from their own threads
+        self._lock = threading.RLock()
+        # Primary store keyed by id (insertion ordered)
+        self._by_id: Dict[str, KodiInstance] = {}
+        # normalized path -> id, built on the first path lookup
+        self._by_path: Optional[Dict[str, str]] = None
+        self._apply_records(self.registry.load())
+
+        # Mutations waiting for the outermost batch() to end
+        self._batch_depth = 0
+        self._pending_changed: Dict[str, KodiInstance] = {}
+        self._pending_removed = set()
+
+        # Deleted folders are renamed to tombstones and removed in the background
+        self.journal = TombstoneJournal(self.config_dir)
+        self.reclaimer = shared_reclaimer()
+        self.sweep_tombstones()
+
+        # Per-instance disk usage, cached in usage_cache.json
+        self.usage = DiskUsageService(os.path.join(self.config_dir, 'usage_cache.json'))
+
+    @property
+    def instances(self) -> List[KodiInstance]:
+        with self._lock:
+            return list(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def _ids(self) -> List[str]:
+        with self._lock:
+            return list(self._by_id)
+
+    @staticmethod
+    def normalize_path(path: str) -> str:
+        """Key used for path lookups: absolute, resolved and case-folded."""
+        return os.path.normcase(os.path.realpath(path)).casefold()
+
+    def _path_index(self) -> Dict[str, str]:
+        with self._lock:
+            if self._by_path is None:
+                self._by_path = {self.normalize_path(i.path): instance_id
+                                 for instance_id, i in self._by_id.items()}
+            return self._by_path
+
+    def _index(self, instance: KodiInstance):
+        with self._lock:
+            self._by_id[instance.id] = instance
+            if self._by_path is not None:
+                self._by_path[self.normalize_path(instance.path)] = instance.id
+
+    def _unindex(self, instance: KodiInstance):
+        with self._lock:
+            self._by_id.pop(instance.id, None)
+            self._unindex_path(instance)
+
+    def _unindex_path(self, instance: KodiInstance):
+        with self._lock:
+            if self._by_path is not None:
+                key = self.normalize_path(instance.path)
+                if self._by_path.get(key) == instance.id:
+                    del self._by_path[key]
 
     def _ensure_config_dir(self):
         if not os.path.exists(self.config_dir):
             os.makedirs(self.config_dir)
 
-    def _load_instances(self) -> List[KodiInstance]:
-        if not os.path.exists(self.instances_file):
-            return []
-        try:
-            with open(self.instances_file, 'r') as f:
-                data = json.load(f)
-                return [KodiInstance.from_dict(d) for d in data]
-        except (json.JSONDecodeError, KeyError):
-            return []
+    def _records(self) -> List[KodiInstance]:
+        """Everything to persist."""
+        with self._lock:
+            return list(self._by_id.values())
 
-    def _save_instances(self):
-        with open(self.instances_file, 'w') as f:
-            json.dump([i.to_dict() for i in self.instances], f, indent=4)
+    def _apply_records(self, records: List[Dict]):
+        """
+        Replaces the in-memory state with `records`. Objects already handed
+        out are updated in place so references held by the GUI stay valid.
+        """
+        with self._lock:
+            previous = self._by_id
+            self._by_id = {}
+            self._by_path = None
+            for record in records:
+                try:
+                    row = (record['id'], record['name'], record['path'], record['version'], record['created_at'])
+                except (KeyError, TypeError):
+                    continue
+                instance = previous.get(row[0])
+                if instance is not None:
+                    for key, value in zip(RECORD_FIELDS, row):
+                        setattr(instance, key, value)
+                else:
+                    instance = KodiInstance(*row)
+                self._by_id[row[0]] = instance
+
+    def reload_if_changed(self) -> bool:
+        """
+        Picks up registry changes made by other processes. Costs a stat()
+        (or a PRAGMA) when nothing changed; skipped while a batch is open.
+        """
+        with self._lock:
+            if self._batch_depth or not self.registry.has_changed():
+                return False
+            self._apply_records(self.registry.load())
+            return True
+
+    def _save_instances(self, changed: Iterable[KodiInstance] = (), removed: Iterable[str] = ()):
+        """
+        Persists a mutation; row based backends only write what changed.
+        Inside batch() the write is deferred and merged with the others.
+        """
+        with self._lock:
+            for instance in changed:
+                self._pending_changed[instance.id] = instance
+                self._pending_removed.discard(instance.id)
+            for instance_id in removed:
+                self._pending_changed.pop(instance_id, None)
+                self._pending_removed.add(instance_id)
+            if self._batch_depth == 0:
+                self._flush()
+
+    def _flush(self):
+        with self._lock:
+            if not self._pending_changed and not self._pending_removed:
+                return
+            changed = list(self._pending_changed.values())
+            removed = list(self._pending_removed)
+            merged = self.registry.commit(changed, removed, self._records)
+            # Only now: if the commit raised (lock timeout, disk error) the
+            # mutations stay pending and go out with the next write
+            self._pending_changed.clear()
+            self._pending_removed.clear()
+            if merged is not None:
+                # Another process wrote in between; adopt the merged registry
+                self._apply_records(merged)
+
+    @contextmanager
+    def batch(self):
+        """
+        Groups mutations into a single registry write:
+
+            with manager.batch():
+                for ...: manager.register_instance(...)
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._flush()
 
     def get_all(self) -> List[KodiInstance]:
+        self.reload_if_changed()
         return self.instances
 
     def get_by_id(self, instance_id: str) -> Optional[KodiInstance]:
-        for i in self.instances:
-            if i.id == instance_id:
-                return i
-        return None
+        with self._lock:
+            return self._by_id.get(instance_id)
+
+    def get_by_path(self, path: str) -> Optional[KodiInstance]:
+        key = self.normalize_path(path)
+        with self._lock:
+            instance_id = self._path_index().get(key)
+            return self._by_id.get(instance_id) if instance_id is not None else None
 
     def register_instance(self, name: str, path: str, version: str) -> KodiInstance:
         instance = KodiInstance(
@@ -55,51 +202,95 @@ class InstanceManager:
             version=version,
             created_at=time.time()
         )
-        self.instances.append(instance)
-        self._save_instances()
+        self._index(instance)
+        self._save_instances(changed=[instance])
         return instance
 
+    def register_many(self, entries: Iterable[Tuple[str, str, str]]) -> List[KodiInstance]:
+        """Registers (name, path, version) entries with one registry write."""
+        with self.batch():
+            return [self.register_instance(name, path, version) for name, path, version in entries]
+
+    def remove_many(self, instance_ids: Iterable[str], delete_files: bool = False) -> List[Tuple[str, bool, str]]:
+        """Removes several instances with one registry write. Returns (id, success, message) per id."""
+        instance_ids = list(instance_ids)
+        if delete_files:
+            # One process snapshot for every folder instead of one per instance
+            self._kill_processes_in_folders(
+                [i.path for i in map(self.get_by_id, instance_ids) if i and os.path.exists(i.path)])
+        results = []
+        with self.batch():
+            for instance_id in instance_ids:
+                success, msg = self.remove_instance(instance_id, delete_files=delete_files,
+                                                    kill_processes=False)
+                results.append((instance_id, success, msg))
+        return results
+
     def _kill_process_in_folder(self, path: str):
+        self._kill_processes_in_folders([path])
+
+    def _kill_processes_in_folders(self, paths: List[str]):
+        if not paths:
+            return
         try:
-            from ..utils.process import kill_process_by_path
-            kill_process_by_path(path)
+            from ..utils.process import kill_processes_by_paths
+            kill_processes_by_paths(paths)
         except ImportError:
             pass
 
-    def remove_instance(self, instance_id: str, delete_files: bool = False) -> tuple[bool, str]:
+    def sweep_tombstones(self) -> int:
+        """Resumes deletions interrupted by a crash or exit. Returns how many were queued."""
+        queued = 0
+        for path in self.journal.entries():
+            if os.path.lexists(path):
+                self.reclaimer.submit(path, journal=self.journal)
+                queued += 1
+            else:
+                self.journal.discard(path)
+        return queued
+
+    def _move_to_tombstone(self, path: str) -> Optional[str]:
+        """Renames `path` aside for background deletion; None if it stays locked."""
+        tombstone = tombstone_path(path)
+        # Journal first: a crash right after the rename must not orphan the tombstone
+        self.journal.add(tombstone)
+        for attempt in range(3):
+            try:
+                os.rename(path, tombstone)
+                return tombstone
+            except FileNotFoundError:
+                break
+            except OSError:
+                # A just-killed Kodi can take a moment to release its handles
+                time.sleep(0.5)
+        self.journal.discard(tombstone)
+        return None
+
+    def remove_instance(self, instance_id: str, delete_files: bool = False,
+                        on_progress=None, on_done=None, kill_processes: bool = True) -> tuple[bool, str]:
+        """
+        Unregisters an instance. With delete_files its folder is renamed to a
+        tombstone right away and deleted in the background; `on_progress`
+        (files removed so far) and `on_done(job)` follow that deletion.
+        kill_processes=False skips stopping Kodi first (remove_many already did).
+        """
         instance = self.get_by_id(instance_id)
         if not instance:
             return False, "Instancia no encontrada"
         
         warning_msg = ""
+        tombstone = None
         
-        # 1. Delete files first if requested
+        # 1. Move the files out of the way first if requested
         if delete_files and os.path.exists(instance.path):
             # First, kill any running processes in this folder
-            self._kill_process_in_folder(instance.path)
+            if kill_processes:
+                self._kill_process_in_folder(instance.path)
             
-            max_retries = 3
-            for attempt in range(max_retries):
-                # Robust python deletion
-                try:
-                    def on_rm_error(func, path, exc_info):
-                        os.chmod(path, 0o777)
-                        try:
-                            func(path)
-                        except Exception:
-                            pass
-
-                    shutil.rmtree(instance.path, onerror=on_rm_error)
-                except Exception:
-                    pass
-                
-                if not os.path.exists(instance.path):
-                    break
-                    
-                time.sleep(0.5) # Wait before retry
+            tombstone = self._move_to_tombstone(instance.path)
             
             # Critical Check: If folder still exists, we abort the removal from DB
-            if os.path.exists(instance.path):
+            if tombstone is None and os.path.exists(instance.path):
                  return False, f"No se pudo eliminar la carpeta:\n{instance.path}\n\nVerifique que KODI no esté ejecutándose y que no tenga archivos abiertos."
         
         # 2. Delete shortcut if exists (Best effort)
@@ -110,74 +301,158 @@ class InstanceManager:
             pass # Ignore errors here deletion
 
         # 3. Remove from registry
-        self.instances = [i for i in self.instances if i.id != instance_id]
-        self._save_instances()
+        self._unindex(instance)
+        self._save_instances(removed=[instance_id])
+
+        # 4. Reclaim the space without holding up the caller
+        if tombstone:
+            self.reclaimer.submit(tombstone, journal=self.journal, on_progress=on_progress, on_done=on_done)
 
         return True, warning_msg
 
-    def clean_sweep(self, instance_id: str):
-        """Removes the portable_data directory to reset the instance."""
+    def clean_sweep(self, instance_id: str, on_progress=None, on_done=None):
+        """
+        Resets the instance by swapping its portable_data for an empty one.
+        The old data is moved aside and removed by the background reclaimer;
+        returns that ReclaimJob (None if there was nothing to clean).
+        """
         instance = self.get_by_id(instance_id)
         if not instance:
             raise ValueError("Instance not found")
         
         portable_data = instance.portable_data_path
-        if os.path.exists(portable_data):
-            shutil.rmtree(portable_data)
+        if not os.path.exists(portable_data):
+            return None
+
+        tombstone = self._move_to_tombstone(portable_data)
+        if tombstone is None:
+            raise OSError(f"No se pudo mover {portable_data}. Verifique que KODI no esté ejecutándose.")
+        # Usable again right away; files that resist deletion are retried later
+        os.makedirs(portable_data, exist_ok=True)
+        return self.reclaimer.submit(tombstone, journal=self.journal, on_progress=on_progress, on_done=on_done)
+
+    def update_instance(self, instance_id: str, **fields) -> Optional[KodiInstance]:
+        """
+        Updates fields of an instance, keeping the indexes consistent. Only
+        MUTABLE_FIELDS can change; anything else raises ValueError.
+        """
+        invalid = sorted(set(fields) - set(MUTABLE_FIELDS))
+        if invalid:
+            raise ValueError(f"Cannot update instance field(s): {', '.join(invalid)}")
+        instance = self.get_by_id(instance_id)
+        if not instance:
+            return None
+        # Only the path key moves; the instance keeps its position
+        with self._lock:
+            self._unindex_path(instance)
+            for key, value in fields.items():
+                setattr(instance, key, value)
+            self._index(instance)
+        self._save_instances(changed=[instance])
+        return instance
 
     def update_instance_version_record(self, instance_id: str, new_version: str):
+        self.update_instance(instance_id, version=new_version)
+
+    def refresh_versions(self, instance_ids: Optional[Iterable[str]] = None) -> List[KodiInstance]:
+        """
+        Re-reads the version of each instance's kodi.exe (all instances by
+        default) and stores the ones that changed, in one registry write.
+        Returns the updated instances.
+        """
+        ids = self._ids() if instance_ids is None else list(instance_ids)
+        updated = []
+        with self.batch():
+            for instance_id in ids:
+                instance = self.get_by_id(instance_id)
+                if not instance:
+                    continue
+                exe_version = kodi_version(instance.executable_path)
+                if not exe_version:
+                    continue
+                new_version = f"{exe_version} (Detected)" if "Detected" in instance.version else exe_version
+                if new_version != instance.version:
+                    updated.append(self.update_instance(instance_id, version=new_version))
+        return updated
+
+    def get_disk_usage(self, instance_id: str, cancel: Optional[threading.Event] = None,
+                       on_progress=None) -> Optional[DiskUsage]:
+        """Size of one instance with its portable_data breakdown (None if missing or cancelled)."""
         instance = self.get_by_id(instance_id)
-        if instance:
-            instance.version = new_version
-            self._save_instances()
+        if not instance:
+            return None
+        return self.usage.measure(instance.path, cancel=cancel, on_progress=on_progress)
+
+    def get_all_disk_usage(self, cancel: Optional[threading.Event] = None,
+                           on_result: Optional[Callable[[str, DiskUsage], None]] = None) -> Dict[str, DiskUsage]:
+        """
+        Measures every instance, keyed by id. Folders that did not change
+        since the last call are answered from the cache; `on_result(id,
+        usage)` is called as each instance finishes.
+        """
+        ids = {os.path.abspath(i.path): i.id for i in self.instances}
+        self.usage.forget(ids)
+        results = self.usage.measure_many(
+            ids, cancel=cancel,
+            on_result=(lambda root, usage: on_result(ids[root], usage)) if on_result else None)
+        return {ids[root]: usage for root, usage in results.items()}
+
+    def plan_dedup(self, instance_ids: Optional[Iterable[str]] = None, on_progress=None) -> DedupReport:
+        """
+        Dry run of apply_dedup: identical program files (outside
+        portable_data) shared by the given instances, or all of them, and
+        the bytes that hardlinking them would free. Nothing is modified.
+        Detected installs are left out: their own installer upgrades them
+        in place, which would write through the links into other instances.
+        """
+        ids = list(instance_ids) if instance_ids is not None else self._ids()
+        roots = [i.path for i in (self.get_by_id(instance_id) for instance_id in ids)
+                 if i and "Detected" not in i.version and os.path.isdir(i.path)]
+        return plan_dedup(roots, on_progress=on_progress)
+
+    def apply_dedup(self, report: DedupReport) -> Tuple[int, List[str]]:
+        """Replaces the duplicates of a plan_dedup report with hardlinks; returns (linked, failed paths)."""
+        return apply_dedup(report)
 
-    def detect_installed_instances(self) -> List[KodiInstance]:
-        """Scans common paths for Kodi installations and registers them if not already detected."""
+    def detect_installed_instances(self, on_found: Optional[Callable[[KodiInstance], None]] = None,
+                                   cancel: Optional[threading.Event] = None) -> List[KodiInstance]:
+        """
+        Scans the default install folders and the configured scan roots for
+        Kodi installations and registers the ones not already known.
+        `on_found` is called with each new instance as soon as it is found;
+        setting `cancel` stops the scan, keeping what was found so far.
+        Folder listings are cached in scan_cache.json, so repeated scans
+        only re-read folders that changed.
+        """
         detected = []
-        
-        # Common paths to check
-        potential_paths = [
-            os.path.join(os.environ.get('ProgramFiles', 'C:\\Program Files'), 'Kodi'),
-            os.path.join(os.environ.get('ProgramFiles(x86)', 'C:\\Program Files (x86)'), 'Kodi'),
-            os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Kodi'),
-            # Could add more custom paths if needed
-        ]
-        
-        found_paths = []
-        for p in potential_paths:
-            if os.path.exists(os.path.join(p, 'kodi.exe')):
-                found_paths.append(p)
+        roots = default_scan_roots() + list(self.settings.get('scan_roots') or [])
+        scanner = InstallScanner(roots,
+                                 max_depth=self.settings.get('scan_max_depth'),
+                                 exclude=self.settings.get('scan_exclude') or [],
+                                 cancel_event=cancel,
+                                 cache=ScanCache(os.path.join(self.config_dir, 'scan_cache.json'),
+                                                 self.settings.get('scan_cache_max_entries')))
 
-        # Check against existing instances to avoid duplicates
-        existing_paths = [i.path.lower() for i in self.instances]
-        
-        for p in found_paths:
-            if p.lower() in existing_paths:
-                continue
+        # One registry write for everything found
+        with self.batch():
+            for p in scanner.scan():
+                # Check against existing instances to avoid duplicates
+                if self.get_by_path(p):
+                    continue
                 
-            # It's new!
-            # Try to determine version? For now, we might label it "Detected"
-            # Or use a utility to existing executable version info (requires more libs usually)
-            # We'll just register it.
-            
-            # Simple version check using file modification or just "Unknown"
-            # In a real scenario, we could parse 'kodi.exe --version' output
-            
-            version = "Detected"
-            
-            # Try getting version from kodi.exe
-            try:
-                # This could be slow, maybe do it async or just leave as "Detected"
-                pass
-            except:
-                pass
-
-            inst = self.register_instance(
-                name=f"Kodi Detected ({os.path.basename(p)})",
-                path=p,
-                version=version
-            )
-            detected.append(inst)
+                # It's new! Read the version from kodi.exe's version resource.
+                # "Detected" stays in the label: the GUI uses it to tell
+                # installed (non-portable) copies apart
+                exe_version = kodi_version(os.path.join(p, "kodi.exe"))
+                version = f"{exe_version} (Detected)" if exe_version else "Detected"
+
+                inst = self.register_instance(
+                    name=f"Kodi Detected ({os.path.basename(p)})",
+                    path=p,
+                    version=version
+                )
+                detected.append(inst)
+                if on_found:
+                    on_found(inst)
             
         return detected
-
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# How many mirrors are queried at the same time; the rest wait as fallbacks
+RACE_WIDTH = 3
+# Weight of the newest sample in the latency moving average
+LATENCY_ALPHA = 0.3
+# A failing mirror is sent to the back of the queue for this long (per consecutive failure)
+FAILURE_COOLDOWN = 60
+MAX_FAILURE_COOLDOWN = 60 * 60
+
+
+class MirrorPool:
+    """
+    Per-mirror latency and failure statistics, persisted as mirrors.json in
+    the config dir, plus a helper that races several mirrors for the same
+    resource and keeps the first valid answer. Without a config dir the
+    statistics live in memory only.
+    """
+
+    def __init__(self, config_dir: Optional[str]):
+        self.stats_file = os.path.join(config_dir, 'mirrors.json') if config_dir else None
+        self._lock = threading.Lock()
+        self.stats: Dict[str, Dict[str, float]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, float]]:
+        if self.stats_file is None or not os.path.exists(self.stats_file):
+            return {}
+        try:
+            with open(self.stats_file, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        if self.stats_file is None:
+            return
+        with self._lock:
+            data = json.dumps(self.stats, indent=4)
+        try:
+            os.makedirs(os.path.dirname(self.stats_file), exist_ok=True)
+            tmp_path = self.stats_file + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+            os.replace(tmp_path, self.stats_file)
+        except OSError as e:
+            print(f"Could not save mirror stats: {e}")
+
+    def _entry(self, mirror: str) -> Dict[str, float]:
+        return self.stats.setdefault(mirror, {'latency': 0.0, 'failures': 0, 'last_failure': 0.0})
+
+    def record_success(self, mirror: str, latency: Optional[float] = None):
+        with self._lock:
+            entry = self._entry(mirror)
+            entry['failures'] = 0
+            if latency is not None:
+                self._add_latency(entry, latency)
+
+    def record_failure(self, mirror: str):
+        with self._lock:
+            entry = self._entry(mirror)
+            entry['failures'] += 1
+            entry['last_failure'] = time.time()
+
+    def record_cancelled(self, mirror: str, elapsed: float):
+        """A mirror that lost the race took at least `elapsed` seconds."""
+        with self._lock:
+            entry = self._entry(mirror)
+            if elapsed > entry['latency']:
+                self._add_latency(entry, elapsed)
+
+    def _add_latency(self, entry: Dict[str, float], latency: float):
+        if entry['latency']:
+            entry['latency'] += LATENCY_ALPHA * (latency - entry['latency'])
+        else:
+            entry['latency'] = latency
+
+    def _in_cooldown(self, entry: Dict[str, float], now: float) -> bool:
+        if not entry['failures']:
+            return False
+        cooldown = min(FAILURE_COOLDOWN * entry['failures'], MAX_FAILURE_COOLDOWN)
+        return now - entry['last_failure'] < cooldown
+
+    def ranked(self, mirrors: List[str]) -> List[str]:
+        """
+        Mirrors ordered fastest healthy first. Unmeasured mirrors rank first so
+        they get measured; mirrors that failed recently go last.
+        """
+        now = time.time()
+        with self._lock:
+            unique = list(dict.fromkeys(mirrors))
+            def score(mirror):
+                entry = self.stats.get(mirror)
+                if not entry:
+                    return (0, 0.0)
+                return (1 if self._in_cooldown(entry, now) else 0, entry['latency'])
+            return sorted(unique, key=score)
+
+    def race(self, mirrors: List[str], fetch: Callable[[str, threading.Event], Any],
+             width: int = RACE_WIDTH) -> Optional[Tuple[str, Any]]:
+        """
+        Calls fetch(mirror, cancelled) on up to `width` mirrors at once, best
+        ranked first, and returns (mirror, result) for the first non-None
+        result. `cancelled` is set as soon as there is a winner; fetch should
+        check it while reading and return None. Exceptions count as mirror
+        failures. Returns None if all mirrors fail.
+        """
+        ranked = self.ranked(mirrors)
+        if not ranked:
+            return None
+
+        cancelled = threading.Event()
+
+        def timed(mirror):
+            start = time.monotonic()
+            try:
+                result = fetch(mirror, cancelled)
+            except Exception:
+                self.record_failure(mirror)
+                return mirror, None
+            elapsed = time.monotonic() - start
+
+            if result is not None:
+                self.record_success(mirror, elapsed)
+            elif cancelled.is_set():
+                self.record_cancelled(mirror, elapsed)
+            else:
+                self.record_failure(mirror)
+            return mirror, result
+
+        pool = ThreadPoolExecutor(max_workers=min(width, len(ranked)))
+        try:
+            futures = [pool.submit(timed, mirror) for mirror in ranked]
+            for fut in as_completed(futures):
+                mirror, result = fut.result()
+                if result is not None:
+                    return mirror, result
+            return None
+        finally:
+            cancelled.set()
+            # Do not wait for the losers, they stop on their own
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.save()
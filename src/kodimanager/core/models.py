@@ -1,31 +1,51 @@
 import json
 import os
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from typing import List, Optional
 
-@dataclass
+# Serialised field order
+RECORD_FIELDS = ('id', 'name', 'path', 'version', 'created_at')
+# Fields update_instance may change; id and created_at are fixed at registration
+MUTABLE_FIELDS = ('name', 'path', 'version')
+
+@dataclass(slots=True)
 class KodiInstance:
     id: str
     name: str
     path: str
     version: str
     created_at: float  # Timestamp
+    # (path, executable_path, portable_data_path), recomputed when path changes
+    _derived: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
 
     def is_valid(self) -> bool:
         return os.path.exists(self.path) and os.path.isdir(self.path)
 
+    def _paths(self) -> tuple:
+        derived = self._derived
+        if derived is None or derived[0] is not self.path:
+            derived = (self.path, os.path.join(self.path, "kodi.exe"), os.path.join(self.path, "portable_data"))
+            self._derived = derived
+        return derived
+
     @property
     def executable_path(self) -> str:
         # Standard kodi path
-        return os.path.join(self.path, "kodi.exe")
+        return self._paths()[1]
     
     @property
     def portable_data_path(self) -> str:
-        return os.path.join(self.path, "portable_data")
+        return self._paths()[2]
 
     def to_dict(self):
-        return asdict(self)
+        return {
+            'id': self.id,
+            'name': self.name,
+            'path': self.path,
+            'version': self.version,
+            'created_at': self.created_at,
+        }
 
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        return cls(data['id'], data['name'], data['path'], data['version'], data['created_at'])
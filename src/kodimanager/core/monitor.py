@@ -0,0 +1,162 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+import psutil
+
+from ..utils.process import ProcessSnapshot
+
+MONITOR_INTERVAL = 2.0
+# Look for Kodi processes started outside the manager every this many samples
+DISCOVER_EVERY = 5
+# Resolution of the reported figures; finer changes are not pushed
+CPU_STEP = 1.0
+RSS_STEP = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class InstanceStatus:
+    running: bool
+    pids: Tuple[int, ...] = ()
+    # Sum over the instance's processes; 100 per fully busy core
+    cpu_percent: float = 0.0
+    rss: int = 0
+
+
+IDLE = InstanceStatus(False)
+
+
+class InstanceMonitor:
+    """
+    Tracks which instances are running and what they use. Processes are
+    known from track() (launched by the manager) and from a process
+    snapshot taken every DISCOVER_EVERY samples, matched to instance folders
+    by executable path. Each sample reads CPU and RSS of the known
+    processes only, in one pass, so idle instances cost nothing, and
+    `on_change` receives just the instances whose status changed:
+
+        monitor = InstanceMonitor(on_change=print)
+        monitor.set_instances({inst.id: inst.path for inst in instances})
+        monitor.start()
+    """
+
+    def __init__(self, on_change: Optional[Callable[[Dict[str, InstanceStatus]], None]] = None,
+                 interval: float = MONITOR_INTERVAL, discover_every: int = DISCOVER_EVERY):
+        self.on_change = on_change
+        self.interval = interval
+        self.discover_every = max(1, discover_every)
+        self._lock = threading.Lock()
+        self._paths: Dict[str, str] = {}
+        # pid -> (instance_id, psutil.Process); the same Process object is
+        # kept between samples, as cpu_percent() measures since its last call
+        self._procs: Dict[int, Tuple[str, psutil.Process]] = {}
+        self._last: Dict[str, InstanceStatus] = {}
+        self._samples = 0
+        self._discover_now = True
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def set_instances(self, paths: Dict[str, str]):
+        """{instance_id: folder} to watch; processes of dropped instances are forgotten."""
+        with self._lock:
+            self._paths = dict(paths)
+            self._procs = {pid: entry for pid, entry in self._procs.items() if entry[0] in self._paths}
+            self._discover_now = True
+        self._wake.set()
+
+    def track(self, instance_id: str, pid: int):
+        """Registers a process just launched for `instance_id` and samples right away."""
+        try:
+            proc = psutil.Process(pid)
+        except psutil.NoSuchProcess:
+            return
+        with self._lock:
+            self._procs[pid] = (instance_id, proc)
+        self._wake.set()
+
+    def status(self, instance_id: str) -> InstanceStatus:
+        with self._lock:
+            return self._last.get(instance_id, IDLE)
+
+    def start(self):
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='instance-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Error sampling instance processes: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _discover(self, paths: Dict[str, str]):
+        found = ProcessSnapshot().assign({path: instance_id for instance_id, path in paths.items()})
+        with self._lock:
+            for proc, instance_id in found:
+                known = self._procs.get(proc.pid)
+                # Keep the existing Process object (and its CPU baseline) unless the pid was reused
+                if known is None or known[1] != proc:
+                    self._procs[proc.pid] = (instance_id, proc)
+
+    def poll(self) -> Dict[str, InstanceStatus]:
+        """Takes one sample and returns the statuses that changed (also passed to on_change)."""
+        with self._lock:
+            paths = dict(self._paths)
+            discover = self._discover_now or self._samples % self.discover_every == 0
+            self._discover_now = False
+            self._samples += 1
+        if discover:
+            self._discover(paths)
+        with self._lock:
+            procs = list(self._procs.items())
+
+        usage: Dict[str, list] = {}
+        gone = []
+        for pid, (instance_id, proc) in procs:
+            try:
+                with proc.oneshot():
+                    if proc.status() == psutil.STATUS_ZOMBIE:
+                        raise psutil.ZombieProcess(pid)
+                    cpu = proc.cpu_percent(None)
+                    rss = proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                gone.append(pid)
+                continue
+            except psutil.AccessDenied:
+                # Elevated Kodi: known to run, figures unavailable
+                cpu, rss = 0.0, 0
+            entry = usage.setdefault(instance_id, [[], 0.0, 0])
+            entry[0].append(pid)
+            entry[1] += cpu
+            entry[2] += rss
+
+        statuses = {}
+        for instance_id in paths:
+            if instance_id in usage:
+                pids, cpu, rss = usage[instance_id]
+                statuses[instance_id] = InstanceStatus(
+                    True, tuple(sorted(pids)),
+                    round(cpu / CPU_STEP) * CPU_STEP, round(rss / RSS_STEP) * RSS_STEP)
+            else:
+                statuses[instance_id] = IDLE
+
+        with self._lock:
+            for pid in gone:
+                self._procs.pop(pid, None)
+            changed = {i: s for i, s in statuses.items() if self._last.get(i) != s}
+            self._last = statuses
+        if changed and self.on_change:
+            self.on_change(changed)
+        return changed
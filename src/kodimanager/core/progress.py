@@ -0,0 +1,107 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+# Default cap on callback invocations per second
+MAX_RATE = 10.0
+# Weight of the newest sample in the throughput moving average
+RATE_ALPHA = 0.3
+
+
+@dataclass
+class Progress:
+    current: int
+    total: Optional[int]
+    rate: float             # units (bytes, files...) per second, smoothed
+    eta: Optional[float]    # seconds left, None if unknown
+    message: str = ""
+
+    @property
+    def fraction(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return min(1.0, self.current / self.total)
+
+    @property
+    def done(self) -> bool:
+        return bool(self.total) and self.current >= self.total
+
+
+class ProgressReporter:
+    """
+    Coalesces progress updates before they reach `callback`.
+
+    Call it as reporter(current, total) from any thread, as often as you
+    like; the callback receives a Progress object at most `max_rate` times a
+    second (plus the final update and message changes), with smoothed
+    throughput and ETA. max_rate=0 forwards every update.
+    """
+
+    def __init__(self, callback: Callable[[Progress], None], max_rate: float = MAX_RATE, message: str = ""):
+        self.callback = callback
+        self.interval = 1.0 / max_rate if max_rate else 0.0
+        self.message = message
+        self.rate = 0.0
+        self._lock = threading.Lock()
+        self._last_emit = None
+        self._sample_time = None
+        self._sample_value = 0
+
+    def __call__(self, current: int, total: Optional[int] = None):
+        self.update(current, total)
+
+    def update(self, current: int, total: Optional[int] = None, message: Optional[str] = None, force: bool = False):
+        with self._lock:
+            now = time.monotonic()
+            changed = message is not None and message != self.message
+            if message is not None:
+                self.message = message
+
+            if self._sample_time is None:
+                self._sample_time, self._sample_value = now, current
+            finished = bool(total) and current >= total
+            due = self._last_emit is None or now - self._last_emit >= self.interval
+            if not (force or changed or finished or due):
+                return
+
+            elapsed = now - self._sample_time
+            if elapsed > 0:
+                sample = (current - self._sample_value) / elapsed
+                self.rate = sample if not self.rate else self.rate + RATE_ALPHA * (sample - self.rate)
+            self._sample_time, self._sample_value = now, current
+            self._last_emit = now
+
+            eta = None
+            if total and self.rate > 0:
+                eta = max(0.0, (total - current) / self.rate)
+            # Still under the lock, so concurrent workers never deliver out of order
+            self.callback(Progress(current, total, self.rate, eta, self.message))
+
+
+def as_reporter(progress_callback) -> Optional[ProgressReporter]:
+    """Wraps a legacy callback(current, total) in a coalescing reporter."""
+    if progress_callback is None or isinstance(progress_callback, ProgressReporter):
+        return progress_callback
+    return ProgressReporter(lambda p: progress_callback(p.current, p.total))
+
+
+def format_size(num_bytes: float) -> str:
+    if num_bytes < 1024:
+        return f"{num_bytes:.0f} B"
+    for unit in ("KB", "MB"):
+        num_bytes /= 1024
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+    return f"{num_bytes / 1024:.1f} GB"
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "--:--"
+    seconds = int(round(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
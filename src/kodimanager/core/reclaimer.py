@@ -0,0 +1,306 @@
+import json
+import os
+import stat
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from .progress import as_reporter
+from .registry import atomic_write_json
+from ..utils.walk import ParallelWalk, is_junction
+
+# Concurrent unlink/scandir calls across all jobs
+RECLAIM_WORKERS = 4
+# A job that leaves files behind (locked, in use) is tried again later
+RETRY_DELAY = 30.0
+MAX_ATTEMPTS = 5
+TOMBSTONE_MARKER = ".kodimanager-trash-"
+
+
+def tombstone_path(path: str) -> str:
+    """Sibling name a folder is renamed to before it is deleted (same volume, so the rename is atomic)."""
+    parent, name = os.path.split(os.path.normpath(path))
+    return os.path.join(parent, f"{TOMBSTONE_MARKER}{uuid.uuid4().hex[:8]}-{name}")
+
+
+class TombstoneJournal:
+    """
+    tombstones.json in the config dir: folders renamed for deletion that
+    have not been fully removed yet. Entries are added before the rename,
+    so a crash at any point leaves something the startup sweep can finish.
+    """
+
+    def __init__(self, config_dir: str):
+        self.path = os.path.join(config_dir, 'tombstones.json')
+        self._lock = threading.Lock()
+
+    def _read(self) -> List[str]:
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return [p for p in data if isinstance(p, str)] if isinstance(data, list) else []
+        except (OSError, ValueError):
+            return []
+
+    def entries(self) -> List[str]:
+        with self._lock:
+            return self._read()
+
+    def add(self, path: str):
+        with self._lock:
+            entries = self._read()
+            if path not in entries:
+                atomic_write_json(self.path, entries + [path], indent=4)
+
+    def discard(self, path: str):
+        with self._lock:
+            entries = self._read()
+            if path in entries:
+                entries.remove(path)
+                atomic_write_json(self.path, entries, indent=4)
+
+
+class ReclaimJob:
+    """One folder being deleted in the background."""
+
+    def __init__(self, path: str, journal: Optional[TombstoneJournal], on_progress, on_done):
+        self.path = path
+        self.journal = journal
+        self.reporter = as_reporter(on_progress)
+        self.on_done = on_done
+        self.removed = 0
+        self.failed: List[str] = []
+        self.attempts = 0
+        self.not_before = 0.0
+        self.finished = threading.Event()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.finished.is_set() and not os.path.lexists(self.path)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.finished.wait(timeout)
+
+
+class Reclaimer:
+    """
+    Deletes folder trees in the background. One coordinator thread takes
+    jobs in order; each tree is walked with os.scandir and its files
+    unlinked on a pool of RECLAIM_WORKERS threads, which bounds the I/O
+    load however many jobs are queued. Whatever cannot be removed (a file
+    still held open) is retried after RETRY_DELAY, up to MAX_ATTEMPTS.
+
+        job = shared_reclaimer().submit(tombstone, on_progress=cb)
+    """
+
+    def __init__(self, workers: int = RECLAIM_WORKERS):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='reclaim')
+        self._cond = threading.Condition()
+        self._jobs: List[ReclaimJob] = []
+        self._active = 0
+        self._thread = None
+
+    def submit(self, path: str, journal: Optional[TombstoneJournal] = None,
+               on_progress: Optional[Callable] = None,
+               on_done: Optional[Callable[[ReclaimJob], None]] = None) -> ReclaimJob:
+        job = ReclaimJob(path, journal, on_progress, on_done)
+        with self._cond:
+            self._jobs.append(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='reclaimer', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+        return job
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._jobs) + self._active
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Waits until no job is queued or running (retries scheduled later count as queued)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._jobs or self._active:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def _next_job(self) -> ReclaimJob:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                due = [j for j in self._jobs if j.not_before <= now]
+                if due:
+                    job = due[0]
+                    self._jobs.remove(job)
+                    self._active += 1
+                    return job
+                timeout = min(j.not_before for j in self._jobs) - now if self._jobs else None
+                self._cond.wait(timeout)
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            try:
+                self._reclaim(job)
+            finally:
+                with self._cond:
+                    self._active -= 1
+                    self._cond.notify_all()
+
+    def _reclaim(self, job: ReclaimJob):
+        job.attempts += 1
+        job.failed = []
+        requeued = False
+        try:
+            remove_tree(job.path, self._pool, job)
+
+            if os.path.lexists(job.path) and job.attempts < MAX_ATTEMPTS:
+                job.not_before = time.monotonic() + RETRY_DELAY
+                with self._cond:
+                    self._jobs.append(job)
+                    self._cond.notify_all()
+                requeued = True
+                return
+
+            if not os.path.lexists(job.path):
+                if job.journal is not None:
+                    job.journal.discard(job.path)
+            else:
+                # Left in the journal; the next startup sweep tries again
+                print(f"Could not remove {job.path}: {len(job.failed)} entries left")
+        except Exception:
+            # Unexpected (journal write, ...): reported as a leftover, and
+            # the path stays in the journal for the startup sweep
+            job.failed.append(job.path)
+        finally:
+            if not requeued:
+                self._finish(job)
+
+    def _finish(self, job: ReclaimJob):
+        if job.reporter:
+            job.reporter.update(job.removed, job.removed, force=True)
+        job.finished.set()
+        if job.on_done:
+            try:
+                job.on_done(job)
+            except Exception as e:
+                # A caller's callback must not stop the coordinator thread
+                print(f"Error in reclaim callback for {job.path}: {e}")
+
+
+def _unlink(path: str) -> bool:
+    try:
+        os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return True
+    except PermissionError:
+        if os.path.islink(path):
+            # Directory symlinks on Windows are removed with rmdir
+            return _rmdir(path)
+        # Read-only files (common under userdata on Windows)
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
+            return True
+        except OSError:
+            return False
+    except OSError:
+        return False
+
+
+def remove_tree(root: str, pool: ThreadPoolExecutor, job: Optional[ReclaimJob] = None):
+    """
+    Removes `root` like shutil.rmtree, but lists folders and unlinks their
+    files on `pool`, and never raises for individual entries: what could
+    not be removed is appended to job.failed.
+    """
+    if not os.path.lexists(root):
+        return
+    if not os.path.isdir(root) or os.path.islink(root):
+        if not _unlink(root) and job is not None:
+            job.failed.append(root)
+        return
+
+    lock = threading.Lock()
+    folders = []
+
+    def visit(path, depth):
+        try:
+            removed = 0
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if is_dir and is_junction(entry):
+                            # Remove the junction itself, never the target's contents
+                            is_dir = False
+                            ok = _rmdir(entry.path)
+                        elif not is_dir:
+                            ok = _unlink(entry.path)
+                    except OSError:
+                        ok, is_dir = False, False
+                    if is_dir:
+                        walk.submit(entry.path, depth + 1)
+                    elif ok:
+                        removed += 1
+                    elif job is not None:
+                        job.failed.append(entry.path)
+            with lock:
+                folders.append((depth, path))
+            if job is not None and removed:
+                with lock:
+                    job.removed += removed
+                    current = job.removed
+                if job.reporter:
+                    job.reporter(current, None)
+        except OSError:
+            if job is not None:
+                job.failed.append(path)
+
+    walk = ParallelWalk(pool, visit)
+    walk.start([(root, 0)])
+    walk.wait()
+
+    # Deepest first, so every folder is empty when its turn comes
+    for _, path in sorted(folders, reverse=True):
+        if not _rmdir(path) and job is not None:
+            job.failed.append(path)
+
+
+def _rmdir(path: str) -> bool:
+    try:
+        os.rmdir(path)
+        return True
+    except FileNotFoundError:
+        return True
+    except PermissionError:
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            os.rmdir(path)
+            return True
+        except OSError:
+            return False
+    except OSError:
+        return False
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_reclaimer() -> Reclaimer:
+    """Process-wide reclaimer, so every deletion shares the same I/O budget."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Reclaimer()
+        return _shared
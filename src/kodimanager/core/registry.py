@@ -0,0 +1,204 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from .models import KodiInstance
+from ..utils.filelock import FileLock
+
+
+class JsonRegistry:
+    """
+    The original instances.json store: every commit rewrites the whole file,
+    through a temp file + fsync + atomic replace so a crash never leaves a
+    truncated registry behind.
+
+    Several processes may share the file: commits hold an exclusive lock
+    file, and if the registry changed on disk since we last read it our
+    mutations are merged into the fresh copy by id instead of overwriting it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock_path = path + '.lock'
+        # stat() of the file as we last read or wrote it
+        self._signature = None
+
+    def _stat_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        # A replace always brings a new inode, even within the mtime granularity
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def has_changed(self) -> bool:
+        """True if another writer replaced the file since our last load/commit."""
+        return self._stat_signature() != self._signature
+
+    def load(self) -> List[Dict]:
+        # Taken before reading: a write racing the read just triggers another reload later
+        self._signature = self._stat_signature()
+        if self._signature is None:
+            return []
+        try:
+            with open(self.path, 'r') as f:
+                records = json.load(f)
+            if not isinstance(records, list):
+                raise ValueError("Registry is not a list of instances")
+            return records
+        except ValueError:
+            # JSONDecodeError and UnicodeDecodeError (binary garbage) are both ValueErrors.
+            # Keep the damaged file for recovery instead of overwriting it on the next save
+            corrupt_path = f"{self.path}.corrupt-{int(time.time())}"
+            os.replace(self.path, corrupt_path)
+            print(f"Registry file is corrupt, moved to {corrupt_path}")
+            return []
+
+    def commit(self, changed: Iterable[KodiInstance], removed: Iterable[str],
+               snapshot: Callable[[], Iterable[Union[KodiInstance, Dict]]]) -> Optional[List[Dict]]:
+        """
+        Writes the registry. `snapshot` may yield instances or plain record
+        dicts. Returns the merged records when another process had changed
+        the file in the meantime, None if `snapshot` was written.
+        """
+        with FileLock(self.lock_path):
+            if self.has_changed():
+                records = {d['id']: d for d in self.load()}
+                for instance in changed:
+                    records[instance.id] = instance.to_dict()
+                for instance_id in removed:
+                    records.pop(instance_id, None)
+                merged = list(records.values())
+                data = merged
+            else:
+                merged = None
+                data = [i if isinstance(i, dict) else i.to_dict() for i in snapshot()]
+            atomic_write_json(self.path, data, indent=4)
+            self._signature = self._stat_signature()
+        return merged
+
+    def close(self):
+        pass
+
+
+def atomic_write_json(path: str, data, **dump_kwargs):
+    """Writes JSON to a temp file in the same folder, fsyncs it and swaps it in."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if hasattr(os, 'O_DIRECTORY'):
+        # Make the rename itself durable (POSIX only)
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class SqliteRegistry:
+    """
+    instances.db: one row per instance, WAL journal, so a mutation writes a
+    single row instead of serialising the whole fleet. On first use an
+    existing instances.json is imported and kept as instances.json.migrated.
+    SQLite does the inter-process locking itself, and commits only touch
+    their own rows, so there is nothing to merge.
+    """
+
+    SCHEMA_VERSION = 1
+    COLUMNS = ('id', 'name', 'path', 'version', 'created_at')
+
+    def __init__(self, path: str, legacy_json: str = None):
+        self.path = path
+        self._lock = threading.Lock()
+        # Shared between the GUI thread and Worker threads, guarded by _lock
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._migrate(legacy_json)
+        self._data_version = None
+
+    def _current_data_version(self) -> int:
+        # Bumped whenever *another* connection commits
+        return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def has_changed(self) -> bool:
+        with self._lock:
+            return self._current_data_version() != self._data_version
+
+    def _migrate(self, legacy_json: str):
+        imported = False
+        with self._lock, self._conn:
+            version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+            if version < 1:
+                self._conn.execute(
+                    'CREATE TABLE IF NOT EXISTS instances ('
+                    ' id TEXT PRIMARY KEY,'
+                    ' name TEXT NOT NULL,'
+                    ' path TEXT NOT NULL,'
+                    ' version TEXT NOT NULL,'
+                    ' created_at REAL NOT NULL)')
+                if legacy_json and os.path.exists(legacy_json):
+                    try:
+                        with open(legacy_json, 'r') as f:
+                            rows = [tuple(d[c] for c in self.COLUMNS) for d in json.load(f)]
+                    except (OSError, ValueError, KeyError, TypeError) as e:
+                        # Leave an unreadable file alone rather than migrate nothing
+                        print(f"Could not migrate {legacy_json}: {e}")
+                    else:
+                        self._conn.executemany('INSERT OR REPLACE INTO instances VALUES (?, ?, ?, ?, ?)', rows)
+                        imported = True
+            # Future schema changes go here as `if version < 2: ...`
+            self._conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+
+        if imported:
+            os.replace(legacy_json, legacy_json + '.migrated')
+
+    def load(self) -> List[Dict]:
+        with self._lock:
+            self._data_version = self._current_data_version()
+            rows = self._conn.execute('SELECT id, name, path, version, created_at FROM instances ORDER BY rowid').fetchall()
+        return [dict(zip(self.COLUMNS, row)) for row in rows]
+
+    def commit(self, changed: Iterable[KodiInstance], removed: Iterable[str],
+               snapshot: Callable[[], Iterable[Union[KodiInstance, Dict]]]) -> Optional[List[Dict]]:
+        rows = [(i.id, i.name, i.path, i.version, i.created_at) for i in changed]
+        with self._lock, self._conn:
+            if rows:
+                self._conn.executemany(
+                    'INSERT INTO instances (id, name, path, version, created_at) VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT(id) DO UPDATE SET name=excluded.name, path=excluded.path, '
+                    'version=excluded.version, created_at=excluded.created_at', rows)
+            removed = [(i,) for i in removed]
+            if removed:
+                self._conn.executemany('DELETE FROM instances WHERE id = ?', removed)
+        return None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_registry(config_dir: str, backend: str):
+    """Returns the registry store for `backend` ('json' or 'sqlite')."""
+    json_path = os.path.join(config_dir, 'instances.json')
+    if backend == 'sqlite':
+        return SqliteRegistry(os.path.join(config_dir, 'instances.db'), legacy_json=json_path)
+    if backend == 'json':
+        return JsonRegistry(json_path)
+    raise ValueError(f"Unknown registry backend: {backend}")
@@ -0,0 +1,251 @@
+import fnmatch
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .reclaimer import TOMBSTONE_MARKER
+from .registry import atomic_write_json
+from ..utils.walk import RACY_WINDOW_NS, ParallelWalk, is_junction
+
+# File that marks a folder as a Kodi install
+KODI_EXE = "kodi.exe"
+# Subtrees that can hold hundreds of thousands of files and never contain an install
+PRUNED_SUBTREES = (
+    ("userdata", "thumbnails"),
+    ("addons", "packages"),
+)
+SCAN_WORKERS = 8
+SCAN_CACHE_MAX_ENTRIES = 100000
+
+_DONE = object()
+
+
+class ScanCache:
+    """
+    Persistent listing cache for InstallScanner: folder path -> [mtime_ns,
+    subfolder count, has kodi.exe, subfolder names]. Adding or removing an
+    entry updates the folder's own mtime, so an unchanged mtime means its
+    listing can be reused with a stat() instead of reading the directory.
+    Children are still visited, since a deep change does not touch the
+    mtime of its ancestors.
+
+    After a complete scan only the folders it visited are kept (vanished
+    folders drop out), capped at `max_entries` by keeping the shallowest.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, max_entries: int = SCAN_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, list] = self._load()
+        # Visited during the current scan: path -> (depth, entry)
+        self._touched: Dict[str, Tuple[int, list]] = {}
+        self.scan_started_ns = time.time_ns()
+
+    def _load(self) -> Dict[str, list]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != self.VERSION:
+                return {}
+            entries = data['entries']
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError, KeyError, AttributeError):
+            # Unreadable cache: start over, the next save replaces it
+            return {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def begin_scan(self):
+        with self._lock:
+            self._touched = {}
+            self.scan_started_ns = time.time_ns()
+
+    def lookup(self, path: str, mtime_ns: int, depth: int) -> Optional[Tuple[bool, List[str]]]:
+        entry = self._entries.get(path)
+        try:
+            if entry is None or entry[0] != mtime_ns or entry[1] != len(entry[3]):
+                return None
+        except (TypeError, IndexError):
+            return None
+        with self._lock:
+            self._touched[path] = (depth, entry)
+        return bool(entry[2]), entry[3]
+
+    def store(self, path: str, mtime_ns: int, depth: int, is_install: bool, names: List[str]):
+        if mtime_ns >= self.scan_started_ns - RACY_WINDOW_NS:
+            # Too recent to trust; listed again next time
+            return
+        entry = [mtime_ns, len(names), is_install, names]
+        with self._lock:
+            self._entries[path] = entry
+            self._touched[path] = (depth, entry)
+
+    def save(self, complete: bool = True):
+        """Persists the cache; an interrupted scan keeps the entries it did not reach."""
+        with self._lock:
+            if complete:
+                touched = sorted(self._touched.items(), key=lambda item: item[1][0])
+                self._entries = {path: entry for path, (_, entry) in touched[:self.max_entries]}
+            elif len(self._entries) > self.max_entries:
+                self._entries = dict(list(self._entries.items())[:self.max_entries])
+            entries = dict(self._entries)
+        try:
+            atomic_write_json(self.path, {'version': self.VERSION, 'entries': entries})
+        except OSError as e:
+            print(f"Could not save scan cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._touched = {}
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def default_scan_roots() -> List[str]:
+    """The folders the official installer uses; always checked."""
+    return [
+        os.path.join(os.environ.get('ProgramFiles', 'C:\\Program Files'), 'Kodi'),
+        os.path.join(os.environ.get('ProgramFiles(x86)', 'C:\\Program Files (x86)'), 'Kodi'),
+        os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Kodi'),
+    ]
+
+
+class InstallScanner:
+    """
+    Finds folders containing kodi.exe under a set of roots. Directories are
+    listed with os.scandir on a thread pool (scandir releases the GIL, and
+    on network or spinning drives the latency overlaps), and results are
+    streamed as they are found:
+
+        scanner = InstallScanner(["D:/"], max_depth=4, exclude=["$Recycle.Bin"])
+        for path in scanner.scan():
+            ...
+
+    Exclude globs match a folder's name or its full path. Found installs
+    are not descended into. `cancel()`, setting `cancel_event` or closing
+    the generator stops the walk. With a ScanCache, unchanged folders are
+    not read again.
+    """
+
+    def __init__(self, roots: Iterable[str], max_depth: int = 4, exclude: Iterable[str] = (),
+                 workers: int = SCAN_WORKERS, cancel_event: Optional[threading.Event] = None,
+                 cache: Optional[ScanCache] = None):
+        self.roots = [os.path.abspath(r) for r in roots]
+        self.max_depth = max_depth
+        self.exclude = [os.path.normcase(p) for p in exclude]
+        self.workers = workers
+        self._cancelled = cancel_event or threading.Event()
+        self.cache = cache
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _excluded(self, name: str, path: str) -> bool:
+        name, path = os.path.normcase(name), os.path.normcase(path)
+        return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(path, p) for p in self.exclude)
+
+    @staticmethod
+    def _pruned(path: str) -> bool:
+        parts = tuple(os.path.normcase(path).casefold().replace('\\', '/').split('/'))
+        return any(parts[-len(tail):] == tail for tail in PRUNED_SUBTREES)
+
+    @staticmethod
+    def _read_dir(path: str) -> Tuple[bool, List[str]]:
+        """Returns (is_install, subfolder names) for one folder."""
+        names = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        # Junctions would make the walk cyclic; tombstones are being deleted
+                        if is_junction(entry) or entry.name.startswith(TOMBSTONE_MARKER):
+                            continue
+                        names.append(entry.name)
+                    elif entry.name.lower() == KODI_EXE:
+                        return True, []
+                except OSError:
+                    continue
+        return False, names
+
+    def _list(self, path: str, depth: int) -> Tuple[bool, List[str]]:
+        """Returns (is_install, subfolders to visit), from the cache when unchanged."""
+        try:
+            if self.cache is None:
+                is_install, names = self._read_dir(path)
+            else:
+                mtime_ns = os.stat(path).st_mtime_ns
+                cached = self.cache.lookup(path, mtime_ns, depth)
+                if cached is not None:
+                    is_install, names = cached
+                else:
+                    is_install, names = self._read_dir(path)
+                    self.cache.store(path, mtime_ns, depth, is_install, names)
+        except OSError:
+            # Permission denied, vanished while scanning, ...
+            return False, []
+        subdirs = [os.path.join(path, name) for name in names]
+        return is_install, [p for p, name in zip(subdirs, names) if not self._excluded(name, p)]
+
+    def scan(self) -> Iterator[str]:
+        results = queue.Queue()
+        # Set when the consumer is gone; separate from a caller's cancel_event
+        stopped = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='scan')
+
+        def visit(path, depth):
+            if self.cancelled or stopped.is_set():
+                return
+            is_install, subdirs = self._list(path, depth)
+            if is_install:
+                results.put(path)
+            elif depth < self.max_depth:
+                for sub in subdirs:
+                    if not self._pruned(sub):
+                        walk.submit(sub, depth + 1)
+
+        walk = ParallelWalk(executor, visit, on_done=lambda: results.put(_DONE))
+
+        # Overlapping roots (C:/ and C:/Program Files) must not report twice
+        roots = [r for r in dict.fromkeys(self.roots) if os.path.isdir(r)]
+        if not roots:
+            executor.shutdown()
+            return
+        if self.cache is not None:
+            self.cache.begin_scan()
+        walk.start((root, 0) for root in roots)
+
+        seen = set()
+        complete = False
+        try:
+            while True:
+                item = results.get()
+                if item is _DONE:
+                    complete = not self.cancelled
+                    break
+                key = os.path.normcase(item)
+                if key not in seen:
+                    seen.add(key)
+                    yield item
+        finally:
+            # Also reached when the consumer stops iterating early
+            stopped.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self.cache is not None:
+                self.cache.save(complete=complete)
@@ -0,0 +1,68 @@
+import json
+import os
+from typing import Any, Optional
+
+DEFAULTS = {
+    # Release mirrors for the win64 installers, raced when fetching the listing
+    'mirror_urls': [
+        "https://mirrors.kodi.tv/releases/windows/win64/",
+        "https://kodi.mirror.wearetriple.com/releases/windows/win64/",
+        "https://ftp.fau.de/xbmc/releases/windows/win64/",
+    ],
+    # Byte budget for Kodi_Installers before least-recently-used versions are evicted
+    'installer_cache_max_bytes': 1024 * 1024 * 1024,
+    # Seconds the cached mirror release listing is served without revalidation
+    'release_listing_ttl': 6 * 60 * 60,
+    # Instance registry store: 'json' (instances.json) or 'sqlite' (instances.db)
+    'registry_backend': 'json',
+    # Extra folders (e.g. other drives) searched by "Detectar" for portable installs
+    'scan_roots': [],
+    # How many folder levels below each scan root are searched
+    'scan_max_depth': 4,
+    # Folder names or full-path globs skipped while scanning
+    'scan_exclude': ['$Recycle.Bin', 'System Volume Information', 'Windows', 'node_modules', '.git'],
+    # Folder listings remembered between scans (scan_cache.json)
+    'scan_cache_max_entries': 100000,
+    # Keep the first install of each version under templates/ and create
+    # further instances of it by cloning that tree instead of running NSIS
+    'golden_templates': True,
+    # Hardlink cloned program files to the template instead of copying them
+    'template_hardlinks': False,
+    # Seconds between samples of the running instances' CPU and memory
+    'monitor_interval': 2.0,
+}
+
+
+def default_config_dir() -> str:
+    """Returns %APPDATA%\\KodiManager (or ~/KodiManager outside Windows)."""
+    appdata = os.environ.get('APPDATA', os.path.expanduser('~'))
+    return os.path.join(appdata, 'KodiManager')
+
+
+class Settings:
+    """User settings stored as settings.json in the config dir."""
+
+    def __init__(self, config_dir: Optional[str] = None):
+        self.config_dir = config_dir or default_config_dir()
+        self.settings_file = os.path.join(self.config_dir, 'settings.json')
+        self._values = self._load()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.settings_file):
+            return {}
+        try:
+            with open(self.settings_file, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def get(self, key: str) -> Any:
+        return self._values.get(key, DEFAULTS.get(key))
+
+    def set(self, key: str, value: Any):
+        self._values[key] = value
+        if not os.path.exists(self.config_dir):
+            os.makedirs(self.config_dir)
+        with open(self.settings_file, 'w') as f:
+            json.dump(self._values, f, indent=4)
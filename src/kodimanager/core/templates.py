@@ -0,0 +1,206 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from .dedup import is_program_folder
+from .progress import as_reporter
+from .reclaimer import shared_reclaimer, tombstone_path
+
+CLONE_WORKERS = 8
+# Linux ioctl sharing a whole file's extents (btrfs, XFS, bcachefs)
+FICLONE = 0x40049409
+MANIFEST = '.template.json'
+
+
+def clone_file(src: str, dst: str, link: bool = False) -> str:
+    """
+    Copies one file using the cheapest mechanism the filesystem offers and
+    returns its name: 'link' (only when `link` is set), 'reflink',
+    'copy_file_range' or 'copy'. On Windows the last one goes through
+    CopyFile2, which block-clones on ReFS/Dev Drive by itself.
+    """
+    if link:
+        try:
+            os.link(src, dst)
+            return 'link'
+        except OSError:
+            pass
+    if fcntl is not None or hasattr(os, 'copy_file_range'):
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            method = _kernel_copy(fsrc.fileno(), fdst.fileno())
+        if method:
+            shutil.copystat(src, dst)
+            return method
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def _kernel_copy(src_fd: int, dst_fd: int) -> Optional[str]:
+    """Reflink, then in-kernel copy; None leaves an empty dst for a plain copy."""
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return 'reflink'
+        except OSError:
+            pass
+    if hasattr(os, 'copy_file_range'):
+        remaining = os.fstat(src_fd).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            if remaining <= 0:
+                return 'copy_file_range'
+        except OSError:
+            pass
+        # Unsupported between these filesystems; start over
+        os.lseek(src_fd, 0, os.SEEK_SET)
+        os.lseek(dst_fd, 0, os.SEEK_SET)
+        os.ftruncate(dst_fd, 0)
+    return None
+
+
+def _list_tree(root: str) -> Tuple[List[str], List[Tuple[str, int]]]:
+    """Relative folders (parents first) and (relative file, size) under root, skipping portable_data."""
+    folders, files = [], []
+    stack = ['']
+    while stack:
+        rel = stack.pop()
+        with os.scandir(os.path.join(root, rel)) as it:
+            for entry in it:
+                child = os.path.join(rel, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    if is_program_folder(entry, top=not rel):
+                        folders.append(child)
+                        stack.append(child)
+                elif entry.is_file(follow_symlinks=False) and not (not rel and entry.name == MANIFEST):
+                    files.append((child, entry.stat(follow_symlinks=False).st_size))
+    return folders, files
+
+
+def clone_tree(src: str, dst: str, link: bool = False, workers: int = CLONE_WORKERS,
+               on_progress=None) -> dict:
+    """
+    Copies the program files of `src` into `dst` (created if needed) with
+    clone_file on a thread pool. `on_progress` receives bytes copied.
+    Returns {'files': n, 'bytes': n, 'methods': {method: count}}.
+    """
+    folders, files = _list_tree(src)
+    os.makedirs(dst, exist_ok=True)
+    for rel in folders:
+        os.makedirs(os.path.join(dst, rel), exist_ok=True)
+
+    reporter = as_reporter(on_progress)
+    total = sum(size for _, size in files)
+    lock = threading.Lock()
+    stats = {'files': 0, 'bytes': 0, 'methods': {}}
+
+    def copy_one(item):
+        rel, size = item
+        method = clone_file(os.path.join(src, rel), os.path.join(dst, rel), link=link)
+        with lock:
+            stats['files'] += 1
+            stats['bytes'] += size
+            stats['methods'][method] = stats['methods'].get(method, 0) + 1
+            done = stats['bytes']
+        if reporter:
+            reporter(done, total)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='clone') as pool:
+        # list() re-raises the first copy error
+        list(pool.map(copy_one, files))
+    if reporter:
+        reporter.update(total, total, force=True)
+    # Folder times last: creating their entries changed them
+    for rel in reversed(folders):
+        shutil.copystat(os.path.join(src, rel), os.path.join(dst, rel))
+    return stats
+
+
+def template_key(installer_filename: str) -> str:
+    """'kodi-21.1-Omega-x64.exe' -> 'kodi-21.1-Omega-x64'; one template per release build."""
+    name = os.path.splitext(os.path.basename(installer_filename))[0]
+    return re.sub(r'[^A-Za-z0-9._-]', '_', name)
+
+
+class TemplateStore:
+    """
+    Pristine Kodi installs kept under <config_dir>/templates, one per
+    installer, so further instances of that version are a tree clone
+    instead of a full NSIS run:
+
+        store = TemplateStore(config_dir)
+        if store.has(key):
+            store.clone(key, target_dir)
+
+    A template only counts once its manifest exists; it is captured into
+    a staging folder and renamed into place, so a crash never leaves a
+    half-copied template behind.
+    """
+
+    def __init__(self, config_dir: str):
+        self.root = os.path.join(config_dir, 'templates')
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def has(self, key: str) -> bool:
+        return os.path.isfile(os.path.join(self.path_for(key), MANIFEST))
+
+    def manifest(self, key: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(self.path_for(key), MANIFEST), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def capture(self, key: str, install_dir: str, version: Optional[str] = None) -> bool:
+        """Copies a fresh install (without portable_data) as the template for `key`."""
+        if self.has(key):
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        # Tombstone-named, so scans and the dedup never pick it up
+        staging = tombstone_path(self.path_for(key))
+        try:
+            stats = clone_tree(install_dir, staging)
+            with open(os.path.join(staging, MANIFEST), 'w') as f:
+                json.dump({'key': key, 'version': version, 'files': stats['files'],
+                           'bytes': stats['bytes'], 'created_at': time.time()}, f, indent=4)
+            if os.path.exists(self.path_for(key)):
+                # Leftover without a manifest
+                leftover = tombstone_path(self.path_for(key))
+                os.rename(self.path_for(key), leftover)
+                shared_reclaimer().submit(leftover)
+            os.rename(staging, self.path_for(key))
+            return True
+        except OSError as e:
+            print(f"Could not capture template {key}: {e}")
+            return False
+        finally:
+            if os.path.exists(staging):
+                shared_reclaimer().submit(staging)
+
+    def clone(self, key: str, target_dir: str, link: bool = False, on_progress=None) -> dict:
+        """
+        Creates an instance from the template in `target_dir`, which must be
+        missing or empty. With `link` the program files are hardlinked to the
+        template (KodiInstaller.install unshares them before an upgrade).
+        """
+        if not self.has(key):
+            raise FileNotFoundError(f"No template for {key}")
+        if os.path.isdir(target_dir) and os.listdir(target_dir):
+            raise FileExistsError(f"Target folder is not empty: {target_dir}")
+        return clone_tree(self.path_for(key), target_dir, link=link, on_progress=on_progress)
+
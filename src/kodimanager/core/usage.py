@@ -0,0 +1,197 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .progress import as_reporter
+from .registry import atomic_write_json
+from ..utils.walk import RACY_WINDOW_NS, ParallelWalk, is_junction
+
+USAGE_WORKERS = 8
+
+# Path (relative to the instance, lower case) -> breakdown category. A folder
+# belongs to the deepest match; everything outside portable_data is 'program'.
+CATEGORIES = {
+    ('portable_data',): 'other',
+    ('portable_data', 'addons'): 'addons',
+    ('portable_data', 'addons', 'packages'): 'packages',
+    ('portable_data', 'userdata', 'thumbnails'): 'thumbnails',
+    ('portable_data', 'userdata', 'database'): 'database',
+    ('portable_data', 'temp'): 'temp',
+}
+CATEGORY_ORDER = ('program', 'addons', 'packages', 'thumbnails', 'database', 'temp', 'other')
+# Files here are rewritten in place (SQLite databases, logs), which does not
+# touch the folder mtime, so these folders are always listed again
+VOLATILE_CATEGORIES = {'database', 'temp'}
+
+
+@dataclass
+class DiskUsage:
+    path: str
+    total: int
+    files: int
+    # Bytes per CATEGORY_ORDER entry; they add up to total
+    breakdown: Dict[str, int] = field(default_factory=dict)
+    computed_at: float = 0.0
+
+    def to_dict(self):
+        return {'path': self.path, 'total': self.total, 'files': self.files,
+                'breakdown': dict(self.breakdown), 'computed_at': self.computed_at}
+
+
+class DiskUsageService:
+    """
+    Measures instance folders with a parallel os.scandir walk. Each
+    folder's direct file bytes are cached in usage_cache.json keyed by the
+    folder mtime, which changes whenever an entry is added, removed or
+    renamed, so a refresh only lists folders that changed (plus the
+    volatile categories).
+
+        usage = DiskUsageService(cache_path).measure(instance.path)
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_path: str, workers: int = USAGE_WORKERS):
+        self.cache_path = cache_path
+        self.workers = workers
+        self._lock = threading.Lock()
+        # instance root -> {relative folder: [mtime_ns, bytes, files, [[name, mtime_ns], ...]]}
+        self._cache: Optional[Dict[str, Dict[str, list]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, list]]:
+        if self._cache is None:
+            self._cache = {}
+            if os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, 'r') as f:
+                        data = json.load(f)
+                    if data.get('version') == self.VERSION and isinstance(data.get('roots'), dict):
+                        self._cache = data['roots']
+                except (OSError, ValueError, AttributeError):
+                    pass
+        return self._cache
+
+    def save(self):
+        with self._lock:
+            roots = dict(self._load())
+        try:
+            atomic_write_json(self.cache_path, {'version': self.VERSION, 'roots': roots})
+        except OSError as e:
+            print(f"Could not save disk usage cache: {e}")
+
+    def forget(self, live_roots: Iterable[str]):
+        """Drops cached folders of instances that are no longer registered."""
+        keep = {os.path.abspath(r) for r in live_roots}
+        with self._lock:
+            cache = self._load()
+            for root in [r for r in cache if r not in keep]:
+                del cache[root]
+
+    def measure(self, root: str, cancel: Optional[threading.Event] = None,
+                on_progress=None, save: bool = True) -> Optional[DiskUsage]:
+        """
+        Returns the usage of `root`, or None if it does not exist or the walk
+        was cancelled. `on_progress` receives the number of files counted.
+        """
+        root = os.path.abspath(root)
+        try:
+            root_mtime = os.stat(root).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            previous = self._load().get(root, {})
+        reporter = as_reporter(on_progress)
+
+        started_ns = time.time_ns()
+        totals = dict.fromkeys(CATEGORY_ORDER, 0)
+        counts = [0]
+        fresh: Dict[str, list] = {}
+        lock = threading.Lock()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='usage')
+
+        def visit(path, parts, category, mtime_ns):
+            try:
+                if cancel is not None and cancel.is_set():
+                    return
+                rel = '/'.join(parts)
+                if mtime_ns is None:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                entry = previous.get(rel)
+                if (entry is None or entry[0] != mtime_ns or category in VOLATILE_CATEGORIES):
+                    entry = _list_folder(path, mtime_ns)
+                    if mtime_ns >= started_ns - RACY_WINDOW_NS:
+                        # Could still change within the same mtime tick
+                        entry[0] = None
+                    subdirs = entry[3]
+                else:
+                    # Unchanged listing: the subfolders' own mtimes still need a look
+                    subdirs = [[name, None] for name, _ in entry[3]]
+                with lock:
+                    fresh[rel] = entry
+                    totals[category] += entry[1]
+                    counts[0] += entry[2]
+                    files = counts[0]
+                if reporter:
+                    reporter(files, None)
+                for name, child_mtime in subdirs:
+                    child_parts = parts + (name,)
+                    child_category = CATEGORIES.get(tuple(p.lower() for p in child_parts), category)
+                    walk.submit(os.path.join(path, name), child_parts, child_category, child_mtime)
+            except OSError:
+                # Vanished or unreadable while walking; counted as empty
+                pass
+
+        walk = ParallelWalk(executor, visit)
+        walk.start([(root, (), 'program', root_mtime)])
+        walk.wait()
+        executor.shutdown(wait=False)
+        if cancel is not None and cancel.is_set():
+            return None
+
+        with self._lock:
+            # Vanished folders drop out; racy ones are kept for nothing
+            self._load()[root] = {rel: e for rel, e in fresh.items() if e[0] is not None}
+        if save:
+            self.save()
+        if reporter:
+            reporter.update(counts[0], counts[0], force=True)
+        return DiskUsage(root, sum(totals.values()), counts[0], totals, time.time())
+
+    def measure_many(self, roots: Iterable[str], cancel: Optional[threading.Event] = None,
+                     on_result=None) -> Dict[str, DiskUsage]:
+        """Measures several folders in turn, saving the cache once; on_result(root, usage) streams them."""
+        results = {}
+        for root in roots:
+            if cancel is not None and cancel.is_set():
+                break
+            usage = self.measure(root, cancel=cancel, save=False)
+            if usage is not None:
+                results[root] = usage
+                if on_result:
+                    on_result(root, usage)
+        self.save()
+        return results
+
+
+def _list_folder(path: str, mtime_ns: int) -> list:
+    """[mtime_ns, direct file bytes, direct file count, [[subfolder, mtime_ns], ...]]"""
+    size = files = 0
+    subdirs: List[Tuple[str, int]] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                # On Windows these stat() calls are served from the directory listing
+                st = entry.stat(follow_symlinks=False)
+                if entry.is_dir(follow_symlinks=False):
+                    if not is_junction(entry):
+                        subdirs.append([entry.name, st.st_mtime_ns])
+                else:
+                    size += st.st_size
+                    files += 1
+            except OSError:
+                continue
+    return [mtime_ns, size, files, subdirs]
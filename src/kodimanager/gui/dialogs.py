@@ -11,21 +11,54 @@ import webbrowser
 
 from ..core.downloader import KodiDownloader
 from ..core.installer import KodiInstaller
+from ..core.cache import InstallerCache
+from ..core.progress import ProgressReporter, format_eta, format_size
+from ..core.settings import Settings
+from ..core.templates import TemplateStore, template_key
 from ..utils.shortcuts import ShortcutManager
 
 class InstallThread(QThread):
     progress = pyqtSignal(str, float) # status, percentage (0-1)
     finished_signal = pyqtSignal(bool, str) # success, message
     
-    def __init__(self, version_data, name, target_path):
+    def __init__(self, version_data, name, target_path, config_dir=None):
         super().__init__()
         self.version_data = version_data
         self.name = name
         self.target_path = target_path
-        self.downloader = KodiDownloader()
-        
+        self.settings = Settings(config_dir)
+        self.downloader = KodiDownloader(config_dir)
+        self.templates = TemplateStore(self.settings.config_dir)
+        
+    def clone_from_template(self, key, final_path) -> bool:
+        """Creates the instance from a captured install of the same version; False to fall back to NSIS."""
+        def on_clone_progress(p):
+            if p.total:
+                self.progress.emit(f"Copiando plantilla... {format_size(p.current)} / {format_size(p.total)}",
+                                   0.1 + p.fraction * 0.8)
+        try:
+            self.progress.emit("Creando desde plantilla...", 0.1)
+            self.templates.clone(key, final_path, link=self.settings.get('template_hardlinks'),
+                                 on_progress=ProgressReporter(on_clone_progress))
+            KodiInstaller.create_portable_marker(final_path)
+            return True
+        except OSError as e:
+            print(f"Template clone failed, running the installer instead: {e}")
+            return False
+
     def run(self):
         try:
+            final_path = os.path.join(self.target_path, self.name)
+            key = template_key(self.version_data['filename'])
+            use_templates = self.settings.get('golden_templates')
+            # Only a new (missing or empty) folder can be cloned into; upgrades run NSIS
+            fresh = not os.path.isdir(final_path) or not os.listdir(final_path)
+            if use_templates and fresh and self.templates.has(key):
+                if self.clone_from_template(key, final_path):
+                    self.progress.emit("Finalizando...", 0.95)
+                    self.finished_signal.emit(True, final_path)
+                    return
+
             # Determine app root directory (works for both script and frozen exe)
             if getattr(sys, 'frozen', False):
                 app_dir = os.path.dirname(sys.executable)
@@ -39,27 +72,45 @@ class InstallThread(QThread):
             if not os.path.exists(installers_dir):
                 os.makedirs(installers_dir)
             
-            installer_path = os.path.join(installers_dir, self.version_data['filename'])
+            cache = InstallerCache(installers_dir, self.settings.get('installer_cache_max_bytes'))
             
-            def dl_progress(curr, total):
-                if total:
-                    self.progress.emit("Descargando...", (curr / total) * 0.5)
+            def on_download_progress(p):
+                if p.total:
+                    status = f"Descargando... {format_size(p.current)} / {format_size(p.total)}"
+                    if p.rate:
+                        status += f" ({format_size(p.rate)}/s, {format_eta(p.eta)} restante)"
+                    self.progress.emit(status, p.fraction * 0.5)
             
-            if os.path.exists(installer_path):
-                 self.progress.emit("Instalador encontrado. Verificando...", 0.1)
+            # At most ~10 cross-thread signals per second, whatever the chunk rate
+            dl_progress = ProgressReporter(on_download_progress)
+            
+            self.progress.emit("Verificando instalador en caché...", 0.05)
+            installer_path = cache.lookup(self.version_data['filename'])
+            if installer_path:
+                 self.progress.emit("Instalador encontrado y verificado.", 0.1)
                  # fast forward
                  self.progress.emit("Preparando instalación...", 0.5)
             else:
                 self.progress.emit("Iniciando descarga...", 0.1)
-                self.downloader.download_file(self.version_data['url'], installer_path, progress_callback=dl_progress)
+                download_path = os.path.join(installers_dir, self.version_data['filename'])
+                # Checksums are published by the mirrors.kodi.tv redirector
+                published = self.downloader.fetch_published_checksum(
+                    self.downloader.base_url + self.version_data['filename'])
+                download_path, digests = self.downloader.download_release(
+                    self.version_data, download_path, progress_callback=dl_progress,
+                    expected={'sha256': published})
+                # Digest was computed while downloading, no second pass needed
+                installer_path = cache.add(download_path, self.version_data, sha256=digests['sha256'])
             
             self.progress.emit("Instalando...", 0.6)
-            final_path = os.path.join(self.target_path, self.name)
             if not os.path.exists(final_path): os.makedirs(final_path)
             
             success, msg = KodiInstaller.install(installer_path, final_path)
             
             if success:
+                if use_templates and fresh and not self.templates.has(key):
+                    self.progress.emit("Guardando plantilla para próximas instalaciones...", 0.8)
+                    self.templates.capture(key, final_path, version=self.version_data.get('version'))
                 self.progress.emit("Finalizando...", 0.9)
                 # We KEEP the installer now
                 # if os.path.exists(installer_path): os.remove(installer_path)
@@ -73,12 +124,13 @@ class InstallThread(QThread):
 class InstallDialog(QDialog):
     instance_created = pyqtSignal(str, str, str) # name, path, version
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, config_dir=None):
         super().__init__(parent)
+        self.config_dir = config_dir
         self.setWindowTitle("Nueva Instalación de Kodi")
         self.resize(500, 300)
         self.setup_ui()
-        self.downloader = KodiDownloader()
+        self.downloader = KodiDownloader(config_dir)
         self.load_versions()
         
     def setup_ui(self):
@@ -120,9 +172,30 @@ class InstallDialog(QDialog):
         lbl_ver.setStyleSheet("color: #9ca3af; font-size: 14px;")
         card_layout.addWidget(lbl_ver)
         
+        version_layout = QHBoxLayout()
         self.lbl_version_display = QLabel("Cargando...")
         self.lbl_version_display.setStyleSheet("font-weight: bold; font-size: 16px; color: white;")
-        card_layout.addWidget(self.lbl_version_display)
+        
+        # Bypasses the cached release listing
+        self.btn_refresh_versions = QPushButton("Actualizar")
+        self.btn_refresh_versions.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.btn_refresh_versions.setStyleSheet("""
+            QPushButton {
+                background-color: transparent;
+                color: #9ca3af;
+                border: 1px solid #4b5563;
+                border-radius: 6px;
+                padding: 4px 10px;
+            }
+            QPushButton:hover {
+                color: white;
+            }
+        """)
+        self.btn_refresh_versions.clicked.connect(lambda: self.load_versions(force_refresh=True))
+        
+        version_layout.addWidget(self.lbl_version_display, 1)
+        version_layout.addWidget(self.btn_refresh_versions)
+        card_layout.addLayout(version_layout)
         
         # Name input
         lbl_name = QLabel("Nombre de la Instancia:")
@@ -267,12 +340,12 @@ class InstallDialog(QDialog):
         
         layout.addLayout(btn_layout)
         
-    def load_versions(self):
+    def load_versions(self, force_refresh=False):
         # Run in thread or just simplified here (could block briefly)
         try:
              self.selected_version = None
-             # Just a quick blocking call for now, can optimize later if needed
-             self.versions = self.downloader.get_available_versions()
+             # Served from the release listing cache unless stale or forced
+             self.versions = self.downloader.get_available_versions(force_refresh=force_refresh)
              
              if self.versions:
                  v = self.versions[0] # Take the first (and only) one
@@ -312,7 +385,7 @@ class InstallDialog(QDialog):
         self.progress.setVisible(True)
         self.progress.setValue(0)
         
-        self.worker = InstallThread(version_data, name, path)
+        self.worker = InstallThread(version_data, name, path, config_dir=self.config_dir)
         self.worker.progress.connect(self.update_progress)
         self.worker.finished_signal.connect(self.install_finished)
         self.worker.start()
@@ -2,6 +2,7 @@ import os
 import sys
 import webbrowser
 import math
+import threading
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QScrollArea, QPushButton, QLabel, QFrame,
                             QTabWidget, QMessageBox, QMenu, QApplication, QGridLayout, QSizePolicy, QProgressBar)
@@ -10,6 +11,8 @@ from PyQt6.QtGui import QIcon, QAction, QPixmap
 
 from ..core.manager import InstanceManager
 from ..core.models import KodiInstance
+from ..core.monitor import InstanceMonitor
+from ..core.progress import ProgressReporter, format_size
 from ..utils import admin
 from .dialogs import InstallDialog, ShortcutDialog, AboutDialog
 from .styles import GLASS_THEME
@@ -23,7 +26,7 @@ class InstanceCard(QFrame):
         super().__init__()
         self.instance = instance
         self.setObjectName("Card")
-        self.setFixedSize(280, 180)
+        self.setFixedSize(280, 220)
         self.setup_ui()
 
     def setup_ui(self):
@@ -71,6 +74,18 @@ class InstanceCard(QFrame):
         path_label.setWordWrap(True)
         path_label.setStyleSheet("color: #71717a; font-size: 12px;") # Muted text
         details_layout.addWidget(path_label)
+
+        # Size, filled in by the background disk usage pass
+        self.size_label = QLabel("Tamaño: calculando...")
+        self.size_label.setObjectName("CardSubtitle")
+        self.size_label.setStyleSheet("color: #a1a1aa; font-size: 12px;")
+        details_layout.addWidget(self.size_label)
+
+        # Running state, pushed by the instance monitor
+        self.status_label = QLabel()
+        self.status_label.setObjectName("CardSubtitle")
+        details_layout.addWidget(self.status_label)
+        self.set_status(None)
         
         layout.addLayout(details_layout)
         
@@ -83,11 +98,37 @@ class InstanceCard(QFrame):
         btn_launch.clicked.connect(lambda: self.launch_clicked.emit(self.instance.id))
         layout.addWidget(btn_launch)
 
+    def set_usage(self, usage):
+        self.size_label.setText(f"Tamaño: {format_size(usage.total)}")
+        labels = (("addons", "Addons"), ("packages", "Paquetes"), ("thumbnails", "Miniaturas"),
+                  ("database", "Bases de datos"), ("temp", "Temporales"))
+        self.size_label.setToolTip("\n".join(f"{label}: {format_size(usage.breakdown.get(key, 0))}"
+                                             for key, label in labels))
+
+    def set_status(self, status):
+        if status is not None and status.running:
+            self.status_label.setText(f"● En ejecución · CPU {status.cpu_percent:.0f}% · {format_size(status.rss)}")
+            self.status_label.setStyleSheet("color: #10b981; font-size: 12px;")
+            self.status_label.setToolTip("PID: " + ", ".join(str(pid) for pid in status.pids))
+        else:
+            self.status_label.setText("○ Detenida")
+            self.status_label.setStyleSheet("color: #71717a; font-size: 12px;")
+            self.status_label.setToolTip("")
+
     def on_menu_click(self):
         self.manage_clicked.emit(self.instance.id, self.mapToGlobal(self.rect().topRight()))
 
 
 class MainWindow(QMainWindow):
+    # Background deletion progress, emitted from the reclaimer's threads
+    reclaim_progress = pyqtSignal(object)
+    # ReclaimJob of a finished background deletion
+    reclaim_done = pyqtSignal(object)
+    # (instance_id, DiskUsage) as each instance is measured
+    usage_measured = pyqtSignal(str, object)
+    # {instance_id: InstanceStatus} for the instances whose running state changed
+    status_changed = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("KODI Manager")
@@ -99,8 +140,30 @@ class MainWindow(QMainWindow):
             self.setWindowIcon(QIcon(icon_path))
             
         self.manager = InstanceManager()
+        # Set while a detection scan runs; a second click on "Detectar" cancels it
+        self._detect_cancel = None
+        self._detected_count = 0
+        # Workers still running, kept referenced until they finish
+        self._workers = []
+        self.reclaim_progress.connect(self.on_reclaim_progress)
+        self.reclaim_done.connect(self.on_reclaim_done)
+        self.usage_measured.connect(self.on_usage_measured)
+        # instance_id -> InstanceCard currently shown
+        self._cards = {}
+        self._usage_worker = None
+        self._usage_stale = False
+        # Running state and CPU/memory of each instance, sampled in the background
+        self.monitor = InstanceMonitor(on_change=self.status_changed.emit,
+                                       interval=self.manager.settings.get('monitor_interval'))
+        self.status_changed.connect(self.on_status_changed)
         self.setup_ui()
         self.refresh_list()
+        self.monitor.start()
+
+        # Pick up versions changed outside the manager (e.g. Kodi updated in place)
+        self.version_worker = Worker(self.manager.refresh_versions)
+        self.version_worker.finished.connect(self.on_versions_refreshed)
+        self.version_worker.start()
 
     def setup_ui(self):
         central_widget = QWidget()
@@ -200,6 +263,7 @@ class MainWindow(QMainWindow):
             self.grid_layout.itemAt(i).widget().setParent(None)
             
         instances = self.manager.get_all()
+        self._cards = {}
         
         if not instances:
             # Show empty state
@@ -218,31 +282,88 @@ class MainWindow(QMainWindow):
                 card.launch_clicked.connect(self.launch_instance_by_id)
                 card.manage_clicked.connect(self.show_context_menu)
                 self.grid_layout.addWidget(card, row, col)
+                self._cards[inst.id] = card
+                # Only changes are pushed, so new cards start from the last known state
+                card.set_status(self.monitor.status(inst.id))
+            self.refresh_usage()
+        self.monitor.set_instances({inst.id: inst.path for inst in instances})
+
+    def refresh_usage(self):
+        """Measures instance sizes off the UI thread; unchanged folders come from the cache."""
+        if self._usage_worker is not None:
+            # Measure again once the running pass is over
+            self._usage_stale = True
+            return
+        self._usage_worker = Worker(self.manager.get_all_disk_usage, on_result=self.usage_measured.emit)
+        self._usage_worker.finished.connect(self.on_usage_finished)
+        self._start_worker(self._usage_worker)
+
+    def on_usage_measured(self, inst_id, usage):
+        card = self._cards.get(inst_id)
+        if card is not None:
+            card.set_usage(usage)
+
+    def on_usage_finished(self, result):
+        self._usage_worker = None
+        if self._usage_stale:
+            self._usage_stale = False
+            self.refresh_usage()
+            return
+        measured = result if isinstance(result, dict) else {}
+        for inst_id, card in self._cards.items():
+            if inst_id not in measured:
+                card.size_label.setText("Tamaño: no disponible")
+
+    def on_status_changed(self, changes):
+        for inst_id, status in changes.items():
+            card = self._cards.get(inst_id)
+            if card is not None:
+                card.set_status(status)
+
+    def closeEvent(self, event):
+        self.monitor.stop(timeout=1.0)
+        super().closeEvent(event)
+
+    def on_versions_refreshed(self, updated):
+        if updated and not isinstance(updated, Exception):
+            self.refresh_list()
 
     def show_install_dialog(self):
-        dlg = InstallDialog(self)
+        dlg = InstallDialog(self, config_dir=self.manager.config_dir)
         dlg.instance_created.connect(self.on_instance_created)
         dlg.exec()
 
     def on_instance_created(self, name, path, version):
-        self.manager.register_instance(name, path, version)
+        new_inst = self.manager.register_instance(name, path, version)
         self.refresh_list()
         
-        instances = self.manager.get_all()
-        new_inst = next((i for i in instances if i.path == path), None)
-        
         if new_inst:
              self.prompt_shortcut(new_inst)
 
     def detect_instances(self):
+        if self._detect_cancel is not None:
+            self._detect_cancel.set()
+            self.btn_detect.setEnabled(False)
+            return
+
+        self._detect_cancel = threading.Event()
+        self._detected_count = 0
         self.progress_bar.setVisible(True)
-        self.btn_detect.setEnabled(False)
-        self.worker = Worker(self.manager.detect_installed_instances)
+        self.btn_detect.setText("Cancelar")
+        self.worker = Worker(self.manager.detect_installed_instances, cancel=self._detect_cancel)
+        self.worker.kwargs['on_found'] = self.worker.progress.emit
+        self.worker.progress.connect(self.on_instance_detected)
         self.worker.finished.connect(self.on_detection_finished)
         self.worker.start()
 
+    def on_instance_detected(self, inst):
+        self._detected_count += 1
+        self.btn_detect.setText(f"Cancelar ({self._detected_count} encontradas)")
+
     def on_detection_finished(self, detected):
+        self._detect_cancel = None
         self.progress_bar.setVisible(False)
+        self.btn_detect.setText("Detectar")
         self.btn_detect.setEnabled(True)
         if isinstance(detected, Exception):
             QMessageBox.critical(self, "Error", f"Error al detectar: {str(detected)}")
@@ -264,7 +385,8 @@ class MainWindow(QMainWindow):
                 if os.path.exists(inst.portable_data_path) or "Detected" not in inst.version:
                     args.append("-p")
                 
-                subprocess.Popen(args, cwd=inst.path)
+                proc = subprocess.Popen(args, cwd=inst.path)
+                self.monitor.track(inst.id, proc.pid)
             else:
                 QMessageBox.critical(self, "Error", "No se encuentra el ejecutable kodi.exe")
 
@@ -309,11 +431,22 @@ class MainWindow(QMainWindow):
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            try:
-                self.manager.clean_sweep(inst.id)
-                QMessageBox.information(self, "Éxito", "Instancia limpiada correctamente.")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Error al limpiar: {str(e)}")
+            worker = Worker(self.manager.clean_sweep, inst.id,
+                            on_progress=ProgressReporter(self.reclaim_progress.emit),
+                            on_done=self.reclaim_done.emit)
+            worker.finished.connect(self.on_instance_cleaned)
+            self._start_worker(worker)
+
+    def on_instance_cleaned(self, result):
+        if isinstance(result, Exception):
+            QMessageBox.critical(self, "Error", f"Error al limpiar: {str(result)}")
+            return
+        QMessageBox.information(self, "Éxito", "Instancia limpiada correctamente.")
+
+    def _start_worker(self, worker):
+        self._workers.append(worker)
+        worker.finished.connect(lambda _: self._workers.remove(worker))
+        worker.start()
 
     def delete_instance(self, inst):
         reply = QMessageBox.question(self, "Confirmar Eliminación", 
@@ -321,15 +454,38 @@ class MainWindow(QMainWindow):
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            success, msg = self.manager.remove_instance(inst.id, delete_files=True)
-            if success:
-                self.refresh_list()
-                if msg:
-                     QMessageBox.warning(self, "Aviso", msg)
-                else:
-                     QMessageBox.information(self, "Éxito", "Instancia eliminada.")
+            # The folder is renamed aside right away; its files are removed in the background
+            worker = Worker(self.manager.remove_instance, inst.id, delete_files=True,
+                            on_progress=ProgressReporter(self.reclaim_progress.emit),
+                            on_done=self.reclaim_done.emit)
+            worker.finished.connect(self.on_instance_deleted)
+            self._start_worker(worker)
+
+    def on_instance_deleted(self, result):
+        if isinstance(result, Exception):
+            QMessageBox.critical(self, "Error", f"Error al eliminar la instancia: {str(result)}")
+            return
+        success, msg = result
+        if success:
+            self.refresh_list()
+            if msg:
+                 QMessageBox.warning(self, "Aviso", msg)
             else:
-                QMessageBox.critical(self, "Error", f"Error al eliminar la instancia: {msg}")
+                 self.statusBar().showMessage("Instancia eliminada. Liberando espacio en segundo plano...")
+        else:
+            QMessageBox.critical(self, "Error", f"Error al eliminar la instancia: {msg}")
+
+    def on_reclaim_progress(self, progress):
+        if not progress.done:
+            self.statusBar().showMessage(f"Liberando espacio... {progress.current} archivos eliminados")
+
+    def on_reclaim_done(self, job):
+        # Reported here rather than from progress: a job that removed no files never reaches `done`
+        if job.succeeded:
+            self.statusBar().showMessage(f"Espacio liberado: {job.removed} archivos eliminados.", 5000)
+        else:
+            self.statusBar().showMessage(
+                f"No se pudieron eliminar {len(job.failed)} elementos; se reintentará al reiniciar.", 5000)
 
 def main():
     app = QApplication(sys.argv)
@@ -3,6 +3,8 @@ from ..core.manager import InstanceManager
 
 class Worker(QThread):
     finished = pyqtSignal(object)
+    # Intermediate results; pass `worker.progress.emit` as a callback to func
+    progress = pyqtSignal(object)
     
     def __init__(self, func, *args, **kwargs):
         super().__init__()
@@ -0,0 +1,60 @@
+import os
+import time
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class FileLock:
+    """
+    Exclusive inter-process lock on a lock file (msvcrt on Windows, flock
+    elsewhere). Not reentrant; use one instance per critical section.
+
+        with FileLock(path):
+            ...
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+
+    def acquire(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if os.name == 'nt':
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(0.01)
+        self._fd = fd
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if os.name == 'nt':
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
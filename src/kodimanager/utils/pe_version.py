@@ -0,0 +1,204 @@
+import os
+import re
+import struct
+from functools import lru_cache
+from typing import Dict, Optional
+
+RT_VERSION = 16
+IMAGE_DIRECTORY_ENTRY_RESOURCE = 2
+VS_FIXEDFILEINFO_SIGNATURE = 0xFEEF04BD
+# Resource sections of real executables are small; anything bigger is bogus
+MAX_RESOURCE_SIZE = 64 * 1024 * 1024
+
+
+class PEFormatError(ValueError):
+    pass
+
+
+def read_version_info(path: str) -> Optional[Dict[str, str]]:
+    """
+    Returns the VS_VERSIONINFO strings of a PE file (FileVersion,
+    ProductVersion, ...) plus the numeric 'FixedFileVersion' and
+    'FixedProductVersion', or None if there is no readable version resource.
+    Only the headers and the resource section are read; results are
+    memoized by (path, size, mtime).
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    info = _read_cached(os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    return dict(info) if info is not None else None
+
+
+def kodi_version(exe_path: str) -> Optional[str]:
+    """'21.1'-style version of a kodi.exe, from its version resource."""
+    info = read_version_info(exe_path)
+    if not info:
+        return None
+    for key in ('ProductVersion', 'FileVersion'):
+        match = re.match(r'\s*(\d+)\.(\d+)(?:\.(\d+))?', info.get(key, ''))
+        if match:
+            return _short_version(*match.groups())
+    fixed = info.get('FixedProductVersion') or info.get('FixedFileVersion')
+    if fixed:
+        return _short_version(*fixed.split('.')[:3])
+    return None
+
+
+def _short_version(major, minor, patch=None) -> str:
+    version = f"{int(major)}.{int(minor)}"
+    if patch and int(patch):
+        version += f".{int(patch)}"
+    return version
+
+
+@lru_cache(maxsize=1024)
+def _read_cached(path: str, size: int, mtime_ns: int) -> Optional[tuple]:
+    try:
+        with open(path, 'rb') as f:
+            data = _version_resource(f)
+        if data is None:
+            return None
+        return tuple(sorted(_parse_version_info(data).items()))
+    except (OSError, struct.error, PEFormatError, UnicodeDecodeError):
+        return None
+
+
+def _read_at(f, offset: int, size: int) -> bytes:
+    f.seek(offset)
+    data = f.read(size)
+    if len(data) != size:
+        raise PEFormatError("Truncated file")
+    return data
+
+
+def _version_resource(f) -> Optional[bytes]:
+    """Seeks from the headers to the RT_VERSION resource and returns its bytes."""
+    if _read_at(f, 0, 2) != b'MZ':
+        raise PEFormatError("Not an executable")
+    pe_offset = struct.unpack('<I', _read_at(f, 0x3C, 4))[0]
+    if _read_at(f, pe_offset, 4) != b'PE\0\0':
+        raise PEFormatError("Missing PE signature")
+    n_sections, _, _, _, opt_size, _ = struct.unpack('<HIIIHH', _read_at(f, pe_offset + 6, 18))
+    opt_offset = pe_offset + 24
+    optional = _read_at(f, opt_offset, opt_size)
+
+    magic = struct.unpack_from('<H', optional, 0)[0]
+    if magic == 0x10B:
+        dirs_at = 96  # PE32
+    elif magic == 0x20B:
+        dirs_at = 112  # PE32+
+    else:
+        raise PEFormatError(f"Unknown optional header magic {magic:#x}")
+    n_dirs = struct.unpack_from('<I', optional, dirs_at - 4)[0]
+    if n_dirs <= IMAGE_DIRECTORY_ENTRY_RESOURCE:
+        return None
+    rsrc_rva, rsrc_size = struct.unpack_from('<II', optional, dirs_at + 8 * IMAGE_DIRECTORY_ENTRY_RESOURCE)
+    if not rsrc_rva or not rsrc_size or rsrc_size > MAX_RESOURCE_SIZE:
+        return None
+
+    # Map the resource RVA to a file offset through the section table
+    sections = _read_at(f, opt_offset + opt_size, 40 * n_sections)
+    for i in range(n_sections):
+        vsize, vaddr, raw_size, raw_ptr = struct.unpack_from('<IIII', sections, 40 * i + 8)
+        if vaddr <= rsrc_rva < vaddr + max(vsize, raw_size):
+            break
+    else:
+        raise PEFormatError("Resource directory outside every section")
+
+    def rva_to_offset(rva):
+        return raw_ptr + rva - vaddr
+
+    available = min(rsrc_size, raw_size - (rsrc_rva - vaddr))
+    if available <= 0:
+        return None
+    rsrc = _read_at(f, rva_to_offset(rsrc_rva), available)
+
+    # type (RT_VERSION) -> name (first) -> language (first) -> data entry
+    entry = _find_entry(rsrc, 0, RT_VERSION)
+    for _ in range(2):
+        if entry is None or not entry & 0x80000000:
+            return None
+        entry = _find_entry(rsrc, entry & 0x7FFFFFFF, None)
+    if entry is None or entry & 0x80000000:
+        return None
+    data_rva, data_size = struct.unpack_from('<II', rsrc, entry)
+    if data_size > MAX_RESOURCE_SIZE:
+        return None
+    # Data entries hold RVAs, usually (not necessarily) inside the resource section
+    start = data_rva - rsrc_rva
+    if 0 <= start and start + data_size <= len(rsrc):
+        return rsrc[start:start + data_size]
+    return _read_at(f, rva_to_offset(data_rva), data_size)
+
+
+def _find_entry(rsrc: bytes, offset: int, wanted_id: Optional[int]) -> Optional[int]:
+    """OffsetToData of the entry with `wanted_id` (or the first one) in a resource directory."""
+    n_named, n_ids = struct.unpack_from('<HH', rsrc, offset + 12)
+    for i in range(n_named + n_ids):
+        name, target = struct.unpack_from('<II', rsrc, offset + 16 + 8 * i)
+        if wanted_id is None or (not name & 0x80000000 and name == wanted_id):
+            return target
+    return None
+
+
+def _parse_block(data: bytes, offset: int):
+    """Returns (key, value offset, value length, children offset, end) of a version block."""
+    length, value_length, value_type = struct.unpack_from('<HHH', data, offset)
+    if length < 6 or offset + length > len(data):
+        raise PEFormatError("Bad version block")
+    end = offset + length
+    key_start = offset + 6
+    key_end = key_start
+    while key_end + 1 < end and data[key_end:key_end + 2] != b'\0\0':
+        key_end += 2
+    key = data[key_start:key_end].decode('utf-16-le')
+    value_offset = _align4(key_end + 2)
+    # Text values are measured in WCHARs, binary ones in bytes
+    value_bytes = value_length * 2 if value_type == 1 else value_length
+    # Some linkers count text in bytes; never read past the block
+    value_bytes = max(0, min(value_bytes, end - value_offset))
+    if value_type == 1:
+        value_bytes -= value_bytes % 2
+    children = _align4(value_offset + value_bytes)
+    return key, value_offset, value_bytes, children, end
+
+
+def _parse_version_info(data: bytes) -> Dict[str, str]:
+    key, value_offset, value_bytes, children, end = _parse_block(data, 0)
+    if key != 'VS_VERSION_INFO':
+        raise PEFormatError("Not a VS_VERSIONINFO resource")
+    info = {}
+    if value_bytes >= 52:
+        fixed = struct.unpack_from('<13I', data, value_offset)
+        if fixed[0] == VS_FIXEDFILEINFO_SIGNATURE:
+            info['FixedFileVersion'] = _dotted(fixed[2], fixed[3])
+            info['FixedProductVersion'] = _dotted(fixed[4], fixed[5])
+
+    # StringFileInfo -> StringTable (one per language) -> String
+    for key, _, _, tables, child_end in _iter_blocks(data, children, end):
+        if key != 'StringFileInfo':
+            continue
+        for _, _, _, strings, table_end in _iter_blocks(data, tables, child_end):
+            for name, string_offset, string_bytes, _, _ in _iter_blocks(data, strings, table_end):
+                value = data[string_offset:string_offset + string_bytes].decode('utf-16-le')
+                info.setdefault(name, value.split('\0', 1)[0].strip())
+    return info
+
+
+def _iter_blocks(data: bytes, offset: int, end: int):
+    while offset + 6 <= end:
+        if not struct.unpack_from('<H', data, offset)[0]:
+            break  # Zero padding after the last child
+        block = _parse_block(data, offset)
+        yield block
+        offset = _align4(block[4])
+
+
+def _align4(offset: int) -> int:
+    return (offset + 3) & ~3
+
+
+def _dotted(ms: int, ls: int) -> str:
+    return f"{ms >> 16}.{ms & 0xFFFF}.{ls >> 16}.{ls & 0xFFFF}"
@@ -1,35 +1,127 @@
 import psutil
 import os
-import time
+from typing import Dict, Iterable, List, Optional, Tuple
 
-def kill_process_by_path(target_path: str) -> bool:
+# Process names worth resolving to an executable path: Kodi itself (Windows
+# and the Linux launchers) and the NSIS uninstaller that runs from the folder
+KODI_PROCESS_NAMES = frozenset({
+    'kodi.exe', 'uninstall.exe',
+    'kodi', 'kodi.bin', 'kodi-x11', 'kodi-wayland', 'kodi-gbm',
+})
+# Seconds to wait for processes to exit after terminate(), and again after kill()
+KILL_TIMEOUT = 3.0
+
+
+def _normalize(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path)).casefold()
+
+
+class ProcessSnapshot:
     """
-    Terminates any process running from the given path (or subdirectories).
-    Returns True if processes were killed or none were found, False if failed.
+    One pass over the process table. Only processes whose name is in
+    `names` get their executable path resolved (an extra system call per
+    process, often AccessDenied); names=None resolves every process.
+    Many folders can then be matched against the same snapshot:
+
+        snapshot = ProcessSnapshot()
+        for path in paths:
+            procs = snapshot.find(path)
     """
-    # Normalize path
-    target_path = os.path.abspath(target_path).lower()
-    
-    killed_any = False
-    
-    try:
-        for proc in psutil.process_iter(['pid', 'exe', 'name']):
+
+    def __init__(self, names: Optional[Iterable[str]] = KODI_PROCESS_NAMES):
+        names = None if names is None else {n.lower() for n in names}
+        # (process, normalized exe path)
+        self.processes = []
+        for proc in psutil.process_iter(['name']):
+            name = (proc.info.get('name') or '').lower()
+            if names is not None and name not in names:
+                continue
             try:
-                exe_path = proc.info.get('exe')
-                if exe_path:
-                    exe_path = os.path.abspath(exe_path).lower()
-                    if exe_path.startswith(target_path):
-                        print(f"Killing process {proc.info['name']} (PID: {proc.info['pid']}) running from {exe_path}")
-                        proc.kill()
-                        killed_any = True
+                exe = proc.exe()
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 continue
-                
-        if killed_any:
-            # Wait a moment for OS to release locks
-            time.sleep(1.0)
-            
+            if exe:
+                self.processes.append((proc, _normalize(exe)))
+
+    def find(self, target_path: str) -> List[psutil.Process]:
+        """Processes whose executable lives in `target_path` or below."""
+        prefix = _normalize(target_path).rstrip(os.sep) + os.sep
+        return [proc for proc, exe in self.processes if exe.startswith(prefix)]
+
+    def find_many(self, target_paths: Iterable[str]) -> Dict[str, List[psutil.Process]]:
+        return {path: self.find(path) for path in target_paths}
+
+    def assign(self, folders: Dict[str, str]) -> List[Tuple[psutil.Process, str]]:
+        """
+        (process, key) for every process running from one of `folders`
+        ({path: key}); a process inside nested folders goes to the deepest.
+        Costs one dict lookup per parent folder of each matched executable.
+        """
+        keys = {_normalize(path): key for path, key in folders.items()}
+        assigned = []
+        for proc, exe in self.processes:
+            folder = os.path.dirname(exe)
+            while True:
+                if folder in keys:
+                    assigned.append((proc, keys[folder]))
+                    break
+                parent = os.path.dirname(folder)
+                if parent == folder:
+                    break
+                folder = parent
+        return assigned
+
+
+def terminate_processes(procs: List[psutil.Process], timeout: float = KILL_TIMEOUT) -> bool:
+    """
+    Asks each process to exit, kills the ones still alive after `timeout`
+    and returns as soon as all of them are gone. False if some survived.
+    """
+    if not procs:
         return True
+    for proc in procs:
+        try:
+            print(f"Terminating process {proc.name()} (PID: {proc.pid})")
+            proc.terminate()
+        except (psutil.NoSuchProcess, psutil.ZombieProcess):
+            continue
+        except psutil.AccessDenied:
+            print(f"Access denied terminating PID {proc.pid}")
+    _, alive = psutil.wait_procs(procs, timeout=timeout)
+    for proc in alive:
+        try:
+            proc.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    if alive:
+        _, alive = psutil.wait_procs(alive, timeout=timeout)
+    for proc in alive:
+        print(f"Process {proc.pid} is still running")
+    return not alive
+
+
+def kill_processes_by_paths(target_paths: Iterable[str], timeout: float = KILL_TIMEOUT,
+                            snapshot: Optional[ProcessSnapshot] = None) -> bool:
+    """
+    Terminates every process running from any of the given folders, using a
+    single process snapshot. Returns True once none is left running (or
+    none was found), False if some could not be stopped.
+    """
+    try:
+        snapshot = snapshot or ProcessSnapshot()
+        procs = {}
+        for matches in snapshot.find_many(target_paths).values():
+            for proc in matches:
+                procs[proc.pid] = proc
+        return terminate_processes(list(procs.values()), timeout=timeout)
     except Exception as e:
         print(f"Error checking/killing processes: {e}")
         return False
+
+
+def kill_process_by_path(target_path: str, timeout: float = KILL_TIMEOUT) -> bool:
+    """
+    Terminates any process running from the given path (or subdirectories).
+    Returns True if processes were killed or none were found, False if failed.
+    """
+    return kill_processes_by_paths([target_path], timeout=timeout)
@@ -0,0 +1,80 @@
+import os
+import threading
+from concurrent.futures import Executor
+from typing import Callable, Iterable, Optional
+
+# Folders modified this close to a walk's start are not trusted from a
+# cache: a change in the same timestamp tick (2s on FAT) would go unnoticed
+RACY_WINDOW_NS = 2 * 10 ** 9
+
+
+def is_junction(entry: os.DirEntry) -> bool:
+    """NTFS junction (DirEntry.is_junction is Python 3.12+; never one elsewhere)."""
+    return getattr(entry, 'is_junction', lambda: False)()
+
+
+class ParallelWalk:
+    """
+    Visits a folder tree on a thread pool. `visit(*args)` runs for every
+    queued item and queues subfolders with walk.submit(*args); the walk
+    counts outstanding visits, so it knows when the whole tree is done:
+
+        walk = ParallelWalk(pool, visit)
+        walk.start([(root, 0)])
+        walk.wait()
+
+    `on_done` is called once, from the thread finishing the last visit. A
+    pool shut down mid-walk (abandoned by its caller) counts as finished.
+    """
+
+    def __init__(self, pool: Executor, visit: Callable, on_done: Optional[Callable[[], None]] = None):
+        self._pool = pool
+        self._visit = visit
+        self._on_done = on_done
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._done = threading.Event()
+
+    def start(self, items: Iterable[tuple]):
+        items = list(items)
+        # Count every root before any is submitted: a root that finishes at
+        # once must not bring pending to 0 while others are still unqueued
+        with self._lock:
+            self._pending += len(items)
+        if not items:
+            self._finish()
+        for args in items:
+            self._submit(args)
+
+    def submit(self, *args):
+        with self._lock:
+            self._pending += 1
+        self._submit(args)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def _submit(self, args: tuple):
+        try:
+            self._pool.submit(self._run, args)
+        except RuntimeError:
+            # Pool already shut down
+            self._finish_one()
+
+    def _run(self, args: tuple):
+        try:
+            self._visit(*args)
+        finally:
+            self._finish_one()
+
+    def _finish_one(self):
+        with self._lock:
+            self._pending -= 1
+            last = self._pending == 0
+        if last:
+            self._finish()
+
+    def _finish(self):
+        self._done.set()
+        if self._on_done:
+            self._on_done()
@@ -0,0 +1,102 @@
+import gzip
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serves in-memory files with optional byte-range support."""
+
+    # Keep-alive, so connection reuse can be observed
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _lookup(self):
+        files = self.server.files
+        body = files.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        return body
+
+    def do_HEAD(self):
+        self.server.requests.append(('HEAD', self.path, dict(self.headers)))
+        body = self._lookup()
+        if body is None:
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self._send_validators()
+        self.end_headers()
+
+    def _send_validators(self):
+        if self.server.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        etag = self.server.etags.get(self.path)
+        if etag:
+            self.send_header('ETag', etag)
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path, dict(self.headers)))
+        body = self._lookup()
+        if body is None:
+            return
+
+        etag = self.server.etags.get(self.path)
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        match = re.match(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if if_range and if_range != self.server.etags.get(self.path):
+            match = None
+        if self.server.ranges and match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(body) - 1
+            chunk = body[start:end + 1]
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(body)}')
+        else:
+            chunk = body
+            self.send_response(200)
+            if self.server.gzip:
+                # Like a misconfigured mirror: whatever the client accepts
+                chunk = gzip.compress(body)
+                self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(chunk)))
+        self._send_validators()
+        self.end_headers()
+        self.wfile.write(chunk)
+
+
+@pytest.fixture
+def http_server():
+    """
+    Local HTTP server; put bytes in `server.files['/name']` to serve them and
+    an optional `server.etags['/name']` validator. With `server.gzip` full
+    responses are gzip encoded.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RangeHandler)
+    server.files = {}
+    server.etags = {}
+    server.requests = []
+    server.ranges = True
+    server.gzip = False
+    server.base_url = f'http://127.0.0.1:{server.server_address[1]}'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
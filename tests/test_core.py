@@ -17,6 +17,18 @@ def test_model_validity(tmp_path):
     assert instance.is_valid()
     assert instance.path == str(tmp_path / "kodi")
 
+def test_model_is_compact_and_round_trips(tmp_path):
+    instance = KodiInstance("id1", "MyKodi", str(tmp_path / "kodi"), "20.2", 0)
+    assert not hasattr(instance, '__dict__')
+    assert instance.to_dict() == {'id': "id1", 'name': "MyKodi", 'path': str(tmp_path / "kodi"),
+                                  'version': "20.2", 'created_at': 0}
+    assert KodiInstance.from_dict(instance.to_dict()) == instance
+
+    # Derived paths follow a moved instance
+    assert instance.executable_path == os.path.join(str(tmp_path / "kodi"), "kodi.exe")
+    instance.path = str(tmp_path / "moved")
+    assert instance.portable_data_path == os.path.join(str(tmp_path / "moved"), "portable_data")
+
 def test_manager_crud(instance_manager, tmp_path):
     # Create dummy path
     kodi_path = str(tmp_path / "Inst1")
@@ -34,10 +46,10 @@ def test_manager_crud(instance_manager, tmp_path):
     instance_manager.remove_instance(inst.id)
     assert len(instance_manager.get_all()) == 0
 
-def test_downloader_connection():
+def test_downloader_connection(tmp_path):
     # Only if network is allowed. In this environment it should be.
     # We just want to check if it parses anything at all.
-    downloader = KodiDownloader()
+    downloader = KodiDownloader(config_dir=str(tmp_path))
     versions = downloader.get_available_versions()
     # It might fail if site changes or no network, but let's see.
     # Asserting non-empty might be flaky if site is down.
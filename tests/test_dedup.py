@@ -0,0 +1,139 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager import cli
+from kodimanager.core import dedup as dedup_module
+from kodimanager.core.dedup import apply_dedup, plan_dedup, unshare_tree
+from kodimanager.core.manager import InstanceManager
+
+BIG = 8192
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _instance(root, exe=b'k' * BIG):
+    _write(root / "kodi.exe", exe)
+    _write(root / "addons" / "skin.estuary" / "skin.xml", b's' * BIG)
+    _write(root / "small.dll", b'd' * 100)
+    # Identical, but per-instance data
+    _write(root / "portable_data" / "userdata" / "guisettings.xml", b'g' * BIG)
+
+
+def _ino(path):
+    return os.stat(path).st_ino
+
+
+def test_plan_is_a_dry_run(tmp_path):
+    for name in ("A", "B", "C"):
+        _instance(tmp_path / name)
+    before = {p: os.stat(p) for p in map(str, tmp_path.rglob("*")) if os.path.isfile(p)}
+
+    report = plan_dedup([str(tmp_path / n) for n in ("A", "B", "C")])
+
+    # kodi.exe and skin.xml, two duplicates each; small files and portable_data left out
+    assert len(report.groups) == 2
+    assert report.duplicate_files == 4
+    assert report.reclaimable_bytes == 4 * BIG
+    assert report.scanned_files == 9
+    for path, st in before.items():
+        assert os.stat(path).st_ino == st.st_ino and os.stat(path).st_nlink == 1
+
+
+def test_apply_links_program_files_only(tmp_path):
+    _instance(tmp_path / "A")
+    _instance(tmp_path / "B")
+    _instance(tmp_path / "C", exe=b'x' * BIG)
+    roots = [str(tmp_path / n) for n in ("A", "B", "C")]
+
+    linked, failed = apply_dedup(plan_dedup(roots))
+
+    assert (linked, failed) == (3, [])
+    assert _ino(tmp_path / "A" / "kodi.exe") == _ino(tmp_path / "B" / "kodi.exe")
+    assert _ino(tmp_path / "A" / "kodi.exe") != _ino(tmp_path / "C" / "kodi.exe")
+    skins = {_ino(tmp_path / n / "addons" / "skin.estuary" / "skin.xml") for n in "ABC"}
+    assert len(skins) == 1
+    settings = {_ino(tmp_path / n / "portable_data" / "userdata" / "guisettings.xml") for n in "ABC"}
+    assert len(settings) == 3
+    assert (tmp_path / "C" / "kodi.exe").read_bytes() == b'x' * BIG
+    assert not list(tmp_path.rglob("*.kmlink"))
+
+    # Already shared: nothing left to do
+    report = plan_dedup(roots)
+    assert report.duplicate_files == 0 and report.reclaimable_bytes == 0
+
+
+def test_changed_file_is_not_linked(tmp_path):
+    _instance(tmp_path / "A")
+    _instance(tmp_path / "B")
+    report = plan_dedup([str(tmp_path / "A"), str(tmp_path / "B")])
+    _write(tmp_path / "B" / "kodi.exe", b'n' * BIG)
+
+    linked, failed = apply_dedup(report)
+
+    assert linked == 1
+    assert failed and all("kodi.exe" in p for p in failed)
+    assert (tmp_path / "B" / "kodi.exe").read_bytes() == b'n' * BIG
+
+
+def test_unshare_before_upgrade(tmp_path):
+    _instance(tmp_path / "A")
+    _instance(tmp_path / "B")
+    apply_dedup(plan_dedup([str(tmp_path / "A"), str(tmp_path / "B")]))
+
+    assert unshare_tree(str(tmp_path / "B")) == 2
+    assert os.stat(tmp_path / "B" / "kodi.exe").st_nlink == 1
+    # An installer rewriting B's files in place leaves A alone
+    with open(tmp_path / "B" / "kodi.exe", 'r+b') as f:
+        f.write(b'new')
+    assert (tmp_path / "A" / "kodi.exe").read_bytes() == b'k' * BIG
+    assert os.stat(tmp_path / "A" / "kodi.exe").st_nlink == 1
+
+
+def test_manager_and_cli(tmp_path, capsys):
+    config = tmp_path / "config"
+    manager = InstanceManager(config_dir=str(config))
+    for name in ("A", "B"):
+        _instance(tmp_path / name)
+        manager.register_instance(name, str(tmp_path / name), "21.1")
+
+    assert manager.plan_dedup().reclaimable_bytes == 2 * BIG
+    assert cli.main(["--config-dir", str(config), "dedup"]) == 0
+    assert "--apply" in capsys.readouterr().out
+    assert os.stat(tmp_path / "A" / "kodi.exe").st_nlink == 1
+
+    assert cli.main(["--config-dir", str(config), "dedup", "--apply"]) == 0
+    assert "Enlazados: 2" in capsys.readouterr().out
+    assert _ino(tmp_path / "A" / "kodi.exe") == _ino(tmp_path / "B" / "kodi.exe")
+
+
+def test_failed_replace_leaves_no_temp_link(tmp_path, monkeypatch):
+    _instance(tmp_path / "A")
+    _instance(tmp_path / "B")
+    report = plan_dedup([str(tmp_path / "A"), str(tmp_path / "B")])
+
+    def locked(src, dst):
+        raise PermissionError("in use")
+    monkeypatch.setattr(dedup_module.os, 'replace', locked)
+    linked, failed = apply_dedup(report)
+
+    assert linked == 0 and len(failed) == 2
+    assert not list(tmp_path.rglob("*.kmlink"))
+
+
+def test_detected_installs_are_not_linked(tmp_path):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    for name in ("A", "B"):
+        _instance(tmp_path / name)
+        manager.register_instance(name, str(tmp_path / name), "21.1")
+    _instance(tmp_path / "ProgramFiles")
+    manager.register_instance("Kodi Detected", str(tmp_path / "ProgramFiles"), "21.1 (Detected)")
+
+    report = manager.plan_dedup()
+    assert report.scanned_files == 6
+    assert all("ProgramFiles" not in f.path for g in report.groups for f in [g.canonical] + g.duplicates)
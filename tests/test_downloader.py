@@ -0,0 +1,253 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core import downloader
+from kodimanager.core.downloader import KodiDownloader
+from kodimanager.core.http_client import HttpClient
+from kodimanager.core.progress import ProgressReporter
+
+
+def _payload(size):
+    return bytes(i % 251 for i in range(size))
+
+
+def test_segmented_download(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    body = _payload(1024 * 1024 + 17)
+    http_server.files['/kodi.exe'] = body
+
+    progress = []
+    dest = str(tmp_path / "kodi.exe")
+    KodiDownloader(config_dir=str(tmp_path)).download_file(http_server.base_url + '/kodi.exe', dest,
+                                   progress_callback=lambda c, t: progress.append((c, t)))
+
+    with open(dest, 'rb') as f:
+        assert f.read() == body
+    ranged = [r for r in http_server.requests if r[0] == 'GET' and 'Range' in r[2]]
+    assert len(ranged) == downloader.SEGMENT_COUNT
+    assert progress[-1] == (len(body), len(body))
+
+
+def test_falls_back_without_ranges(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    http_server.ranges = False
+    body = _payload(512 * 1024)
+    http_server.files['/kodi.exe'] = body
+
+    dest = str(tmp_path / "kodi.exe")
+    KodiDownloader(config_dir=str(tmp_path)).download_file(http_server.base_url + '/kodi.exe', dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == body
+    gets = [r for r in http_server.requests if r[0] == 'GET']
+    assert len(gets) == 1 and 'Range' not in gets[0][2]
+
+
+def test_gzip_encoded_body_is_not_truncated(http_server, tmp_path):
+    http_server.ranges = False
+    http_server.gzip = True
+    body = b'kodi' * 100000
+    http_server.files['/kodi.exe'] = body
+
+    dest = str(tmp_path / "kodi.exe")
+    KodiDownloader(config_dir=str(tmp_path)).download_file(http_server.base_url + '/kodi.exe', dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == body
+    gets = [r for r in http_server.requests if r[0] == 'GET']
+    assert gets[0][2].get('Accept-Encoding') == 'identity'
+
+
+class _Interrupt(Exception):
+    pass
+
+
+def _interrupt_after(limit):
+    def callback(progress):
+        if progress.current >= limit:
+            raise _Interrupt()
+    # Uncoalesced, so the interruption lands mid-download
+    return ProgressReporter(callback, max_rate=0)
+
+
+def test_interrupted_download_resumes(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    monkeypatch.setattr(downloader, 'META_FLUSH_BYTES', 16 * 1024)
+    body = _payload(1024 * 1024)
+    http_server.files['/kodi.exe'] = body
+    http_server.etags['/kodi.exe'] = '"v1"'
+    url = http_server.base_url + '/kodi.exe'
+    dest = str(tmp_path / "kodi.exe")
+
+    try:
+        KodiDownloader(config_dir=str(tmp_path)).download_file(url, dest, progress_callback=_interrupt_after(300 * 1024))
+    except _Interrupt:
+        pass
+    assert not os.path.exists(dest)
+    assert os.path.exists(dest + downloader.PART_SUFFIX)
+
+    http_server.requests.clear()
+    KodiDownloader(config_dir=str(tmp_path)).download_file(url, dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == body
+    assert not os.path.exists(dest + downloader.PART_SUFFIX)
+    assert not os.path.exists(dest + downloader.PART_SUFFIX + downloader.META_SUFFIX)
+
+    gets = [r[2] for r in http_server.requests if r[0] == 'GET']
+    resumed = sum(int(h['Range'][6:].split('-')[1]) - int(h['Range'][6:].split('-')[0]) + 1 for h in gets)
+    assert resumed < len(body)
+    assert all(h['If-Range'] == '"v1"' for h in gets)
+
+
+def test_changed_remote_file_restarts(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    monkeypatch.setattr(downloader, 'META_FLUSH_BYTES', 16 * 1024)
+    http_server.files['/kodi.exe'] = _payload(512 * 1024)
+    http_server.etags['/kodi.exe'] = '"v1"'
+    url = http_server.base_url + '/kodi.exe'
+    dest = str(tmp_path / "kodi.exe")
+
+    try:
+        KodiDownloader(config_dir=str(tmp_path)).download_file(url, dest, progress_callback=_interrupt_after(200 * 1024))
+    except _Interrupt:
+        pass
+
+    new_body = bytes(reversed(_payload(512 * 1024)))
+    http_server.files['/kodi.exe'] = new_body
+    http_server.etags['/kodi.exe'] = '"v2"'
+    KodiDownloader(config_dir=str(tmp_path)).download_file(url, dest)
+
+    with open(dest, 'rb') as f:
+        assert f.read() == new_body
+
+
+def test_digest_computed_while_downloading(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    monkeypatch.setattr(downloader, 'META_FLUSH_BYTES', 16 * 1024)
+    body = _payload(1024 * 1024 + 3)
+    http_server.files['/kodi.exe'] = body
+    http_server.etags['/kodi.exe'] = '"v1"'
+    url = http_server.base_url + '/kodi.exe'
+    dest = str(tmp_path / "kodi.exe")
+    expected = {'sha256': hashlib.sha256(body).hexdigest(), 'md5': hashlib.md5(body).hexdigest()}
+
+    # Interrupted first, so the resumed prefix must be folded into the digest too
+    try:
+        KodiDownloader(config_dir=str(tmp_path)).download_file(url, dest, progress_callback=_interrupt_after(300 * 1024))
+    except _Interrupt:
+        pass
+    path, digests = KodiDownloader(config_dir=str(tmp_path)).download_with_digest(url, dest, algorithms=('sha256', 'md5'))
+    assert digests == expected
+
+    http_server.ranges = False
+    _, digests = KodiDownloader(config_dir=str(tmp_path)).download_with_digest(url, str(tmp_path / "single.exe"))
+    assert digests == {'sha256': expected['sha256']}
+
+
+def test_published_checksum_mismatch(http_server, tmp_path):
+    body = _payload(1000)
+    http_server.files['/kodi.exe'] = body
+    http_server.files['/kodi.exe.sha256'] = f"{'0' * 64}  kodi.exe\n".encode()
+    url = http_server.base_url + '/kodi.exe'
+    dl = KodiDownloader(config_dir=str(tmp_path))
+
+    published = dl.fetch_published_checksum(url)
+    assert published == '0' * 64
+    with pytest.raises(IOError):
+        dl.download_with_digest(url, str(tmp_path / "kodi.exe"), expected={'sha256': published})
+    assert not os.path.exists(tmp_path / "kodi.exe")
+
+
+def test_downloads_keep_connections_alive(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    body = _payload(2 * 1024 * 1024)
+    http_server.files['/kodi.exe'] = body
+    client = HttpClient()
+    dl = KodiDownloader(config_dir=str(tmp_path), http=client)
+
+    for name in ("a.exe", "b.exe"):
+        dl.download_file(http_server.base_url + '/kodi.exe', str(tmp_path / name))
+        with open(tmp_path / name, 'rb') as f:
+            assert f.read() == body
+
+    stats = client.stats()[http_server.base_url]
+    assert stats['connections'] <= downloader.SEGMENT_COUNT
+    assert stats['reused'] >= downloader.SEGMENT_COUNT
+
+
+def _interrupt_once_after(limit):
+    fired = []
+
+    def callback(progress):
+        if progress.current >= limit and not fired:
+            fired.append(True)
+            raise _Interrupt()
+    return ProgressReporter(callback, max_rate=0)
+
+
+def test_release_fallback_resumes_from_same_mirror(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    monkeypatch.setattr(downloader, 'META_FLUSH_BYTES', 16 * 1024)
+    body = _payload(1024 * 1024)
+    for mirror in ('m1', 'm2'):
+        http_server.files[f'/{mirror}/kodi.exe'] = body
+        http_server.etags[f'/{mirror}/kodi.exe'] = '"v1"'
+    dl = KodiDownloader(config_dir=str(tmp_path / "config"))
+    dl.mirror_urls = [http_server.base_url + '/m1/', http_server.base_url + '/m2/']
+    version = {'filename': 'kodi.exe', 'url': http_server.base_url + '/m1/kodi.exe'}
+    dest = str(tmp_path / "kodi.exe")
+    plans = []
+    real_new_plan = dl._new_plan
+    monkeypatch.setattr(dl, '_new_plan', lambda *args: plans.append(args[0]) or real_new_plan(*args))
+
+    # m1 fails at 300 KB; the retry picks up its .part instead of starting over on m2
+    path, _ = dl.download_release(version, dest, progress_callback=_interrupt_once_after(300 * 1024))
+
+    with open(path, 'rb') as f:
+        assert f.read() == body
+    assert plans == [http_server.base_url + '/m1/kodi.exe']
+    gets = [r for r in http_server.requests if r[0] == 'GET']
+    assert all(r[1].startswith('/m1/') for r in gets)
+
+
+def test_release_starts_with_the_mirror_of_a_partial(http_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, 'MIN_SEGMENT_SIZE', 64 * 1024)
+    monkeypatch.setattr(downloader, 'META_FLUSH_BYTES', 16 * 1024)
+    body = _payload(1024 * 1024)
+    for mirror in ('m1', 'm2'):
+        http_server.files[f'/{mirror}/kodi.exe'] = body
+        http_server.etags[f'/{mirror}/kodi.exe'] = '"v1"'
+    dest = str(tmp_path / "kodi.exe")
+    dl = KodiDownloader(config_dir=str(tmp_path / "config"))
+    try:
+        dl.download_file(http_server.base_url + '/m2/kodi.exe', dest,
+                         progress_callback=_interrupt_after(300 * 1024))
+    except _Interrupt:
+        pass
+
+    http_server.requests.clear()
+    # m1 ranks first, but only m2 can resume the .part
+    dl.mirror_urls = [http_server.base_url + '/m1/', http_server.base_url + '/m2/']
+    dl.download_release({'filename': 'kodi.exe', 'url': http_server.base_url + '/m1/kodi.exe'}, dest)
+
+    gets = [r for r in http_server.requests if r[0] == 'GET']
+    assert gets and all(r[1].startswith('/m2/') for r in gets)
+
+
+def test_mirror_stats_need_a_config_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path))
+    dl = KodiDownloader()
+    dl.mirror_pool.record_failure('https://mirror/')
+    dl.mirror_pool.save()
+    assert not os.path.exists(tmp_path / "KodiManager" / "mirrors.json")
+
+    dl = KodiDownloader(config_dir=str(tmp_path / "config"))
+    dl.mirror_pool.record_failure('https://mirror/')
+    dl.mirror_pool.save()
+    assert os.path.exists(tmp_path / "config" / "mirrors.json")
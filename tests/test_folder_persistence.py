@@ -25,9 +25,13 @@ def test_folder_deletion_success(tmp_path):
          patch.object(InstanceManager, '_kill_process_in_folder', return_value=None):
         result = instance_manager.remove_instance(inst.id, delete_files=True)
         
-    assert result is True
+    assert result == (True, "")
+    # Renamed away at once, the tombstone goes in the background
     assert not os.path.exists(kodi_path)
     assert len(instance_manager.get_all()) == 0
+    assert instance_manager.reclaimer.wait_idle(10)
+    assert os.listdir(tmp_path) == ["config"]
+    assert instance_manager.journal.entries() == []
 
 def test_folder_deletion_failure_keeps_instance(tmp_path):
     # Setup
@@ -38,18 +42,19 @@ def test_folder_deletion_failure_keeps_instance(tmp_path):
     os.makedirs(kodi_path)
     inst = instance_manager.register_instance("InstFail", str(kodi_path), "19.5")
     
-    # Mock rmtree to fail always
-    def failing_rmtree(path, onerror=None):
-        raise OSError("Permission denied")
+    # A folder held open by another process cannot be renamed (Windows)
+    def failing_rename(src, dst):
+        raise PermissionError("Permission denied")
 
-    with patch("shutil.rmtree", side_effect=failing_rmtree):
+    with patch("os.rename", side_effect=failing_rename), patch("time.sleep"):
         # We assume real internal os.path.exists works
         
         with patch.object(ShortcutManager, 'delete_shortcut', return_value=True), \
              patch.object(InstanceManager, '_kill_process_in_folder', return_value=None):
              result = instance_manager.remove_instance(inst.id, delete_files=True)
              
-    assert result is False
+    assert result[0] is False
     assert os.path.exists(kodi_path)
+    assert instance_manager.journal.entries() == []
     # Important: Instance should still be in the manager
     assert len(instance_manager.get_all()) == 1
@@ -0,0 +1,39 @@
+import os
+import socket
+import sys
+
+import pytest
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.http_client import CircuitOpenError, HttpClient
+
+
+def test_connections_are_reused(http_server):
+    http_server.files['/a'] = b'x' * 1000
+    client = HttpClient()
+    for _ in range(5):
+        r = client.get(http_server.base_url + '/a')
+        assert r.content == b'x' * 1000
+
+    stats = client.stats()[http_server.base_url]
+    assert stats['requests'] == 5
+    assert stats['connections'] == 1
+    assert stats['reused'] == 4
+
+
+def test_circuit_opens_after_repeated_failures():
+    # Grab a free port and close it so connections are refused
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    url = f"http://127.0.0.1:{sock.getsockname()[1]}/"
+    sock.close()
+
+    client = HttpClient(retries=0, breaker_threshold=2, breaker_reset=60)
+    for _ in range(2):
+        with pytest.raises(requests.ConnectionError):
+            client.get(url, timeout=1)
+    with pytest.raises(CircuitOpenError):
+        client.get(url, timeout=1)
+    assert list(client.stats().values())[0]['circuit_open']
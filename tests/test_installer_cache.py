@@ -0,0 +1,75 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.cache import InstallerCache
+
+
+def _version(ver):
+    return {'version': ver, 'codename': 'Omega', 'filename': f'kodi-{ver}-Omega-x64.exe'}
+
+
+def _download(tmp_path, ver, size):
+    path = tmp_path / f'kodi-{ver}-Omega-x64.exe'
+    path.write_bytes(ver.encode() * (size // len(ver)))
+    return str(path)
+
+
+def test_add_and_lookup(tmp_path):
+    cache = InstallerCache(str(tmp_path / "cache"), max_bytes=10_000)
+    path = cache.add(_download(tmp_path, '21.0', 1000), _version('21.0'))
+
+    assert os.path.dirname(path) == cache.objects_dir
+    assert cache.lookup('kodi-21.0-Omega-x64.exe') == path
+    assert cache.lookup('kodi-20.0-Nexus-x64.exe') is None
+
+    # Index survives a reload
+    reloaded = InstallerCache(str(tmp_path / "cache"), max_bytes=10_000)
+    assert reloaded.lookup('kodi-21.0-Omega-x64.exe') == path
+
+
+def test_corrupt_entry_is_dropped(tmp_path):
+    cache = InstallerCache(str(tmp_path / "cache"), max_bytes=10_000)
+    path = cache.add(_download(tmp_path, '21.0', 1000), _version('21.0'))
+
+    with open(path, 'r+b') as f:
+        f.write(b'XX')
+
+    assert cache.lookup('kodi-21.0-Omega-x64.exe') is None
+    assert not os.path.exists(path)
+    assert cache.entries == {}
+
+
+def test_lru_eviction(tmp_path):
+    cache = InstallerCache(str(tmp_path / "cache"), max_bytes=2500)
+    cache.add(_download(tmp_path, '19.5', 1000), _version('19.5'))
+    cache.add(_download(tmp_path, '20.2', 1000), _version('20.2'))
+    # Touch 19.5 so 20.2 becomes least recently used
+    assert cache.lookup('kodi-19.5-Omega-x64.exe')
+    cache.add(_download(tmp_path, '21.0', 1000), _version('21.0'))
+
+    assert cache.total_size() <= 2500
+    assert cache.lookup('kodi-20.2-Omega-x64.exe') is None
+    assert cache.lookup('kodi-19.5-Omega-x64.exe')
+    assert cache.lookup('kodi-21.0-Omega-x64.exe')
+
+
+def test_legacy_installers_are_adopted(tmp_path):
+    root = tmp_path / "Kodi_Installers"
+    root.mkdir()
+    (root / 'kodi-21.0-Omega-x64.exe').write_bytes(b'a' * 3000)
+    (root / 'kodi-20.0-Nexus-x64.exe').write_bytes(b'b' * 3000)
+    (root / 'kodi-21.1-Omega-x64.exe.part').write_bytes(b'c' * 10)
+    (root / 'vc_redist.x64.exe').write_bytes(b'd' * 10)
+    os.utime(root / 'kodi-20.0-Nexus-x64.exe', (1000, 1000))
+
+    cache = InstallerCache(str(root), max_bytes=4000)
+
+    path = cache.lookup('kodi-21.0-Omega-x64.exe')
+    assert path and os.path.dirname(path) == cache.objects_dir
+    # Now within the budget: only the newest of the two fits
+    assert cache.total_size() <= 4000
+    assert len(cache.entries) == 1
+    # Not a Kodi installer: never moved where eviction could delete it
+    assert sorted(os.listdir(root)) == ['index.json', 'kodi-21.1-Omega-x64.exe.part', 'objects', 'vc_redist.x64.exe']
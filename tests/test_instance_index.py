@@ -0,0 +1,174 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.manager import InstanceManager
+
+
+def test_lookup_by_id_and_path(tmp_path):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    kodi_path = tmp_path / "Inst1"
+    os.makedirs(kodi_path)
+    inst = manager.register_instance("Inst1", str(kodi_path), "21.0")
+
+    assert manager.get_by_id(inst.id) is inst
+    assert manager.get_by_path(str(kodi_path)) is inst
+    # Normalized: trailing separators and relative segments resolve to the same key
+    assert manager.get_by_path(str(kodi_path) + os.sep) is inst
+    assert manager.get_by_path(str(tmp_path / "Inst1" / ".." / "Inst1")) is inst
+    assert manager.get_by_path(str(tmp_path / "Other")) is None
+
+    # Indexes are rebuilt on load
+    reloaded = InstanceManager(config_dir=str(tmp_path / "config"))
+    assert reloaded.get_by_path(str(kodi_path)).id == inst.id
+
+
+def test_indexes_follow_updates_and_removal(tmp_path):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    old_path, new_path = str(tmp_path / "Old"), str(tmp_path / "New")
+    inst = manager.register_instance("Inst", old_path, "21.0")
+
+    manager.update_instance(inst.id, path=new_path)
+    assert manager.get_by_path(old_path) is None
+    assert manager.get_by_path(new_path) is inst
+
+    manager.remove_instance(inst.id)
+    assert manager.get_by_id(inst.id) is None
+    assert manager.get_by_path(new_path) is None
+    assert manager.get_all() == []
+
+
+def test_update_rejects_immutable_and_unknown_fields(tmp_path):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    inst = manager.register_instance("A", str(tmp_path / "A"), "21.0")
+
+    for fields in ({'id': 'other'}, {'created_at': 0.0}, {'colour': 'red'}, {'name': 'B', 'id': 'other'}):
+        with pytest.raises(ValueError):
+            manager.update_instance(inst.id, **fields)
+    assert manager.get_by_id(inst.id).name == "A"
+    assert manager.get_by_path(str(tmp_path / "A")).id == inst.id
+
+
+def test_sqlite_backend_behind_manager(tmp_path):
+    config_dir = str(tmp_path / "config")
+    manager = InstanceManager(config_dir=config_dir, backend='sqlite')
+    a = manager.register_instance("A", str(tmp_path / "A"), "20.2")
+    b = manager.register_instance("B", str(tmp_path / "B"), "21.0")
+    manager.update_instance_version_record(a.id, "21.0")
+    manager.remove_instance(b.id)
+    manager.registry.close()
+
+    reloaded = InstanceManager(config_dir=config_dir, backend='sqlite')
+    assert [(i.id, i.version) for i in reloaded.get_all()] == [(a.id, "21.0")]
+    assert reloaded.get_by_path(str(tmp_path / "A")).id == a.id
+
+
+def test_batch_writes_once(tmp_path):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    commits = []
+    original = manager.registry.commit
+    manager.registry.commit = lambda changed, removed, snapshot: (
+        commits.append((len(list(changed)), len(list(removed)))), original(changed, removed, snapshot))[1]
+
+    created = manager.register_many([(f"K{n}", str(tmp_path / f"K{n}"), "21.0") for n in range(50)])
+    assert commits == [(50, 0)]
+
+    results = manager.remove_many([i.id for i in created[:20]])
+    assert all(success for _, success, _ in results)
+    assert commits[-1] == (0, 20)
+    assert len(commits) == 2
+
+    reloaded = InstanceManager(config_dir=str(tmp_path / "config"))
+    assert len(reloaded.get_all()) == 30
+
+
+def test_failed_commit_keeps_mutations_pending(tmp_path):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    a = manager.register_instance("A", str(tmp_path / "A"), "21.0")
+    original = manager.registry.commit
+
+    def failing(changed, removed, snapshot):
+        raise OSError("lock timeout")
+    manager.registry.commit = failing
+    with pytest.raises(OSError):
+        manager.register_instance("B", str(tmp_path / "B"), "21.0")
+    with pytest.raises(OSError):
+        manager.remove_instance(a.id)
+
+    manager.registry.commit = original
+    manager.register_instance("C", str(tmp_path / "C"), "21.0")
+    reloaded = InstanceManager(config_dir=str(tmp_path / "config"))
+    assert sorted(i.name for i in reloaded.get_all()) == ["B", "C"]
+
+
+def test_managers_see_each_others_changes(tmp_path):
+    config = str(tmp_path / "config")
+    first, second = InstanceManager(config_dir=config), InstanceManager(config_dir=config)
+
+    a = first.register_instance("A", str(tmp_path / "A"), "21.0")
+    assert [i.id for i in second.get_all()] == [a.id]
+    held = second.get_by_id(a.id)
+
+    b = second.register_instance("B", str(tmp_path / "B"), "21.0")
+    first.update_instance(a.id, version="21.1")
+    assert {i.id for i in first.get_all()} == {a.id, b.id}
+
+    # Reloads update the objects already handed out
+    second.get_all()
+    assert held.version == "21.1"
+    assert not second.reload_if_changed()
+
+
+def test_update_keeps_other_records(tmp_path):
+    config = str(tmp_path / "config")
+    created = InstanceManager(config_dir=config).register_many(
+        [(f"K{n}", str(tmp_path / f"K{n}"), "21.0") for n in range(10)])
+
+    manager = InstanceManager(config_dir=config)
+    assert len(manager) == 10
+
+    inst = manager.get_by_id(created[3].id)
+    assert inst.name == "K3"
+    assert manager.get_by_path(str(tmp_path / "K3")) is inst
+
+    manager.update_instance(inst.id, version="21.1")
+    reloaded = InstanceManager(config_dir=config)
+    assert [i.version for i in reloaded.get_all()] == ["21.0"] * 3 + ["21.1"] + ["21.0"] * 6
+
+
+def test_indexes_stay_consistent_across_threads(tmp_path):
+    import threading
+
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                manager.instances
+                manager._records()
+                manager._path_index()
+        except Exception as e:
+            errors.append(e)
+
+    readers = [threading.Thread(target=reader) for _ in range(2)]
+    for t in readers:
+        t.start()
+    try:
+        with manager.batch():
+            for n in range(300):
+                inst = manager.register_instance(f"Inst{n}", str(tmp_path / f"Inst{n}"), "21.0")
+                if n % 2:
+                    manager.remove_instance(inst.id)
+    finally:
+        stop.set()
+        for t in readers:
+            t.join()
+
+    assert errors == []
+    assert len(manager) == 150
+    assert all(manager.get_by_path(i.path) is i for i in manager.instances)
@@ -0,0 +1,34 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.listing_parser import ReleaseListingParser, iter_releases
+
+BASE = "https://mirror/win64/"
+LISTING = (
+    '<html><body><pre>\n'
+    '<a href="../">../</a>\n'
+    '<a href="kodi-20.2-Nexus-x64.exe">kodi-20.2-Nexus-x64.exe</a>  12-Jun-2023 10:00  80M\n'
+    '<a class="file" href=\'kodi-21.0-RC1-Omega-x64.exe\'>kodi-21.0-RC1-Omega-x64.exe</a>\n'
+    '<a href="kodi-21.1-Omega-x64.exe.sha256">checksum</a>\n'
+    '<A HREF="kodi-21.1-Omega-x64.exe">kodi-21.1-Omega-x64.exe</A>\n'
+    '</pre></body></html>'
+)
+
+
+def test_parses_release_records():
+    releases = ReleaseListingParser(BASE).feed(LISTING)
+    assert [(r['version'], r['tag'], r['codename'], r['is_stable']) for r in releases] == [
+        ('20.2', '', 'Nexus', True),
+        ('21.0', 'RC1', 'Omega', False),
+        ('21.1', '', 'Omega', True),
+    ]
+    assert releases[0]['url'] == BASE + 'kodi-20.2-Nexus-x64.exe'
+
+
+def test_chunk_boundaries_do_not_lose_links():
+    expected = ReleaseListingParser(BASE).feed(LISTING)
+    for size in (1, 3, 7, 64):
+        chunks = [LISTING[i:i + size] for i in range(0, len(LISTING), size)]
+        assert list(iter_releases(chunks, BASE)) == expected
@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.mirrors import MirrorPool
+
+
+def test_race_returns_first_valid_result(tmp_path):
+    pool = MirrorPool(str(tmp_path))
+    cancelled_seen = []
+
+    def fetch(mirror, cancelled):
+        if mirror == 'slow':
+            cancelled.wait(5)
+            cancelled_seen.append(cancelled.is_set())
+            return None
+        if mirror == 'broken':
+            raise IOError("connection refused")
+        return f"listing from {mirror}"
+
+    start = time.monotonic()
+    winner = pool.race(['slow', 'broken', 'fast'], fetch)
+    assert winner == ('fast', 'listing from fast')
+    assert time.monotonic() - start < 2
+
+    # Stats persist and rank the healthy mirror first
+    time.sleep(0.1)
+    pool.save()
+    reloaded = MirrorPool(str(tmp_path))
+    assert reloaded.stats['broken']['failures'] == 1
+    assert reloaded.ranked(['broken', 'slow', 'fast']) == ['fast', 'slow', 'broken']
+    assert cancelled_seen == [True]
+
+
+def test_race_all_failing(tmp_path):
+    pool = MirrorPool(str(tmp_path))
+    assert pool.race(['a', 'b'], lambda mirror, cancelled: None) is None
+    assert pool.stats['a']['failures'] == pool.stats['b']['failures'] == 1
+
+
+def test_listing_from_healthy_mirror(http_server, tmp_path):
+    from kodimanager.core.downloader import KodiDownloader
+
+    http_server.files['/good/'] = b'<a href="kodi-21.1-Omega-x64.exe">x</a>'
+    dl = KodiDownloader(config_dir=str(tmp_path))
+    dl.mirror_urls = [http_server.base_url + '/missing/', http_server.base_url + '/good/']
+
+    versions = dl.get_available_versions()
+    assert versions[0]['url'] == http_server.base_url + '/good/kodi-21.1-Omega-x64.exe'
+
+    # The losing mirror may still be finishing in the background
+    deadline = time.monotonic() + 5
+    while http_server.base_url + '/missing/' not in dl.mirror_pool.stats and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert dl.mirror_pool.ranked(dl.mirror_urls)[0] == http_server.base_url + '/good/'
@@ -0,0 +1,115 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core import monitor as monitor_module
+from kodimanager.core.monitor import IDLE, InstanceMonitor
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="spawns POSIX shells named like Kodi")
+
+
+def _spawn(folder, name="kodi"):
+    """Runs a copy of /bin/sh called `name` from `folder`, blocked on stdin."""
+    os.makedirs(folder, exist_ok=True)
+    exe = os.path.join(folder, name)
+    shutil.copy2(shutil.which("sh"), exe)
+    proc = subprocess.Popen([exe, "-c", "read x"], stdin=subprocess.PIPE)
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            if psutil.Process(proc.pid).exe() == exe:
+                break
+        except psutil.Error:
+            pass
+        time.sleep(0.01)
+    return proc
+
+
+def _stop(proc):
+    proc.kill()
+    proc.wait()
+
+
+def test_external_process_is_discovered(tmp_path):
+    external = _spawn(str(tmp_path / "A"))
+    try:
+        monitor = InstanceMonitor()
+        monitor.set_instances({"a": str(tmp_path / "A"), "b": str(tmp_path / "B")})
+        changed = monitor.poll()
+
+        assert changed["b"] == IDLE
+        assert changed["a"].running and changed["a"].pids == (external.pid,)
+        assert changed["a"].rss > 0
+        assert monitor.status("a") == changed["a"]
+    finally:
+        _stop(external)
+
+
+def test_only_changes_are_pushed(tmp_path):
+    pushed = []
+    monitor = InstanceMonitor(on_change=pushed.append, discover_every=1000)
+    monitor.set_instances({"a": str(tmp_path / "A"), "b": str(tmp_path / "B")})
+    monitor.poll()
+    assert pushed == [{"a": IDLE, "b": IDLE}]
+
+    assert monitor.poll() == {}
+    assert len(pushed) == 1
+
+    launched = _spawn(str(tmp_path / "B"))
+    monitor.track("b", launched.pid)
+    assert list(monitor.poll()) == ["b"]
+    assert monitor.status("b").running
+
+    _stop(launched)
+    assert monitor.poll() == {"b": IDLE}
+    assert pushed[-1] == {"b": IDLE}
+
+
+def test_idle_instances_cost_one_snapshot_per_discovery(tmp_path, monkeypatch):
+    snapshots = []
+    real = monitor_module.ProcessSnapshot
+
+    def counting(*args, **kwargs):
+        snapshots.append(1)
+        return real(*args, **kwargs)
+    monkeypatch.setattr(monitor_module, 'ProcessSnapshot', counting)
+
+    monitor = InstanceMonitor(discover_every=5)
+    monitor.set_instances({f"i{n}": str(tmp_path / f"Kodi {n}") for n in range(60)})
+    started = time.perf_counter()
+    for _ in range(10):
+        monitor.poll()
+    elapsed = time.perf_counter() - started
+
+    assert len(snapshots) == 2
+    assert all(not monitor.status(f"i{n}").running for n in range(60))
+    assert elapsed < 1.0
+
+
+def test_background_thread_pushes_launch(tmp_path):
+    pushed = []
+    monitor = InstanceMonitor(on_change=pushed.append, interval=30)
+    monitor.set_instances({"a": str(tmp_path / "A")})
+    monitor.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not pushed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pushed == [{"a": IDLE}]
+        launched = _spawn(str(tmp_path / "A"))
+        # track() wakes the sampler instead of waiting out the interval
+        monitor.track("a", launched.pid)
+        deadline = time.monotonic() + 5
+        while not monitor.status("a").running and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert monitor.status("a").running
+        _stop(launched)
+    finally:
+        monitor.stop(timeout=5)
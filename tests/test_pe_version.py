@@ -0,0 +1,116 @@
+import os
+import struct
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.manager import InstanceManager
+from kodimanager.utils import pe_version
+from kodimanager.utils.pe_version import kodi_version, read_version_info
+
+RSRC_RVA = 0x1000
+RSRC_OFFSET = 0x400
+
+
+def _pad4(data):
+    return data + b'\0' * (-len(data) % 4)
+
+
+def _block(key, value=b'', children=(), text=False):
+    body = _pad4(struct.pack('<HHH', 0, 0, 0) + (key + '\0').encode('utf-16-le')) + value
+    if children:
+        body = _pad4(body) + b''.join(_pad4(c) for c in children)
+    value_length = len(value) // 2 if text else len(value)
+    return struct.pack('<HHH', len(body), value_length, 1 if text else 0) + body[6:]
+
+
+def _version_info(version, strings):
+    major, minor, patch, build = version
+    fixed = struct.pack('<13I', 0xFEEF04BD, 0x10000, (major << 16) | minor, (patch << 16) | build,
+                        (major << 16) | minor, (patch << 16) | build, 0x3F, 0, 4, 1, 0, 0, 0)
+    table = _block('040904b0', children=[_block(k, (v + '\0').encode('utf-16-le'), text=True)
+                                         for k, v in strings.items()])
+    var = _block('VarFileInfo', children=[_block('Translation', struct.pack('<HH', 0x409, 1200))])
+    return _block('VS_VERSION_INFO', fixed, [_block('StringFileInfo', children=[table]), var])
+
+
+def _resources(version_info):
+    def directory(entry_id, target):
+        return struct.pack('<IIHHHH', 0, 0, 0, 0, 0, 1) + struct.pack('<II', entry_id, target)
+    # type -> name -> language -> data entry -> VS_VERSIONINFO
+    return (directory(16, 0x80000000 | 24) + directory(1, 0x80000000 | 48) + directory(0x409, 72)
+            + struct.pack('<IIII', RSRC_RVA + 88, len(version_info), 0, 0) + version_info)
+
+
+def make_pe(path, version=(21, 1, 0, 0), strings=None, pe32plus=True):
+    """Writes a minimal PE image whose only content is a version resource."""
+    if strings is None:
+        strings = {'FileDescription': "Kodi", 'FileVersion': "21.1.0.0", 'ProductVersion': "21.1 (21.1.0) Git:Omega"}
+    rsrc = _resources(_version_info(version, strings))
+
+    dirs_at, opt_size = (112, 240) if pe32plus else (96, 224)
+    optional = bytearray(opt_size)
+    struct.pack_into('<H', optional, 0, 0x20B if pe32plus else 0x10B)
+    struct.pack_into('<I', optional, dirs_at - 4, 16)
+    struct.pack_into('<II', optional, dirs_at + 16, RSRC_RVA, len(rsrc))
+
+    header = bytearray(0x40)
+    header[0:2] = b'MZ'
+    struct.pack_into('<I', header, 0x3C, 0x40)
+    header += b'PE\0\0' + struct.pack('<HHIIIHH', 0x8664, 1, 0, 0, 0, opt_size, 0x22) + optional
+    header += struct.pack('<8sIIIIIIHHI', b'.rsrc', len(rsrc), RSRC_RVA, len(_pad4(rsrc)), RSRC_OFFSET, 0, 0, 0, 0, 0)
+    with open(path, 'wb') as f:
+        f.write(bytes(header).ljust(RSRC_OFFSET, b'\0') + _pad4(rsrc))
+    return str(path)
+
+
+def test_reads_version_resource(tmp_path):
+    for pe32plus in (True, False):
+        exe = make_pe(tmp_path / f"kodi{pe32plus}.exe", pe32plus=pe32plus)
+        info = read_version_info(exe)
+        assert info['FileVersion'] == "21.1.0.0"
+        assert info['ProductVersion'] == "21.1 (21.1.0) Git:Omega"
+        assert info['FixedFileVersion'] == "21.1.0.0"
+        assert kodi_version(exe) == "21.1"
+
+
+def test_falls_back_to_fixed_version(tmp_path):
+    exe = make_pe(tmp_path / "kodi.exe", version=(20, 5, 1, 0), strings={'FileDescription': "Kodi"})
+    assert kodi_version(exe) == "20.5.1"
+
+
+def test_not_a_pe(tmp_path):
+    path = tmp_path / "kodi.exe"
+    path.write_bytes(b'#!/bin/sh\n')
+    assert read_version_info(str(path)) is None
+    assert kodi_version(str(tmp_path / "missing.exe")) is None
+
+
+def test_memoized_until_file_changes(tmp_path):
+    exe = make_pe(tmp_path / "kodi.exe")
+    assert kodi_version(exe) == "21.1"
+    hits = pe_version._read_cached.cache_info().hits
+    assert kodi_version(exe) == "21.1"
+    assert pe_version._read_cached.cache_info().hits == hits + 1
+
+    make_pe(exe, version=(21, 2, 0, 0), strings={'ProductVersion': "21.2.0"})
+    os.utime(exe, ns=(0, 10 ** 9))
+    assert kodi_version(exe) == "21.2"
+
+
+def test_detect_and_refresh_use_exe_version(tmp_path):
+    drive = tmp_path / "drive"
+    os.makedirs(drive / "Portable")
+    make_pe(drive / "Portable" / "kodi.exe")
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    manager.settings.set('scan_roots', [str(drive)])
+
+    detected = manager.detect_installed_instances()
+    assert [i.version for i in detected] == ["21.1 (Detected)"]
+
+    installed = manager.register_instance("Salon", str(drive / "Salon"), "20.2")
+    os.makedirs(installed.path)
+    make_pe(installed.executable_path, strings={'ProductVersion': "21.2.0"})
+    assert manager.refresh_versions() == [installed]
+    assert installed.version == "21.2"
+    assert manager.refresh_versions() == []
@@ -0,0 +1,125 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.manager import InstanceManager
+from kodimanager.utils import process as process_module
+from kodimanager.utils.process import ProcessSnapshot, kill_process_by_path, kill_processes_by_paths
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="spawns POSIX shells named like Kodi")
+
+
+def _spawn(folder, script="read x", name="kodi"):
+    """Runs a copy of /bin/sh called `name` from `folder`, blocked on stdin."""
+    os.makedirs(folder, exist_ok=True)
+    exe = os.path.join(folder, name)
+    shutil.copy2(shutil.which("sh"), exe)
+    proc = subprocess.Popen([exe, "-c", script], stdin=subprocess.PIPE)
+    # Wait until the copied binary is the one running
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            if psutil.Process(proc.pid).exe() == exe:
+                break
+        except psutil.Error:
+            pass
+        time.sleep(0.01)
+    return proc
+
+
+def test_snapshot_matches_folder_not_prefix(tmp_path):
+    a = _spawn(str(tmp_path / "Kodi"))
+    b = _spawn(str(tmp_path / "Kodi 2"))
+    try:
+        snapshot = ProcessSnapshot()
+        found = snapshot.find_many([str(tmp_path / "Kodi"), str(tmp_path / "Kodi 2"), str(tmp_path / "Other")])
+        assert [p.pid for p in found[str(tmp_path / "Kodi")]] == [a.pid]
+        assert [p.pid for p in found[str(tmp_path / "Kodi 2")]] == [b.pid]
+        assert found[str(tmp_path / "Other")] == []
+    finally:
+        for proc in (a, b):
+            proc.kill()
+            proc.wait()
+
+
+def test_name_prefilter(tmp_path):
+    helper = _spawn(str(tmp_path / "Kodi"), name="helper")
+    try:
+        assert ProcessSnapshot().find(str(tmp_path / "Kodi")) == []
+        assert [p.pid for p in ProcessSnapshot(names=None).find(str(tmp_path / "Kodi"))] == [helper.pid]
+    finally:
+        helper.kill()
+        helper.wait()
+
+
+def test_kill_returns_once_processes_are_gone(tmp_path):
+    proc = _spawn(str(tmp_path / "Kodi"))
+    started = time.monotonic()
+    assert kill_process_by_path(str(tmp_path / "Kodi"))
+    assert time.monotonic() - started < 1.0
+    assert proc.wait(5) is not None
+
+
+def test_kill_escalates_when_terminate_is_ignored(tmp_path):
+    proc = _spawn(str(tmp_path / "Kodi"), script='trap "" TERM; read x')
+    time.sleep(0.2)  # Let the shell install its trap
+    started = time.monotonic()
+    assert kill_process_by_path(str(tmp_path / "Kodi"), timeout=0.5)
+    # Survived the terminate() wait, then went down with kill()
+    assert 0.5 <= time.monotonic() - started < 2.0
+    proc.wait(5)
+    assert not psutil.pid_exists(proc.pid)
+
+
+def test_bulk_kill_uses_one_snapshot(tmp_path, monkeypatch):
+    procs = [_spawn(str(tmp_path / name)) for name in ("A", "B")]
+    bystander = _spawn(str(tmp_path / "C"))
+    snapshots = []
+    real = process_module.ProcessSnapshot
+
+    def counting(*args, **kwargs):
+        snapshots.append(1)
+        return real(*args, **kwargs)
+    monkeypatch.setattr(process_module, 'ProcessSnapshot', counting)
+    try:
+        assert kill_processes_by_paths([str(tmp_path / "A"), str(tmp_path / "B"), str(tmp_path / "Missing")])
+        assert len(snapshots) == 1
+        for proc in procs:
+            proc.wait(5)
+            assert not psutil.pid_exists(proc.pid)
+        assert bystander.poll() is None
+    finally:
+        bystander.kill()
+        bystander.wait()
+
+
+def test_nothing_running_returns_at_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(psutil, 'wait_procs', lambda *a, **k: pytest.fail("nothing to wait for"))
+    assert kill_process_by_path(str(tmp_path / "Kodi"))
+
+
+def test_remove_many_takes_one_snapshot(tmp_path, monkeypatch):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    ids = []
+    for name in ("A", "B", "C"):
+        os.makedirs(tmp_path / name)
+        ids.append(manager.register_instance(name, str(tmp_path / name), "21.1").id)
+    snapshots = []
+    real = process_module.ProcessSnapshot
+
+    def counting(*args, **kwargs):
+        snapshots.append(1)
+        return real(*args, **kwargs)
+    monkeypatch.setattr(process_module, 'ProcessSnapshot', counting)
+
+    results = manager.remove_many(ids, delete_files=True)
+    assert all(ok for _, ok, _ in results)
+    assert len(snapshots) == 1
+    assert manager.reclaimer.wait_idle(10)
@@ -0,0 +1,58 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core import progress as progress_mod
+from kodimanager.core.progress import ProgressReporter, as_reporter, format_eta, format_size
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_updates_are_coalesced(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(progress_mod.time, 'monotonic', clock)
+    events = []
+    reporter = ProgressReporter(events.append, max_rate=10)
+
+    # 1000 chunk callbacks over one second of simulated time
+    for i in range(1, 1001):
+        clock.now += 0.001
+        reporter(i * 1000, 1000 * 1000)
+
+    assert 10 <= len(events) <= 12
+    assert events[-1].done and events[-1].fraction == 1.0
+    assert abs(events[-1].rate - 1000 * 1000) / 1e6 < 0.05
+
+
+def test_rate_and_eta(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(progress_mod.time, 'monotonic', clock)
+    events = []
+    reporter = ProgressReporter(events.append, max_rate=0)
+
+    reporter(0, 1000)
+    clock.now += 1
+    reporter(100, 1000)
+    assert events[-1].rate == 100
+    assert events[-1].eta == 9
+
+
+def test_legacy_callback_and_formatting():
+    calls = []
+    reporter = as_reporter(lambda current, total: calls.append((current, total)))
+    reporter(5, 10)
+    reporter(10, 10)
+    assert calls == [(5, 10), (10, 10)]
+    assert as_reporter(reporter) is reporter
+
+    assert format_size(512) == "512 B"
+    assert format_size(3 * 1024 * 1024) == "3.0 MB"
+    assert format_eta(75) == "01:15"
+    assert format_eta(None) == "--:--"
@@ -0,0 +1,139 @@
+import os
+import stat
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core import reclaimer as reclaimer_module
+from kodimanager.core.manager import InstanceManager
+from kodimanager.core.reclaimer import Reclaimer, TombstoneJournal, tombstone_path
+
+
+def _tree(root, dirs=6, files=20):
+    count = 0
+    for d in range(dirs):
+        folder = root / "portable_data" / "userdata" / "Thumbnails" / f"{d:x}"
+        os.makedirs(folder)
+        for f in range(files):
+            (folder / f"{f}.jpg").write_bytes(b"x" * 10)
+            count += 1
+    readonly = root / "kodi.exe"
+    readonly.write_bytes(b"MZ")
+    os.chmod(readonly, stat.S_IREAD)
+    return count + 1
+
+
+def test_removes_tree_in_background_with_progress(tmp_path):
+    target = tmp_path / "Kodi"
+    expected = _tree(target)
+    outside = tmp_path / "outside"
+    os.makedirs(outside)
+    (outside / "keep.txt").write_text("keep")
+    os.symlink(outside, target / "link")
+
+    progress = []
+    job = Reclaimer().submit(str(target), on_progress=lambda c, t: progress.append((c, t)))
+    assert job.wait(10) and job.succeeded
+    assert not target.exists()
+    # The symlink went, not what it pointed to
+    assert (outside / "keep.txt").exists()
+    assert job.removed == expected + 1
+    assert progress[-1] == (job.removed, job.removed)
+
+
+def test_leftovers_are_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(reclaimer_module, 'RETRY_DELAY', 0.05)
+    target = tmp_path / "Kodi"
+    _tree(target, dirs=2, files=3)
+    locked = str(target / "kodi.exe")
+
+    real_unlink = reclaimer_module._unlink
+    calls = []
+
+    def unlink(path):
+        # Held open during the first pass
+        if path == locked and not calls:
+            calls.append(path)
+            return False
+        return real_unlink(path)
+    monkeypatch.setattr(reclaimer_module, '_unlink', unlink)
+
+    reclaimer = Reclaimer()
+    job = reclaimer.submit(str(target))
+    assert job.wait(10) and job.succeeded
+    assert job.attempts == 2
+    assert reclaimer.wait_idle(1)
+
+
+def test_startup_sweep_finishes_interrupted_tombstones(tmp_path):
+    config = tmp_path / "config"
+    tombstone = tombstone_path(str(tmp_path / "Kodi"))
+    _tree(tmp_path / os.path.basename(tombstone), dirs=2, files=2)
+    journal = TombstoneJournal(str(config))
+    os.makedirs(config)
+    journal.add(tombstone)
+    journal.add(str(tmp_path / "already-gone"))
+
+    manager = InstanceManager(config_dir=str(config))
+    assert manager.reclaimer.wait_idle(10)
+    assert not os.path.exists(tombstone)
+    assert manager.journal.entries() == []
+
+
+def test_clean_sweep_swaps_in_empty_portable_data(tmp_path):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    kodi = tmp_path / "Kodi"
+    _tree(kodi)
+    inst = manager.register_instance("Kodi", str(kodi), "21.1")
+
+    job = manager.clean_sweep(inst.id)
+    # Usable immediately, even before the old data is gone
+    assert os.listdir(inst.portable_data_path) == []
+    assert job.wait(10) and job.succeeded
+    assert sorted(os.listdir(kodi)) == ["kodi.exe", "portable_data"]
+    assert manager.journal.entries() == []
+
+    # Nothing to clean the second time around... apart from the empty folder
+    assert manager.clean_sweep(inst.id).wait(10)
+    os.rmdir(inst.portable_data_path)
+    assert manager.clean_sweep(inst.id) is None
+
+
+def test_clean_sweep_keeps_data_when_it_cannot_be_moved(tmp_path, monkeypatch):
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    kodi = tmp_path / "Kodi"
+    _tree(kodi, dirs=1, files=2)
+    inst = manager.register_instance("Kodi", str(kodi), "21.1")
+
+    def failing_rename(src, dst):
+        raise PermissionError("in use")
+    monkeypatch.setattr(os, 'rename', failing_rename)
+    monkeypatch.setattr(reclaimer_module.time, 'sleep', lambda s: None)
+
+    with pytest.raises(OSError):
+        manager.clean_sweep(inst.id)
+    assert len(os.listdir(os.path.join(inst.portable_data_path, "userdata", "Thumbnails", "0"))) == 2
+    assert manager.journal.entries() == []
+
+
+def test_unexpected_error_still_finishes_job(tmp_path, monkeypatch):
+    target = tmp_path / "Kodi"
+    _tree(target, dirs=1, files=2)
+    journal = TombstoneJournal(str(tmp_path))
+    journal.add(str(target))
+
+    def remove_tree(root, pool, job=None):
+        raise OSError("journal volume gone")
+    monkeypatch.setattr(reclaimer_module, 'remove_tree', remove_tree)
+
+    done = []
+    reclaimer = Reclaimer()
+    job = reclaimer.submit(str(target), journal=journal, on_done=done.append)
+    assert job.wait(5) and not job.succeeded
+    assert job.failed == [str(target)]
+    assert done == [job]
+    # Left for the startup sweep
+    assert journal.entries() == [str(target)]
+    assert reclaimer.wait_idle(1)
@@ -0,0 +1,153 @@
+import json
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.manager import InstanceManager
+from kodimanager.core.models import KodiInstance
+from kodimanager.core.registry import JsonRegistry, SqliteRegistry, open_registry
+
+
+def _inst(n, version="21.0"):
+    return KodiInstance(f"id{n}", f"Kodi {n}", f"C:\\Kodi\\{n}", version, float(n))
+
+
+def test_sqlite_row_level_commits(tmp_path):
+    registry = open_registry(str(tmp_path), 'sqlite')
+    a, b = _inst(1), _inst(2)
+    registry.commit([a, b], [], lambda: [a, b])
+
+    a.version = "21.1"
+    registry.commit([a], [], lambda: [a, b])
+    registry.commit([], [b.id], lambda: [a])
+    registry.close()
+
+    reopened = SqliteRegistry(str(tmp_path / "instances.db"))
+    assert reopened.load() == [a.to_dict()]
+    reopened.close()
+
+
+def test_sqlite_migrates_json_once(tmp_path):
+    legacy = [_inst(1).to_dict(), _inst(2).to_dict()]
+    json_path = tmp_path / "instances.json"
+    json_path.write_text(json.dumps(legacy))
+
+    registry = open_registry(str(tmp_path), 'sqlite')
+    assert registry.load() == legacy
+    registry.close()
+    assert not json_path.exists()
+    assert (tmp_path / "instances.json.migrated").exists()
+
+    # A second open does not import again
+    json_path.write_text(json.dumps([_inst(3).to_dict()]))
+    registry = open_registry(str(tmp_path), 'sqlite')
+    assert registry.load() == legacy
+    registry.close()
+
+
+def test_json_backend_round_trip(tmp_path):
+    registry = JsonRegistry(str(tmp_path / "instances.json"))
+    a = _inst(1)
+    registry.commit([a], [], lambda: [a])
+    assert registry.load() == [a.to_dict()]
+
+
+def test_json_write_is_atomic(tmp_path, monkeypatch):
+    registry = JsonRegistry(str(tmp_path / "instances.json"))
+    a = _inst(1)
+    registry.commit([a], [], lambda: [a])
+
+    class Boom(Exception):
+        pass
+
+    def failing_dump(*args, **kwargs):
+        raise Boom()
+
+    # A crash mid-serialisation leaves the previous registry intact
+    monkeypatch.setattr(json, 'dump', failing_dump)
+    b = _inst(2)
+    try:
+        registry.commit([b], [], lambda: [a, b])
+    except Boom:
+        pass
+    monkeypatch.undo()
+
+    assert registry.load() == [a.to_dict()]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_corrupt_json_is_kept_aside(tmp_path):
+    path = tmp_path / "instances.json"
+    path.write_text('[{"id": "id1", "name": "Kod')
+    registry = JsonRegistry(str(path))
+
+    assert registry.load() == []
+    assert not path.exists()
+    assert any(name.startswith("instances.json.corrupt-") for name in os.listdir(tmp_path))
+
+
+def test_undecodable_registry_does_not_crash_startup(tmp_path):
+    config = tmp_path / "config"
+    config.mkdir()
+    (config / "instances.json").write_bytes(b'\xff\xfe\x00garbage\x9c')
+
+    manager = InstanceManager(config_dir=str(config))
+    assert manager.get_all() == []
+    assert any(name.startswith("instances.json.corrupt-") for name in os.listdir(config))
+
+
+def _hammer(config_dir, tag, count, backend):
+    registry = open_registry(config_dir, backend)
+    local = [KodiInstance.from_dict(d) for d in registry.load()]
+    for n in range(count):
+        inst = KodiInstance(f"{tag}-{n}", f"Kodi {tag} {n}", f"C:\\Kodi\\{tag}{n}", "21.0", float(n))
+        local.append(inst)
+        removed = []
+        if n % 5 == 4:
+            # Drop one of our earlier entries too, so deletes have to survive the merge
+            removed.append(f"{tag}-{n - 4}")
+            local = [i for i in local if i.id != removed[0]]
+        merged = registry.commit([inst], removed, lambda: local)
+        if merged is not None:
+            local = [KodiInstance.from_dict(d) for d in merged]
+    registry.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="uses fork")
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_concurrent_processes_do_not_lose_updates(tmp_path, backend):
+    count = 40
+    ctx = multiprocessing.get_context('fork')
+    workers = [ctx.Process(target=_hammer, args=(str(tmp_path), tag, count, backend)) for tag in ("a", "b")]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(60)
+        assert w.exitcode == 0
+
+    expected = {f"{tag}-{n}" for tag in ("a", "b") for n in range(count) if n % 5 != 0}
+    registry = open_registry(str(tmp_path), backend)
+    assert {d['id'] for d in registry.load()} == expected
+    registry.close()
+
+
+def test_json_change_detection(tmp_path):
+    path = str(tmp_path / "instances.json")
+    mine, theirs = JsonRegistry(path), JsonRegistry(path)
+    a, b = _inst(1), _inst(2)
+    assert mine.commit([a], [], lambda: [a]) is None
+    assert not mine.has_changed()
+
+    theirs.load()
+    theirs.commit([b], [], lambda: [a, b])
+    assert mine.has_changed()
+
+    # Our stale snapshot would drop b; the commit merges instead
+    a.version = "21.1"
+    merged = mine.commit([a], [], lambda: [a])
+    assert merged == [a.to_dict(), b.to_dict()]
+    assert JsonRegistry(path).load() == merged
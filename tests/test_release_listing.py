@@ -0,0 +1,52 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.downloader import KodiDownloader
+
+LISTING = b"""<html><body><pre>
+<a href="../">../</a>
+<a href="kodi-20.2-Nexus-x64.exe">kodi-20.2-Nexus-x64.exe</a>
+<a href="kodi-21.1-Omega-x64.exe">kodi-21.1-Omega-x64.exe</a>
+<a href="kodi-22.0-Alpha1-Piers-x64.exe">kodi-22.0-Alpha1-Piers-x64.exe</a>
+</pre></body></html>"""
+
+
+def _downloader(http_server, tmp_path):
+    dl = KodiDownloader(config_dir=str(tmp_path / "config"))
+    dl.mirror_urls = [http_server.base_url + '/win64/']
+    return dl
+
+
+def _gets(http_server):
+    return [r for r in http_server.requests if r[0] == 'GET']
+
+
+def test_listing_served_from_cache_within_ttl(http_server, tmp_path):
+    http_server.files['/win64/'] = LISTING
+    http_server.etags['/win64/'] = '"listing-1"'
+
+    versions = _downloader(http_server, tmp_path).get_available_versions()
+    assert [v['version'] for v in versions] == ['21.1']
+
+    # A new downloader (dialog reopened) does not touch the network
+    versions = _downloader(http_server, tmp_path).get_available_versions()
+    assert [v['version'] for v in versions] == ['21.1']
+    assert len(_gets(http_server)) == 1
+
+
+def test_stale_listing_revalidated_with_etag(http_server, tmp_path):
+    http_server.files['/win64/'] = LISTING
+    http_server.etags['/win64/'] = '"listing-1"'
+    _downloader(http_server, tmp_path).get_available_versions()
+
+    dl = _downloader(http_server, tmp_path)
+    dl.listing_cache.ttl = 0
+    assert [v['version'] for v in dl.get_available_versions()] == ['21.1']
+    revalidation = _gets(http_server)[-1][2]
+    assert revalidation['If-None-Match'] == '"listing-1"'
+
+    # Forced refresh skips both the TTL and the conditional GET
+    dl.get_available_versions(force_refresh=True)
+    assert 'If-None-Match' not in _gets(http_server)[-1][2]
@@ -0,0 +1,138 @@
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core.manager import InstanceManager
+from kodimanager.core import scanner as scanner_module
+from kodimanager.core.scanner import InstallScanner, ScanCache
+
+
+def _install(path):
+    os.makedirs(path, exist_ok=True)
+    open(os.path.join(path, "kodi.exe"), "wb").close()
+    return str(path)
+
+
+def _fake_drive(root):
+    found = [
+        _install(root / "Kodi"),
+        _install(root / "Portables" / "Salon"),
+        _install(root / "Portables" / "Techs" / "Juan" / "Kodi21"),
+    ]
+    # Not reported: too deep, excluded, under a pruned subtree, inside another install
+    _install(root / "a" / "b" / "c" / "d" / "e" / "Deep")
+    _install(root / "$Recycle.Bin" / "Old")
+    _install(root / "Portables" / "Salon" / "portable_data" / "Nested")
+    _install(root / "Stray" / "userdata" / "Thumbnails" / "Kodi")
+    os.makedirs(root / "Empty" / "Sub")
+    return found
+
+
+def test_scan_finds_installs_within_limits(tmp_path):
+    expected = _fake_drive(tmp_path)
+    scanner = InstallScanner([str(tmp_path)], max_depth=4, exclude=["$Recycle.Bin"])
+    assert sorted(scanner.scan()) == sorted(expected)
+
+
+def test_every_root_is_scanned(tmp_path):
+    # The first root is an install itself and finishes at once
+    leaf = _install(tmp_path / "ProgramFiles" / "Kodi")
+    others = [_install(tmp_path / "D" / "Portables" / f"Kodi{n}") for n in range(3)]
+    roots = [leaf, str(tmp_path / "D"), str(tmp_path / "E")]
+    for _ in range(100):
+        assert sorted(InstallScanner(roots, max_depth=4).scan()) == sorted([leaf] + others)
+
+
+def test_scan_does_not_follow_symlinks(tmp_path):
+    expected = [_install(tmp_path / "real" / "Kodi")]
+    os.symlink(tmp_path, tmp_path / "real" / "loop")
+    os.symlink(tmp_path / "real" / "Kodi", tmp_path / "link")
+    assert list(InstallScanner([str(tmp_path)], max_depth=10).scan()) == expected
+
+
+def test_overlapping_roots_report_once(tmp_path):
+    expected = _install(tmp_path / "Portables" / "Kodi")
+    scanner = InstallScanner([str(tmp_path), str(tmp_path / "Portables"), str(tmp_path / "missing")])
+    assert list(scanner.scan()) == [expected]
+
+
+def test_scan_can_be_cancelled(tmp_path):
+    for n in range(20):
+        _install(tmp_path / f"K{n}")
+
+    cancel = threading.Event()
+    cancel.set()
+    assert list(InstallScanner([str(tmp_path)], cancel_event=cancel).scan()) == []
+
+    # Stopping iteration early abandons the rest of the walk
+    scan = InstallScanner([str(tmp_path)]).scan()
+    first = next(scan)
+    scan.close()
+    assert os.path.basename(first).startswith("K")
+
+
+def test_detect_registers_scanned_roots(tmp_path):
+    expected = _fake_drive(tmp_path / "drive")
+    manager = InstanceManager(config_dir=str(tmp_path / "config"))
+    manager.settings.set('scan_roots', [str(tmp_path / "drive")])
+
+    streamed = []
+    detected = manager.detect_installed_instances(on_found=streamed.append)
+    assert sorted(i.path for i in detected) == sorted(expected)
+    assert streamed == detected
+
+    # Known installs are not registered twice
+    assert manager.detect_installed_instances() == []
+    assert len(manager.get_all()) == len(expected)
+
+
+def _counting_scandir(monkeypatch):
+    calls = []
+    real = os.scandir
+
+    def scandir(path):
+        calls.append(path)
+        return real(path)
+    monkeypatch.setattr(os, 'scandir', scandir)
+    return calls
+
+
+def test_cached_rescan_reads_only_changed_folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(scanner_module, 'RACY_WINDOW_NS', 0)
+    drive = tmp_path / "drive"
+    expected = _fake_drive(drive)
+    cache_path = str(tmp_path / "scan_cache.json")
+    calls = _counting_scandir(monkeypatch)
+
+    def scan():
+        return sorted(InstallScanner([str(drive)], exclude=["$Recycle.Bin"], cache=ScanCache(cache_path)).scan())
+
+    assert scan() == sorted(expected)
+    assert calls
+    calls.clear()
+    assert scan() == sorted(expected)
+    assert calls == []
+
+    # A new install only re-reads its parent and itself
+    expected.append(_install(drive / "Portables" / "Nuevo"))
+    assert scan() == sorted(expected)
+    assert sorted(calls) == sorted([str(drive / "Portables"), str(drive / "Portables" / "Nuevo")])
+
+    # A removed kodi.exe changes its folder's mtime too
+    os.remove(os.path.join(expected[0], "kodi.exe"))
+    assert scan() == sorted(expected[1:])
+
+
+def test_scan_cache_is_capped_and_tolerates_corruption(tmp_path, monkeypatch):
+    monkeypatch.setattr(scanner_module, 'RACY_WINDOW_NS', 0)
+    _fake_drive(tmp_path / "drive")
+    cache_path = tmp_path / "scan_cache.json"
+    cache_path.write_text("{not json")
+
+    list(InstallScanner([str(tmp_path / "drive")], cache=ScanCache(str(cache_path), max_entries=3)).scan())
+    cache = ScanCache(str(cache_path))
+    assert len(cache) == 3
+    # The shallowest folders are the ones kept
+    assert str(tmp_path / "drive") in cache._entries
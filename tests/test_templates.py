@@ -0,0 +1,110 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.core import templates as templates_module
+from kodimanager.core.templates import TemplateStore, clone_file, clone_tree, template_key
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _install(root):
+    _write(root / "kodi.exe", b'k' * 50000)
+    _write(root / "uninstall.exe", b'u' * 1000)
+    _write(root / "addons" / "skin.estuary" / "addon.xml", b'<addon/>')
+    _write(root / "system" / "keymaps" / "keyboard.xml", b'')
+    _write(root / "portable_data" / "userdata" / "guisettings.xml", b'user')
+
+
+def _files(root):
+    return {os.path.relpath(p, root): open(p, 'rb').read()
+            for p in map(str, root.rglob("*")) if os.path.isfile(p)}
+
+
+def test_template_key():
+    assert template_key("kodi-21.1-Omega-x64.exe") == "kodi-21.1-Omega-x64"
+    assert template_key("../kodi 20.exe") == "kodi_20"
+
+
+def test_clone_file_falls_back_to_plain_copy(tmp_path, monkeypatch):
+    src = tmp_path / "a.bin"
+    _write(src, os.urandom(100000))
+    os.utime(src, ns=(1_000_000_000, 1_000_000_000))
+    assert clone_file(str(src), str(tmp_path / "b.bin")) in ('reflink', 'copy_file_range', 'copy')
+
+    def unsupported(*args):
+        raise OSError(95, "Operation not supported")
+    monkeypatch.setattr(templates_module, 'fcntl', None)
+    monkeypatch.setattr(os, 'copy_file_range', unsupported, raising=False)
+    assert clone_file(str(src), str(tmp_path / "c.bin")) == 'copy'
+
+    for name in ("b.bin", "c.bin"):
+        assert (tmp_path / name).read_bytes() == src.read_bytes()
+        assert os.stat(tmp_path / name).st_mtime_ns == 1_000_000_000
+
+
+def test_clone_tree_skips_portable_data(tmp_path):
+    _install(tmp_path / "src")
+    seen = []
+    stats = clone_tree(str(tmp_path / "src"), str(tmp_path / "dst"), workers=3,
+                       on_progress=lambda current, total: seen.append((current, total)))
+
+    expected = {k: v for k, v in _files(tmp_path / "src").items() if not k.startswith("portable_data")}
+    assert _files(tmp_path / "dst") == expected
+    assert stats['files'] == 4 and stats['bytes'] == 51008
+    assert seen[-1] == (51008, 51008)
+
+
+def test_capture_and_clone(tmp_path):
+    _install(tmp_path / "Kodi A")
+    store = TemplateStore(str(tmp_path / "config"))
+    key = template_key("kodi-21.1-Omega-x64.exe")
+    assert not store.has(key)
+
+    assert store.capture(key, str(tmp_path / "Kodi A"), version="21.1")
+    assert store.has(key)
+    assert store.manifest(key)['files'] == 4
+    assert not os.path.exists(os.path.join(store.path_for(key), "portable_data"))
+    # Only the finished template is left in the store
+    assert os.listdir(store.root) == [key]
+    assert not store.capture(key, str(tmp_path / "Kodi A"))
+
+    store.clone(key, str(tmp_path / "Kodi B"))
+    cloned = _files(tmp_path / "Kodi B")
+    assert cloned == {k: v for k, v in _files(tmp_path / "Kodi A").items() if not k.startswith("portable_data")}
+    assert ".template.json" not in cloned
+
+    with pytest.raises(FileExistsError):
+        store.clone(key, str(tmp_path / "Kodi B"))
+    with pytest.raises(FileNotFoundError):
+        store.clone("kodi-20.0", str(tmp_path / "Kodi C"))
+
+
+def test_hardlinked_clone(tmp_path):
+    _install(tmp_path / "Kodi A")
+    store = TemplateStore(str(tmp_path / "config"))
+    store.capture("k", str(tmp_path / "Kodi A"))
+
+    stats = store.clone("k", str(tmp_path / "Kodi B"), link=True)
+    assert stats['methods'] == {'link': 4}
+    assert os.stat(tmp_path / "Kodi B" / "kodi.exe").st_ino == \
+        os.stat(os.path.join(store.path_for("k"), "kodi.exe")).st_ino
+
+
+def test_template_holds_what_dedup_treats_as_program_files(tmp_path):
+    from kodimanager.core.dedup import iter_program_files
+    from kodimanager.core.reclaimer import tombstone_path
+
+    _install(tmp_path / "src")
+    _write(tmp_path / "src" / os.path.basename(tombstone_path("old")) / "x.bin", b'x')
+    clone_tree(str(tmp_path / "src"), str(tmp_path / "dst"))
+
+    program = {os.path.relpath(f.path, tmp_path / "src") for f in iter_program_files(str(tmp_path / "src"))}
+    assert set(_files(tmp_path / "dst")) == program
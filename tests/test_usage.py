@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager import cli
+from kodimanager.core import usage as usage_module
+from kodimanager.core.manager import InstanceManager
+from kodimanager.core.usage import DiskUsageService
+
+
+def _write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+
+
+def _instance(root):
+    _write(root / "kodi.exe", 1000)
+    _write(root / "portable_data" / "addons" / "plugin.video.x" / "addon.xml", 200)
+    _write(root / "portable_data" / "addons" / "packages" / "plugin.video.x-1.0.zip", 300)
+    for n in range(40):
+        _write(root / "portable_data" / "userdata" / "Thumbnails" / f"{n % 16:x}" / f"{n}.jpg", 10)
+    _write(root / "portable_data" / "userdata" / "Database" / "MyVideos131.db", 50)
+    _write(root / "portable_data" / "userdata" / "guisettings.xml", 7)
+    _write(root / "portable_data" / "temp" / "kodi.log", 5)
+
+
+def _counting_scandir(monkeypatch):
+    calls = []
+    real = os.scandir
+
+    def scandir(path):
+        calls.append(path)
+        return real(path)
+    monkeypatch.setattr(os, 'scandir', scandir)
+    return calls
+
+
+def test_breakdown(tmp_path):
+    _instance(tmp_path / "Kodi")
+    usage = DiskUsageService(str(tmp_path / "usage_cache.json")).measure(str(tmp_path / "Kodi"))
+
+    assert usage.breakdown == {'program': 1000, 'addons': 200, 'packages': 300, 'thumbnails': 400,
+                               'database': 50, 'temp': 5, 'other': 7}
+    assert usage.total == 1962
+    assert usage.files == 46
+
+
+def test_refresh_lists_only_changed_folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(usage_module, 'RACY_WINDOW_NS', 0)
+    kodi = tmp_path / "Kodi"
+    _instance(kodi)
+    cache = str(tmp_path / "usage_cache.json")
+    DiskUsageService(cache).measure(str(kodi))
+
+    calls = _counting_scandir(monkeypatch)
+    usage = DiskUsageService(cache).measure(str(kodi))
+    assert usage.total == 1962
+    # Only the volatile folders are read again
+    volatile = {str(kodi / "portable_data" / "userdata" / "Database"), str(kodi / "portable_data" / "temp")}
+    assert set(calls) == volatile
+
+    calls.clear()
+    _write(kodi / "portable_data" / "userdata" / "Thumbnails" / "a" / "new.jpg", 90)
+    # Grown in place: the folder mtime does not change
+    _write(kodi / "portable_data" / "userdata" / "Database" / "MyVideos131.db", 150)
+    usage = DiskUsageService(cache).measure(str(kodi))
+    assert usage.breakdown['thumbnails'] == 490 and usage.breakdown['database'] == 150
+    assert set(calls) == volatile | {str(kodi / "portable_data" / "userdata" / "Thumbnails" / "a")}
+
+
+def test_manager_and_cli(tmp_path, capsys):
+    config = str(tmp_path / "config")
+    manager = InstanceManager(config_dir=config)
+    _instance(tmp_path / "Kodi")
+    inst = manager.register_instance("Salon", str(tmp_path / "Kodi"), "21.1")
+    gone = manager.register_instance("Gone", str(tmp_path / "Gone"), "21.1")
+
+    streamed = []
+    usage = manager.get_all_disk_usage(on_result=lambda i, u: streamed.append(i))
+    assert streamed == [inst.id] and usage[inst.id].total == 1962
+    assert gone.id not in usage
+
+    assert cli.main(['--config-dir', config, 'usage', '--json']) == 0
+    data = json.loads(capsys.readouterr().out)
+    assert data[inst.id]['name'] == "Salon"
+    assert data[inst.id]['breakdown']['thumbnails'] == 400
+
+    assert cli.main(['--config-dir', config, 'usage']) == 0
+    out = capsys.readouterr().out
+    assert "Salon" in out and "no encontrada" in out
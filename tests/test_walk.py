@@ -0,0 +1,44 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from kodimanager.utils.walk import ParallelWalk
+
+
+def test_walk_visits_every_item_and_finishes_once():
+    visited = []
+    lock = threading.Lock()
+    done = []
+
+    def visit(name, depth):
+        with lock:
+            visited.append(name)
+        if depth < 3:
+            for n in range(3):
+                walk.submit(f"{name}/{n}", depth + 1)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        walk = ParallelWalk(pool, visit, on_done=lambda: done.append(True))
+        walk.start([("a", 0), ("b", 0)])
+        assert walk.wait(10)
+
+    # 1 + 3 + 9 + 27 per root
+    assert len(visited) == len(set(visited)) == 80
+    assert done == [True]
+
+
+def test_walk_finishes_when_pool_is_shut_down():
+    pool = ThreadPoolExecutor(max_workers=1)
+    pool.shutdown()
+    walk = ParallelWalk(pool, lambda path: None)
+    walk.start([("a",), ("b",)])
+    assert walk.wait(1)
+
+
+def test_empty_walk_is_done():
+    walk = ParallelWalk(ThreadPoolExecutor(max_workers=1), lambda path: None)
+    walk.start([])
+    assert walk.wait(0)